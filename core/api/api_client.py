@@ -1,9 +1,28 @@
 import requests
 import logging
 from core.utils.config_manager import ConfigManager
+from core.utils.retry_policy import RetryPolicy
+
+# 网关错误和限流的响应可以重试
+RETRYABLE_STATUS_CODES = frozenset((429, 502, 503, 504))
+
+
+def is_retryable_response(response):
+    """响应状态码是否属于可重试的暂时性错误"""
+    return response.status_code in RETRYABLE_STATUS_CODES
+
 
 class APIClient:
-    """API Client for making API requests"""
+    """API Client for making API requests
+    
+    每种请求方法声明自己的重试策略，子类可以覆盖。幂等的GET/PUT/DELETE在网络错误、超时和
+    RETRYABLE_STATUS_CODES响应时退避重试；POST不是幂等的，默认不重试。
+    """
+    
+    GET_RETRY = RetryPolicy('api.get', retry_on=('network', 'timeout'), retry_on_result=is_retryable_response)
+    POST_RETRY = RetryPolicy('api.post', retry_on=())
+    PUT_RETRY = RetryPolicy('api.put', retry_on=('network', 'timeout'), retry_on_result=is_retryable_response)
+    DELETE_RETRY = RetryPolicy('api.delete', retry_on=('network', 'timeout'), retry_on_result=is_retryable_response)
     
     def __init__(self):
         self.config = ConfigManager()
@@ -14,51 +33,51 @@ class APIClient:
     def get(self, endpoint, params=None, headers=None):
         """Make a GET request to the API"""
         url = f"{self.base_url}{endpoint}"
-        self.logger.info(f"Making GET request to {url}")
+        self.logger.info("Making GET request to %s", url)
         
         try:
-            response = self.session.get(url, params=params, headers=headers)
-            self.logger.info(f"Response status code: {response.status_code}")
+            response = self.GET_RETRY.run(self.session.get, url, params=params, headers=headers)
+            self.logger.info("Response status code: %s", response.status_code)
             return response
         except Exception as e:
-            self.logger.error(f"Error making GET request: {str(e)}")
+            self.logger.error("Error making GET request: %s", e)
             raise
     
     def post(self, endpoint, data=None, json=None, headers=None):
         """Make a POST request to the API"""
         url = f"{self.base_url}{endpoint}"
-        self.logger.info(f"Making POST request to {url}")
+        self.logger.info("Making POST request to %s", url)
         
         try:
-            response = self.session.post(url, data=data, json=json, headers=headers)
-            self.logger.info(f"Response status code: {response.status_code}")
+            response = self.POST_RETRY.run(self.session.post, url, data=data, json=json, headers=headers)
+            self.logger.info("Response status code: %s", response.status_code)
             return response
         except Exception as e:
-            self.logger.error(f"Error making POST request: {str(e)}")
+            self.logger.error("Error making POST request: %s", e)
             raise
     
     def put(self, endpoint, data=None, json=None, headers=None):
         """Make a PUT request to the API"""
         url = f"{self.base_url}{endpoint}"
-        self.logger.info(f"Making PUT request to {url}")
+        self.logger.info("Making PUT request to %s", url)
         
         try:
-            response = self.session.put(url, data=data, json=json, headers=headers)
-            self.logger.info(f"Response status code: {response.status_code}")
+            response = self.PUT_RETRY.run(self.session.put, url, data=data, json=json, headers=headers)
+            self.logger.info("Response status code: %s", response.status_code)
             return response
         except Exception as e:
-            self.logger.error(f"Error making PUT request: {str(e)}")
+            self.logger.error("Error making PUT request: %s", e)
             raise
     
     def delete(self, endpoint, headers=None):
         """Make a DELETE request to the API"""
         url = f"{self.base_url}{endpoint}"
-        self.logger.info(f"Making DELETE request to {url}")
+        self.logger.info("Making DELETE request to %s", url)
         
         try:
-            response = self.session.delete(url, headers=headers)
-            self.logger.info(f"Response status code: {response.status_code}")
+            response = self.DELETE_RETRY.run(self.session.delete, url, headers=headers)
+            self.logger.info("Response status code: %s", response.status_code)
             return response
         except Exception as e:
-            self.logger.error(f"Error making DELETE request: {str(e)}")
+            self.logger.error("Error making DELETE request: %s", e)
             raise 
\ No newline at end of file
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core.app.device_pool import _file_lock
+from core.app.device_state import get_device_state_cache
+from core.utils.config_manager import ConfigManager
+
+
+class AppArtifactManager:
+    """被测应用安装包管理
+
+    - 计算安装包（APK/IPA文件或.app目录）的SHA-256，按路径、大小和修改时间缓存，同一个构建只计算一次
+    - 在共享状态文件中记录每台设备上安装的应用哈希，哈希未变化时跳过安装
+    - 需要安装的设备并行安装（Android使用adb，iOS模拟器使用simctl），每台设备通过文件锁保证只有一个进程在安装
+    - 无法直接安装的设备（例如远程真机）通过app capability交给Appium安装，会话创建成功后记录哈希
+    """
+
+    def __init__(self, platform, app_path, app_id, state_file, install_workers=4):
+        self.logger = logging.getLogger(__name__)
+        self.platform = platform
+        self.app_path = app_path
+        self.app_id = app_id
+        self.state_file = state_file
+        self.install_workers = max(1, install_workers)
+        self._lock = threading.Lock()
+        self._digest = None
+        self._digest_key = None
+
+    @classmethod
+    def from_config(cls, platform):
+        """根据配置创建安装包管理器，未配置安装包路径时返回None"""
+        config_manager = ConfigManager()
+        config = config_manager.get_app_artifact_config()
+        app_path = config[f'{platform}_app_path']
+        if not app_path:
+            return None
+        if not os.path.exists(app_path):
+            logging.getLogger(__name__).warning(f"{platform} app artifact {app_path} does not exist, using the installed app")
+            return None
+        if platform == 'android':
+            app_id = config_manager.get_android_config()['app_package']
+        else:
+            app_id = config_manager.get_ios_config()['bundle_id']
+        return cls(platform, app_path, app_id, config['state_file'], config['install_workers'])
+
+    def digest(self):
+        """返回安装包内容的SHA-256，文件未变化时复用上次结果"""
+        key = self._stat_key()
+        with self._lock:
+            if self._digest is not None and self._digest_key == key:
+                return self._digest
+        sha256 = hashlib.sha256()
+        for path in self._files():
+            # .app目录按相对路径和内容计算哈希，文件重命名也会改变哈希
+            sha256.update(os.path.relpath(path, self.app_path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    sha256.update(chunk)
+        with self._lock:
+            self._digest, self._digest_key = sha256.hexdigest(), key
+        self.logger.info(f"App artifact {self.app_path} sha256={self._digest[:12]}")
+        return self._digest
+
+    def is_current(self, device_id):
+        """判断设备上安装的应用是否就是当前安装包"""
+        installed = self._read_state().get(self.platform, {}).get(device_id, {})
+        if installed.get('app_id') != self.app_id or installed.get('sha256') != self.digest():
+            return False
+        # 设备被擦除后记录会过期，Android可以低成本地确认应用仍然存在
+        if self.platform == 'android':
+            return get_device_state_cache().is_package_installed(self.app_id, device_id)
+        return True
+
+    def ensure_installed(self, device_ids):
+        """在需要的设备上并行安装当前安装包
+
+        Args:
+            device_ids: 设备标识列表（Android序列号 / iOS udid）
+
+        Returns:
+            {设备标识: 是否为当前安装包}
+        """
+        device_ids = list(dict.fromkeys(device_id for device_id in device_ids if device_id))
+        results = {device_id: self.is_current(device_id) for device_id in device_ids}
+        pending = [device_id for device_id, current in results.items() if not current]
+        if not pending:
+            self.logger.info(f"App {self.app_id} is up to date on {device_ids}, skipping installation")
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.install_workers, len(pending))) as executor:
+            results.update(zip(pending, executor.map(self._install_locked, pending)))
+        return results
+
+    def app_capability(self, device_id):
+        """返回会话需要的app capability：设备上已是当前安装包时返回None，否则返回安装包路径交给Appium安装"""
+        return None if self.is_current(device_id) else os.path.abspath(self.app_path)
+
+    def mark_installed(self, device_id):
+        """记录设备上已安装当前安装包（Appium通过app capability完成安装后调用）"""
+        self._update_state(device_id, {'app_id': self.app_id, 'sha256': self.digest()})
+
+    def _install_locked(self, device_id):
+        lock_path = f"{self.state_file}.{self.platform}.{device_id.replace(os.sep, '_')}.lock"
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with _file_lock(lock_path, timeout=600):
+            # 等锁期间其他进程可能已经完成安装
+            if self.is_current(device_id):
+                return True
+            return self._install(device_id)
+
+    def _install(self, device_id):
+        if self.platform == 'android':
+            cmd = ['adb', '-s', device_id, 'install', '-r', self.app_path]
+        else:
+            cmd = ['xcrun', 'simctl', 'install', device_id, self.app_path]
+        self.logger.info(f"Installing {self.app_id} on {device_id}: {' '.join(cmd)}")
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        except (OSError, subprocess.SubprocessError) as e:
+            self.logger.warning(f"Cannot install {self.app_id} on {device_id}, leaving it to Appium: {str(e)}")
+            return False
+        # adb install在部分版本中失败时返回码仍为0，需要检查输出
+        if result.returncode != 0 or 'Failure' in result.stdout:
+            self.logger.warning(f"Installing {self.app_id} on {device_id} failed: {(result.stderr or result.stdout).strip()}")
+            return False
+        if self.platform == 'android':
+            get_device_state_cache().invalidate_package(self.app_id, device_id)
+        self.mark_installed(device_id)
+        self.logger.info(f"Installed {self.app_id} on {device_id}")
+        return True
+
+    def _files(self):
+        if os.path.isfile(self.app_path):
+            return [self.app_path]
+        files = []
+        for root, dirs, names in os.walk(self.app_path):
+            dirs.sort()
+            files.extend(os.path.join(root, name) for name in sorted(names))
+        return files
+
+    def _stat_key(self):
+        stats = [os.stat(path) for path in self._files()]
+        return len(stats), sum(stat.st_size for stat in stats), max((stat.st_mtime_ns for stat in stats), default=0)
+
+    def _read_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_state(self, device_id, entry):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with _file_lock(f'{self.state_file}.lock'):
+            state = self._read_state()
+            state.setdefault(self.platform, {})[device_id] = entry
+            tmp_path = f'{self.state_file}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.state_file)
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_app_artifact_manager(platform):
+    """返回平台共享的安装包管理器，未配置安装包路径时返回None"""
+    with _managers_lock:
+        if platform not in _managers:
+            _managers[platform] = AppArtifactManager.from_config(platform)
+        return _managers[platform]
@@ -1,8 +1,6 @@
 import logging
 import os
-import subprocess
 import re
-import requests
 from typing import Dict, Any, Optional
 
 try:
@@ -18,6 +16,10 @@ except ImportError:
     APPIUM_AVAILABLE = False
 
 from core.utils.config_manager import ConfigManager
+from core.app.device_state import get_device_state_cache
+from core.app.appium_server_pool import get_appium_server_pool
+from core.app.app_artifacts import get_app_artifact_manager
+from core.utils.command_tracer import trace_driver
 
 class AppiumFactory:
     """Appium驱动工厂，负责创建Android和iOS驱动"""
@@ -35,9 +37,12 @@ class AppiumFactory:
         # 设置一些辅助属性
         self.logger.info("Appium factory initialized")
     
-    def get_android_driver(self) -> Optional[webdriver.Remote]:
+    def get_android_driver(self, device: Optional[Dict[str, Any]] = None) -> Optional[webdriver.Remote]:
         """创建Android驱动
         
+        Args:
+            device: 设备池中的设备定义，覆盖配置中的设备名、平台版本和Appium地址
+        
         Returns:
             Appium WebDriver对象或None（如果创建失败）
         """
@@ -46,8 +51,14 @@ class AppiumFactory:
             return None
             
         # 获取Android配置
-        config = self.config_manager.get_android_config()
-        self.logger.info(f"Creating Android Appium driver with config: {config}")
+        config = dict(self.config_manager.get_android_config())
+        device = device or {}
+        config.update({key: device[key] for key in ('platform_version', 'appium_server') if device.get(key)})
+        if not device.get('appium_server'):
+            self._use_managed_server(config, device.get('name') or 'android')
+        if device.get('udid'):
+            config['device_name'] = device['udid']
+        self.logger.info("Creating Android Appium driver with config: %s", config)
         
         # 检查必需的配置
         app_package = config.get('app_package', '')
@@ -57,24 +68,28 @@ class AppiumFactory:
         appium_server = config.get('appium_server', 'http://localhost:4723')
         
         # 记录配置信息
-        self.logger.info(f"Android device name: {device_name}")
-        self.logger.info(f"Android platform version: {platform_version}")
-        self.logger.info(f"Android app package: {app_package}")
-        self.logger.info(f"Android app activity: {app_activity}")
-        self.logger.info(f"Appium server URL: {appium_server}")
+        self.logger.info("Android device name: %s", device_name)
+        self.logger.info("Android platform version: %s", platform_version)
+        self.logger.info("Android app package: %s", app_package)
+        self.logger.info("Android app activity: %s", app_activity)
+        self.logger.info("Appium server URL: %s", appium_server)
         
         # 验证Appium服务器是否可用
         self._verify_appium_server(appium_server)
         
+        # 安装包哈希变化时才重新安装，无法直接安装时通过app capability交给Appium
+        artifacts = get_app_artifact_manager('android')
+        app_path = self._prepare_app(artifacts, device.get('udid') or device_name)
+        
         # 检查应用是否已安装
-        is_app_installed = self._is_android_app_installed(app_package)
+        is_app_installed = app_path is not None or self._is_android_app_installed(app_package, device_name)
         
         # 设备上可能没有这个应用，但我们可以继续进行，因为启动应用可能会自动安装
         if not is_app_installed:
-            self.logger.warning(f"App {app_package} might not be installed on the device.")
+            self.logger.warning("App %s might not be installed on the device.", app_package)
         
         # 记录原始app_activity
-        self.logger.info(f"Original app_activity from config: {app_activity}")
+        self.logger.info("Original app_activity from config: %s", app_activity)
         
         try:
             # 创建UiAutomator2选项
@@ -85,28 +100,41 @@ class AppiumFactory:
             options.platform_version = platform_version
             options.app_package = app_package
             options.app_activity = app_activity
+            if app_path:
+                options.app = app_path
             options.automation_name = "UiAutomator2"
             options.new_command_timeout = self.timeout
             options.no_reset = False
             options.full_reset = False
             
+            # 设备池中的设备需要独立的udid和systemPort，避免并行会话冲突
+            if device.get('udid'):
+                options.udid = device['udid']
+            if device.get('system_port'):
+                options.system_port = int(device['system_port'])
+            
             # 记录使用的capabilities
             capabilities = options.to_capabilities()
-            self.logger.info(f"Using capabilities through options: {capabilities}")
+            self.logger.info("Using capabilities through options: %s", capabilities)
             
             # 创建Appium连接
-            self.logger.info(f"Connecting to Appium server at {appium_server} with options")
-            driver = webdriver.Remote(appium_server, options=options)
+            self.logger.info("Connecting to Appium server at %s with options", appium_server)
+            driver = trace_driver(webdriver.Remote(appium_server, options=options))
             self.logger.info("Successfully connected to Android device")
+            if app_path:
+                artifacts.mark_installed(device.get('udid') or device_name)
             
             return driver
         except Exception as e:
-            self.logger.error(f"Error creating Android driver: {str(e)}")
+            self.logger.error("Error creating Android driver: %s", e)
             raise
     
-    def get_ios_driver(self) -> Optional[webdriver.Remote]:
+    def get_ios_driver(self, device: Optional[Dict[str, Any]] = None) -> Optional[webdriver.Remote]:
         """创建iOS驱动
         
+        Args:
+            device: 设备池中的设备定义，覆盖配置中的设备名、平台版本和Appium地址
+        
         Returns:
             Appium WebDriver对象或None（如果创建失败）
         """
@@ -115,8 +143,14 @@ class AppiumFactory:
             return None
             
         # 获取iOS配置
-        config = self.config_manager.get_ios_config()
-        self.logger.info(f"Creating iOS Appium driver with config: {config}")
+        config = dict(self.config_manager.get_ios_config())
+        device = device or {}
+        config.update({key: device[key] for key in ('platform_version', 'appium_server') if device.get(key)})
+        if not device.get('appium_server'):
+            self._use_managed_server(config, device.get('name') or 'ios')
+        if device.get('name'):
+            config['device_name'] = device['name']
+        self.logger.info("Creating iOS Appium driver with config: %s", config)
         
         # 检查必需的配置
         bundle_id = config.get('bundle_id', '')
@@ -125,16 +159,20 @@ class AppiumFactory:
         appium_server = config.get('appium_server', 'http://localhost:4724')
         
         # 记录配置信息
-        self.logger.info(f"iOS device name: {device_name}")
-        self.logger.info(f"iOS platform version: {platform_version}")
-        self.logger.info(f"iOS bundle ID: {bundle_id}")
-        self.logger.info(f"Appium server URL: {appium_server}")
+        self.logger.info("iOS device name: %s", device_name)
+        self.logger.info("iOS platform version: %s", platform_version)
+        self.logger.info("iOS bundle ID: %s", bundle_id)
+        self.logger.info("Appium server URL: %s", appium_server)
         
         # 验证Appium服务器是否可用
         self._verify_appium_server(appium_server)
         
-        # 假设应用已经安装，否则iOS自动化将失败
-        self.logger.warning(f"Assuming app {bundle_id} is preinstalled")
+        # 配置了IOS_APP_PATH时按哈希安装，否则假设应用已经安装
+        artifacts = get_app_artifact_manager('ios')
+        device_id = device.get('udid') or 'booted'
+        app_path = self._prepare_app(artifacts, device_id)
+        if artifacts is None:
+            self.logger.warning("Assuming app %s is preinstalled", bundle_id)
         
         try:
             # 创建XCUITest选项
@@ -144,27 +182,63 @@ class AppiumFactory:
             options.device_name = device_name
             options.platform_version = platform_version
             options.bundle_id = bundle_id
+            if app_path:
+                options.app = app_path
             options.automation_name = "XCUITest"
             options.new_command_timeout = self.timeout
             options.no_reset = False
             options.full_reset = False
             
+            # 设备池中的设备需要独立的udid和wdaLocalPort，避免并行会话冲突
+            if device.get('udid'):
+                options.udid = device['udid']
+            if device.get('wda_local_port'):
+                options.wda_local_port = int(device['wda_local_port'])
+            
             # 记录使用的capabilities
             capabilities = options.to_capabilities()
-            self.logger.info(f"Using capabilities through options: {capabilities}")
+            self.logger.info("Using capabilities through options: %s", capabilities)
             
             # 创建Appium连接
-            self.logger.info(f"Connecting to Appium server at {appium_server} with options")
-            driver = webdriver.Remote(appium_server, options=options)
+            self.logger.info("Connecting to Appium server at %s with options", appium_server)
+            driver = trace_driver(webdriver.Remote(appium_server, options=options))
             self.logger.info("Successfully connected to iOS device")
+            if app_path:
+                artifacts.mark_installed(device_id)
             
             return driver
         except Exception as e:
-            self.logger.error(f"Error creating iOS driver: {str(e)}")
+            self.logger.error("Error creating iOS driver: %s", e)
             raise
     
+    def _use_managed_server(self, config: Dict[str, Any], key: str) -> None:
+        """启用托管Appium服务器时，用分配给该设备/平台的服务器地址替换APPIUM_SERVER
+        
+        Args:
+            config: 平台配置字典，会被原地修改
+            key: 服务器分配键（设备名或平台）
+        """
+        server_pool = get_appium_server_pool()
+        if server_pool is not None:
+            config['appium_server'] = server_pool.endpoint(key)
+    
+    def _prepare_app(self, artifacts, device_id: str) -> Optional[str]:
+        """确保设备上安装的是当前安装包
+        
+        Args:
+            artifacts: 平台的安装包管理器，未配置安装包时为None
+            device_id: 设备标识（Android序列号 / iOS udid）
+            
+        Returns:
+            需要通过app capability交给Appium安装的安装包路径，设备上已是当前安装包时为None
+        """
+        if artifacts is None or not device_id:
+            return None
+        artifacts.ensure_installed([device_id])
+        return artifacts.app_capability(device_id)
+    
     def _verify_appium_server(self, server_url: str) -> bool:
-        """验证Appium服务器是否可用
+        """验证Appium服务器是否可用，结果由设备状态缓存按TTL复用
         
         Args:
             server_url: Appium服务器URL
@@ -172,49 +246,21 @@ class AppiumFactory:
         Returns:
             布尔值表示服务器是否可用
         """
-        self.logger.info(f"Verifying Appium server at {server_url}")
-        
-        # 确保URL以http开头
-        if not server_url.startswith('http'):
-            server_url = f"http://{server_url}"
-        
-        # Appium 2.x 不再使用/wd/hub路径
-        if '/wd/hub' in server_url:
-            server_url = server_url.replace('/wd/hub', '')
-            self.logger.info(f"Removed '/wd/hub' from server URL for Appium 2.x compatibility: {server_url}")
-        
-        try:
-            # 尝试连接到Appium服务器
-            response = requests.get(f"{server_url}/status", timeout=5)
-            if response.status_code == 200:
-                self.logger.info(f"Appium server is running at {server_url}")
-                return True
-            else:
-                self.logger.error(f"Appium server returned status code {response.status_code}")
-                return False
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error connecting to Appium server: {str(e)}")
-            return False
+        ready = get_device_state_cache().is_server_ready(server_url)
+        if ready:
+            self.logger.info("Appium server is running at %s", server_url)
+        return ready
     
-    def _is_android_app_installed(self, package_name: str) -> bool:
+    def _is_android_app_installed(self, package_name: str, device_name: str = '') -> bool:
         """检查Android应用是否已安装
         
         Args:
             package_name: 应用包名
+            device_name: 设备名，是adb序列号时只查询该设备
             
         Returns:
             布尔值表示应用是否已安装
         """
-        if not package_name:
-            return False
-            
-        try:
-            # 使用adb检查应用是否已安装
-            cmd = f"adb shell pm list packages | grep {package_name}"
-            self.logger.info(f"Checking if app {package_name} is installed with command: {cmd}")
-            
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            return package_name in result.stdout
-        except Exception as e:
-            self.logger.error(f"Error checking if app is installed: {str(e)}")
-            return False 
\ No newline at end of file
+        device_state = get_device_state_cache()
+        serial = device_name if device_name in device_state.devices() else None
+        return device_state.is_package_installed(package_name, serial)
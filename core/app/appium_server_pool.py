@@ -0,0 +1,200 @@
+import atexit
+import logging
+import os
+import shlex
+import socket
+import subprocess
+import threading
+import time
+import requests
+from core.app.device_state import get_device_state_cache
+from core.utils.config_manager import ConfigManager
+
+
+def _free_port():
+    """向操作系统申请一个空闲端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class AppiumServerPool:
+    """本地Appium服务器进程池
+
+    套件开始时在空闲端口上启动APPIUM_MANAGED_SERVERS个Appium进程并立即返回，
+    就绪检查（轮询/status）在后台进行，与套件的其他准备工作重叠；
+    endpoint()在服务器就绪前阻塞。后台监控线程在进程意外退出时重启服务器，
+    套件结束时关闭所有进程。
+    """
+
+    def __init__(self, count, command, startup_timeout=60, max_restarts=3, log_dir=''):
+        self.logger = logging.getLogger(__name__)
+        self.count = count
+        self.command = command
+        self.startup_timeout = startup_timeout
+        self.max_restarts = max_restarts
+        self.log_dir = log_dir
+        self._servers = []
+        self._assignments = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._supervisor = None
+
+    @classmethod
+    def from_config(cls):
+        """根据配置创建服务器池，APPIUM_MANAGED_SERVERS为0时返回None"""
+        config = ConfigManager().get_appium_server_pool_config()
+        if config['managed'] <= 0:
+            return None
+        return cls(config['managed'], config['command'], config['startup_timeout'],
+                   config['max_restarts'], config['log_dir'])
+
+    def start(self):
+        """启动所有服务器进程，不等待就绪；stop()之后再次调用会启动一组新的进程"""
+        with self._lock:
+            if self._servers:
+                return
+            # 每次启动使用新的停止标志，上一轮的就绪检查和监控线程仍持有已置位的旧标志并退出
+            self._stopping = threading.Event()
+            if self.log_dir:
+                os.makedirs(self.log_dir, exist_ok=True)
+            for index in range(self.count):
+                server = {'index': index, 'port': _free_port(), 'process': None, 'log': None,
+                          'ready': threading.Event(), 'failed': False, 'restarts': 0}
+                self._spawn(server)
+                self._servers.append(server)
+            self._supervisor = threading.Thread(target=self._supervise, args=(self._stopping,),
+                                                name='appium-supervisor', daemon=True)
+            self._supervisor.start()
+        atexit.register(self.stop)
+        self.logger.info(f"Starting {self.count} managed Appium server(s) on ports "
+                         f"{', '.join(str(server['port']) for server in self._servers)}")
+
+    def endpoint(self, key, timeout=None):
+        """返回分配给key（设备名或平台）的服务器地址，服务器未就绪时等待
+
+        每个key固定使用同一个服务器；服务器数量少于key时按轮询共享。
+
+        Raises:
+            RuntimeError: 服务器无法启动，或在超时时间内没有就绪
+        """
+        self.start()
+        with self._lock:
+            if key not in self._assignments:
+                self._assignments[key] = len(self._assignments) % len(self._servers)
+            server = self._servers[self._assignments[key]]
+        deadline = time.monotonic() + (timeout if timeout is not None else self.startup_timeout)
+        # 分段等待，进程无法启动或重启次数用尽时立即失败
+        while not server['ready'].wait(0.25):
+            if server['failed']:
+                raise RuntimeError(f"Managed Appium server {server['index']} failed to start")
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Managed Appium server on port {server['port']} is not ready")
+        return self._url(server)
+
+    def endpoints(self):
+        """返回所有已就绪服务器的地址"""
+        with self._lock:
+            return [self._url(server) for server in self._servers if server['ready'].is_set()]
+
+    def stop(self):
+        """关闭所有服务器进程"""
+        self._stopping.set()
+        with self._lock:
+            servers, self._servers = self._servers, []
+            self._assignments.clear()
+        for server in servers:
+            self._terminate(server)
+        if servers:
+            self.logger.info(f"Stopped {len(servers)} managed Appium server(s)")
+
+    @staticmethod
+    def _url(server):
+        return f"http://127.0.0.1:{server['port']}"
+
+    def _spawn(self, server):
+        server['ready'].clear()
+        cmd = [part.format(port=server['port']) for part in shlex.split(self.command)]
+        if self.log_dir:
+            server['log'] = open(os.path.join(self.log_dir, f"appium_{server['index']}.log"), 'ab')
+        try:
+            server['process'] = subprocess.Popen(
+                cmd, stdout=server['log'] or subprocess.DEVNULL, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self.logger.error(f"Cannot start Appium server with '{' '.join(cmd)}': {str(e)}")
+            server['failed'] = True
+            return
+        threading.Thread(target=self._wait_ready, args=(server, server['process'], self._stopping),
+                         name=f"appium-ready-{server['port']}", daemon=True).start()
+
+    def _wait_ready(self, server, process, stopping):
+        deadline = time.monotonic() + self.startup_timeout
+        url = self._url(server)
+        while time.monotonic() < deadline and not stopping.is_set():
+            if process.poll() is not None:
+                return
+            try:
+                if requests.get(f"{url}/status", timeout=1).status_code == 200:
+                    get_device_state_cache().is_server_ready(url, refresh=True)
+                    server['ready'].set()
+                    self.logger.info(f"Managed Appium server ready at {url}")
+                    return
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.25)
+        if not stopping.is_set():
+            self.logger.error(f"Managed Appium server at {url} did not become ready in {self.startup_timeout}s")
+            process.kill()
+
+    def _supervise(self, stopping):
+        while not stopping.wait(1):
+            with self._lock:
+                crashed = [server for server in self._servers
+                           if not server['failed'] and server['process'].poll() is not None]
+                for server in crashed:
+                    self._restart(server)
+
+    def _restart(self, server):
+        self._close_log(server)
+        if server['restarts'] >= self.max_restarts:
+            self.logger.error(f"Managed Appium server on port {server['port']} crashed too often, giving up")
+            server['failed'] = True
+            return
+        server['restarts'] += 1
+        # 原端口可能被其他进程占用，重启后使用新的空闲端口
+        server['port'] = _free_port()
+        self.logger.warning(f"Managed Appium server {server['index']} exited "
+                            f"(code {server['process'].returncode}), restarting on port {server['port']}")
+        self._spawn(server)
+
+    def _terminate(self, server):
+        process = server['process']
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._close_log(server)
+
+    @staticmethod
+    def _close_log(server):
+        if server['log'] is not None:
+            server['log'].close()
+            server['log'] = None
+
+
+_server_pool = None
+_server_pool_loaded = False
+_server_pool_lock = threading.Lock()
+
+
+def get_appium_server_pool():
+    """返回进程内共享的Appium服务器池，未启用托管服务器时返回None"""
+    global _server_pool, _server_pool_loaded
+    with _server_pool_lock:
+        if not _server_pool_loaded:
+            _server_pool = AppiumServerPool.from_config()
+            _server_pool_loaded = True
+        return _server_pool
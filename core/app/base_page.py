@@ -1,50 +1,79 @@
+import hashlib
 import logging
-import os
-try:
-    from appium.webdriver.common.touch_action import TouchAction
-except ImportError:
-    # 使用模拟的TouchAction类，允许代码加载但不能实际运行
-    class TouchAction:
-        def __init__(self, driver):
-            self.driver = driver
-        
-        def press(self, x=None, y=None):
-            return self
-        
-        def wait(self, ms=0):
-            return self
-        
-        def move_to(self, x=None, y=None):
-            return self
-        
-        def release(self):
-            return self
-        
-        def perform(self):
-            pass
-
-from selenium.webdriver.support.ui import WebDriverWait
+from contextlib import contextmanager
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from core.utils.common import take_screenshot, retry
+from core.utils.common import take_screenshot
+from core.utils.retry_policy import RetryPolicy
+from core.utils.wait_engine import get_wait_engine
+from core.app.locator_group import LocatorGroup, get_locator_winner_cache
+from core.app.page_snapshot import PageSnapshot, UnsupportedLocator, get_step_snapshot, set_step_snapshot, invalidate_step_snapshots
+from core.app.locator_optimizer import get_locator_optimizer
+from core.app.gestures import get_gesture_engine
+from core.utils.visual_compare import get_visual_comparator
+from core.utils.artifact_store import get_artifact_store
 
 class BaseMobilePage:
-    """Base Page Object class for mobile pages"""
+    """Base Page Object class for mobile pages
+
+    所有查找方法同时接受单个定位器元组和LocatorGroup，
+    LocatorGroup的候选定位器在同一个轮询循环中竞争，第一个满足条件的候选胜出。
+    发给服务器的XPath定位器先经过定位器优化器改写为等价的更快策略。
+    """
+    
+    # 元素状态 -> (expected_conditions工厂, 对已找到元素的检查)
+    ELEMENT_STATES = {
+        'present': (EC.presence_of_element_located, lambda element: True),
+        'visible': (EC.visibility_of_element_located, lambda element: element.is_displayed()),
+        'clickable': (EC.element_to_be_clickable, lambda element: element.is_displayed() and element.is_enabled())
+    }
+    
+    # 元素在查找和操作之间被重新渲染时重新查找并重试
+    STALE_RETRY = RetryPolicy('mobile.stale_element', retry_on=('stale',), base_delay=0.1, max_delay=0.5)
     
     def __init__(self, driver):
         self.driver = driver
         self.logger = logging.getLogger(__name__)
-        # 确保screenshots目录存在
-        self.screenshots_dir = os.path.join(os.getcwd(), 'screenshots')
-        os.makedirs(self.screenshots_dir, exist_ok=True)
+        self.wait = get_wait_engine(driver)
+        self.locator_cache = get_locator_winner_cache()
+        self.locator_optimizer = get_locator_optimizer()
+        self.gestures = get_gesture_engine(driver)
+    
+    def _server_locator(self, locator):
+        """返回实际发给服务器的定位器（XPath改写为等价的更快策略）"""
+        return self.locator_optimizer.optimize(locator, getattr(self, 'platform', 'android'))
+    
+    def _wait_for(self, locator, state='present', timeout=10):
+        """等待元素达到指定状态并返回元素，locator可以是LocatorGroup"""
+        if isinstance(locator, LocatorGroup):
+            return self._race(locator, state, timeout)[1][0]
+        condition, _ = self.ELEMENT_STATES[state]
+        return self.wait.until(condition(self._server_locator(locator)), timeout, locator=locator)
+    
+    def _race(self, group, state='present', timeout=10):
+        """在一个轮询循环中检查组内所有候选定位器，返回(胜出的定位器, 匹配的元素列表)
+        
+        上次胜出的候选排在最前，正常情况下第一次轮询的第一个请求就能命中
+        """
+        _, check = self.ELEMENT_STATES[state]
+        platform = getattr(self, 'platform', 'android')
+        candidates = [(candidate, self._server_locator(candidate)) for candidate in self.locator_cache.order(group, platform)]
+        
+        def first_match(driver):
+            for candidate, server_locator in candidates:
+                elements = driver.find_elements(*server_locator)
+                if elements and check(elements[0]):
+                    return candidate, elements
+            return None
+        
+        winner, elements = self.wait.until(first_match, timeout, locator=group)
+        self.locator_cache.record(group, platform, winner)
+        return winner, elements
     
     def find_element(self, locator, timeout=10):
         """Find an element on the page with better error handling"""
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located(locator)
-            )
-            return element
+            return self._wait_for(locator, 'present', timeout)
         except (TimeoutException, NoSuchElementException) as e:
             error_message = f"Element not found: {locator} - {str(e)}"
             self.logger.error(error_message)
@@ -54,146 +83,418 @@ class BaseMobilePage:
     def find_elements(self, locator, timeout=10):
         """Find elements on the page with better error handling"""
         try:
-            elements = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_all_elements_located(locator)
+            if isinstance(locator, LocatorGroup):
+                return self._race(locator, 'present', timeout)[1]
+            elements = self.wait.until(
+                EC.presence_of_all_elements_located(self._server_locator(locator)), timeout, locator=locator
             )
             return elements
         except (TimeoutException, NoSuchElementException) as e:
-            self.logger.warning(f"Elements not found: {locator} - {str(e)}")
-            take_screenshot(self.driver, "elements_not_found", error_context=f"Failed to find elements {locator}")
+            # 空结果是合法的查询结果，不截图
+            self.logger.warning("Elements not found: %s - %s", locator, e)
             return []
     
-    def wait_for_element_visible(self, locator, timeout=10, poll_frequency=0.5):
-        """明确等待元素可见，与find_element区别开"""
+    def wait_for_element_visible(self, locator, timeout=10, poll_frequency=None):
+        """明确等待元素可见，与find_element区别开
+
+        poll_frequency仅为兼容保留，轮询间隔由等待引擎自适应调整
+        """
         try:
-            element = WebDriverWait(self.driver, timeout, poll_frequency).until(
-                EC.visibility_of_element_located(locator)
-            )
-            return element
+            return self._wait_for(locator, 'visible', timeout)
         except (TimeoutException, NoSuchElementException) as e:
-            self.logger.error(f"Element not visible: {locator} - {str(e)}")
+            self.logger.error("Element not visible: %s - %s", locator, e)
             take_screenshot(self.driver, "element_not_visible", error_context=f"Element not visible {locator}")
             return None
     
     def click(self, locator, timeout=10):
         """Click an element on the page with retry mechanism for flaky elements"""
+        invalidate_step_snapshots(self.driver)
         try:
-            # 先尝试等待元素可点击
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable(locator)
-            )
-            # 用JavaScript点击可能更可靠
-            try:
-                element.click()
-            except Exception as e:
-                self.logger.warning(f"Normal click failed, trying JS click: {str(e)}")
-                try:
-                    self.driver.execute_script("arguments[0].click();", element)
-                except Exception as js_error:
-                    self.logger.error(f"JS click also failed: {str(js_error)}")
-                    raise
+            for attempt in self.STALE_RETRY:
+                with attempt:
+                    # 先尝试等待元素可点击
+                    element = self._wait_for(locator, 'clickable', timeout)
+                    # 用JavaScript点击可能更可靠
+                    try:
+                        element.click()
+                    except StaleElementReferenceException:
+                        raise
+                    except Exception as e:
+                        self.logger.warning("Normal click failed, trying JS click: %s", e)
+                        try:
+                            self.driver.execute_script("arguments[0].click();", element)
+                        except Exception as js_error:
+                            self.logger.error("JS click also failed: %s", js_error)
+                            raise
         except (TimeoutException, NoSuchElementException, StaleElementReferenceException) as e:
-            self.logger.error(f"Element not clickable: {locator} - {str(e)}")
+            self.logger.error("Element not clickable: %s - %s", locator, e)
             take_screenshot(self.driver, "element_not_clickable", error_context=f"Failed to click {locator}")
             raise
     
     def send_keys(self, locator, text, timeout=10, clear_first=True):
         """Send keys to an element on the page with improved error handling"""
+        invalidate_step_snapshots(self.driver)
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
-            if clear_first:
-                try:
-                    element.clear()
-                except Exception as e:
-                    self.logger.warning(f"Failed to clear field, proceeding with input: {str(e)}")
-            
-            # 尝试常规的send_keys方法
-            try:
-                element.send_keys(text)
-            except Exception as e:
-                self.logger.warning(f"Normal send_keys failed, trying JS set value: {str(e)}")
-                try:
-                    self.driver.execute_script("arguments[0].value = arguments[1];", element, text)
-                except Exception as js_error:
-                    self.logger.error(f"JS set value also failed: {str(js_error)}")
-                    raise
-        except (TimeoutException, NoSuchElementException) as e:
-            self.logger.error(f"Cannot send keys to element: {locator} - {str(e)}")
+            for attempt in self.STALE_RETRY:
+                with attempt:
+                    element = self._wait_for(locator, 'visible', timeout)
+                    if clear_first:
+                        try:
+                            element.clear()
+                        except StaleElementReferenceException:
+                            raise
+                        except Exception as e:
+                            self.logger.warning("Failed to clear field, proceeding with input: %s", e)
+                    
+                    # 尝试常规的send_keys方法
+                    try:
+                        element.send_keys(text)
+                    except StaleElementReferenceException:
+                        raise
+                    except Exception as e:
+                        self.logger.warning("Normal send_keys failed, trying JS set value: %s", e)
+                        try:
+                            self.driver.execute_script("arguments[0].value = arguments[1];", element, text)
+                        except Exception as js_error:
+                            self.logger.error("JS set value also failed: %s", js_error)
+                            raise
+        except (TimeoutException, NoSuchElementException, StaleElementReferenceException) as e:
+            self.logger.error("Cannot send keys to element: %s - %s", locator, e)
             take_screenshot(self.driver, "send_keys_failed", error_context=f"Failed to input text to {locator}")
             raise
     
     def get_text(self, locator, timeout=10):
-        """Get text from an element on the page with better error handling"""
+        """Get text from an element on the page with better error handling
+        
+        等待元素可见后从元素本身读取，不使用步骤内缓存的快照（快照可能早于不经过click的界面变化）；
+        同时读取多个元素的属性请使用get_attributes。原生界面中没有JS可用，文本为空时退回value属性
+        """
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
-            
-            # 尝试多种获取文本的方法
-            text = element.text
-            if not text:
-                # 尝试获取value属性
-                text = element.get_attribute('value') or ''
-                if not text:
-                    # 尝试使用JS获取innerText
-                    text = self.driver.execute_script("return arguments[0].innerText;", element) or ''
-            
-            return text
-        except (TimeoutException, NoSuchElementException) as e:
-            self.logger.error(f"Cannot get text from element: {locator} - {str(e)}")
+            for attempt in self.STALE_RETRY:
+                with attempt:
+                    element = self._wait_for(locator, 'visible', timeout)
+                    return element.text or element.get_attribute('value') or ''
+        except (TimeoutException, NoSuchElementException, StaleElementReferenceException) as e:
+            self.logger.error("Cannot get text from element: %s - %s", locator, e)
             take_screenshot(self.driver, "get_text_failed", error_context=f"Failed to get text from {locator}")
             return ""
     
     def is_element_visible(self, locator, timeout=5):
         """Check if an element is visible on the page with better error handling"""
         try:
-            WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
+            self._wait_for(locator, 'visible', timeout)
             return True
         except (TimeoutException, NoSuchElementException):
             return False
     
+    def probe(self, locator):
+        """零等待检查元素是否存在，单次请求立即返回，不截图"""
+        return self._probe(locator, 'present') is not None
+    
+    def probe_visible(self, locator):
+        """零等待检查元素是否存在且可见，元素不存在时只需一次请求"""
+        return self._probe(locator, 'visible') is not None
+    
+    def _probe(self, locator, state):
+        """零等待查找，返回满足状态的定位器（LocatorGroup时为胜出的候选），没有时返回None"""
+        _, check = self.ELEMENT_STATES[state]
+        platform = getattr(self, 'platform', 'android')
+        is_group = isinstance(locator, LocatorGroup)
+        for candidate in self.locator_cache.order(locator, platform) if is_group else [locator]:
+            elements = self.wait.probe(self._server_locator(candidate))
+            try:
+                if elements and check(elements[0]):
+                    if is_group:
+                        self.locator_cache.record(locator, platform, candidate)
+                    return candidate
+            except StaleElementReferenceException:
+                continue
+        return None
+    
+    def snapshot(self):
+        """获取当前界面的页面源码快照，只需一次请求，结果在当前步骤内缓存"""
+        snapshot = PageSnapshot(self.driver.page_source, getattr(self, 'platform', 'android'))
+        set_step_snapshot(self.driver, snapshot)
+        return snapshot
+    
+    def cached_snapshot(self):
+        """返回当前步骤内缓存的快照，界面被操作过或没有缓存时重新获取"""
+        return get_step_snapshot(self.driver) or self.snapshot()
+    
+    def get_attributes(self, locators, timeout=10):
+        """一次读取一个或多个元素的属性包 {text, value, label, enabled, displayed, rect}
+        
+        属性从页面源码快照中读取，同一步骤内的多次读取共享同一个快照；
+        元素不在缓存的快照中时轮询新快照直到出现或超时。
+        
+        Args:
+            locators: 单个定位器/LocatorGroup，或 {名称: 定位器} 字典
+            timeout: 等待元素出现的超时时间(秒)
+        
+        Returns:
+            单个定位器时返回属性包，字典时返回 {名称: 属性包}；未找到的元素为None
+        """
+        single = not isinstance(locators, dict)
+        query = {'element': locators} if single else locators
+        bundles = self._attribute_bundles(self.cached_snapshot(), query)
+        if any(bundle is None for bundle in bundles.values()):
+            def found(driver):
+                bundles.update(self._attribute_bundles(self.snapshot(), query))
+                return all(bundle is not None for bundle in bundles.values())
+            
+            try:
+                self.wait.until(found, timeout, locator=f"attributes:{','.join(map(str, query.values()))}")
+            except TimeoutException:
+                missing = [name for name, bundle in bundles.items() if bundle is None]
+                self.logger.warning("Elements not found for attribute read: %s", missing)
+        return bundles['element'] if single else bundles
+    
+    def _attribute_bundles(self, snapshot, query):
+        platform = getattr(self, 'platform', 'android')
+        bundles = {}
+        for name, locator in query.items():
+            is_group = isinstance(locator, LocatorGroup)
+            bundles[name] = None
+            for candidate in self.locator_cache.order(locator, platform) if is_group else [locator]:
+                bundle = self._attribute_bundle(snapshot, candidate)
+                if bundle is not None:
+                    if is_group:
+                        self.locator_cache.record(locator, platform, candidate)
+                    bundles[name] = bundle
+                    break
+        return bundles
+    
+    def _attribute_bundle(self, snapshot, locator):
+        """从快照读取第一个匹配元素（优先可见元素）的属性包，快照无法求值时退回服务器查询"""
+        try:
+            elements = snapshot.find_all(locator)
+        except UnsupportedLocator:
+            elements = self.wait.probe(self._server_locator(locator))
+            if not elements:
+                return None
+            try:
+                element = elements[0]
+                return {
+                    'text': element.text, 'value': element.get_attribute('value'), 'label': element.get_attribute('label'),
+                    'enabled': element.is_enabled(), 'displayed': element.is_displayed(), 'rect': element.rect
+                }
+            except StaleElementReferenceException:
+                return None
+        if not elements:
+            return None
+        visible = [element for element in elements if snapshot.is_visible(element)]
+        return snapshot.attributes((visible or elements)[0])
+    
+    def batch_query(self, locators, wait_for=None, timeout=10):
+        """在页面源码快照中一次性检查多个定位器，只读断言只需一次请求
+        
+        Args:
+            locators: {名称: 定位器或LocatorGroup}
+            wait_for: 需要等待可见的名称列表，为空时只取一次快照
+            timeout: 等待wait_for的超时时间(秒)，超时后返回最后一次快照的结果而不抛异常
+        
+        Returns:
+            {名称: {present, visible, count, text, bounds}}，与Web端batch_query的结果结构一致
+        """
+        if not wait_for:
+            return self._evaluate(self.snapshot(), locators)
+        last = {}
+        
+        def ready(driver):
+            last['results'] = self._evaluate(self.snapshot(), locators)
+            return all(last['results'][name]['visible'] for name in wait_for)
+        
+        try:
+            self.wait.until(ready, timeout, locator=f"snapshot:{','.join(wait_for)}")
+        except TimeoutException:
+            self.logger.info("Snapshot query timed out waiting for %s", wait_for)
+        return last['results']
+    
+    def _evaluate(self, snapshot, locators):
+        platform = getattr(self, 'platform', 'android')
+        results = {}
+        for name, locator in locators.items():
+            is_group = isinstance(locator, LocatorGroup)
+            entry = None
+            for candidate in self.locator_cache.order(locator, platform) if is_group else [locator]:
+                candidate_entry = self._evaluate_locator(snapshot, candidate)
+                if candidate_entry['visible']:
+                    entry = candidate_entry
+                    if is_group:
+                        self.locator_cache.record(locator, platform, candidate)
+                    break
+                if entry is None or (candidate_entry['present'] and not entry['present']):
+                    entry = candidate_entry
+            results[name] = entry
+        return results
+    
+    def _evaluate_locator(self, snapshot, locator):
+        """在快照中求值单个定位器，快照无法处理的定位器退回服务器查询"""
+        try:
+            elements = snapshot.find_all(locator)
+            details = snapshot.describe(elements[0]) if elements else None
+        except UnsupportedLocator as e:
+            self.logger.debug("%s, querying server instead", e)
+            elements = self.wait.probe(self._server_locator(locator))
+            details = None
+            if elements:
+                try:
+                    element = elements[0]
+                    details = {'text': element.text, 'visible': element.is_displayed(), 'bounds': element.rect}
+                except StaleElementReferenceException:
+                    elements = []
+        if not details:
+            return {'present': False, 'visible': False, 'count': 0, 'text': '', 'bounds': None}
+        return {
+            'present': True,
+            'visible': details['visible'],
+            'count': len(elements),
+            'text': details['text'] if details['visible'] else '',
+            'bounds': details['bounds']
+        }
+    
+    def page_hash(self):
+        """返回当前界面层级（page_source）的哈希值"""
+        return hashlib.sha1(self.driver.page_source.encode('utf-8')).hexdigest()
+    
+    def wait_for_transition(self, baseline=None, timeout=10, stable_polls=2):
+        """等待界面层级发生变化并稳定下来，代替固定的sleep
+        
+        Args:
+            baseline: 操作前的page_hash()，为None时只等待界面稳定
+            timeout: 最长等待时间(秒)，同时受步骤等待预算限制
+            stable_polls: 变化后需要连续相同的快照次数
+        
+        Returns:
+            界面在超时前完成切换并稳定时返回True，否则返回False（不抛异常，由后续断言判断）
+        """
+        state = {'changed': baseline is None, 'last': baseline, 'stable': 0}
+        
+        def settled(driver):
+            current = self.page_hash()
+            if not state['changed']:
+                state['changed'] = current != baseline
+            elif current == state['last']:
+                state['stable'] += 1
+            else:
+                state['stable'] = 0
+            state['last'] = current
+            return state['changed'] and state['stable'] >= stable_polls - 1
+        
+        try:
+            self.wait.until(settled, timeout, locator='<screen transition>')
+            return True
+        except TimeoutException:
+            reason = 'did not stabilize' if state['changed'] else 'did not change'
+            self.logger.info("Screen %s within %ss", reason, timeout)
+            return False
+    
+    @contextmanager
+    def expect_transition(self, timeout=10, stable_polls=2):
+        """在with块内执行会切换界面的操作，退出时等待界面变化并稳定
+        
+        Usage:
+            with page.expect_transition():
+                page.click_login_button()
+        """
+        baseline = self.page_hash()
+        yield
+        invalidate_step_snapshots(self.driver)
+        self.wait_for_transition(baseline, timeout, stable_polls)
+    
+    def wait_for_element_to_disappear(self, locator, timeout=10):
+        """Wait for an element to disappear from the page"""
+        if isinstance(locator, LocatorGroup):
+            # 组内所有候选都不存在才算消失
+            server_locators = [self._server_locator(candidate) for candidate in locator]
+            condition = lambda driver: any(driver.find_elements(*candidate) for candidate in server_locators)
+        else:
+            condition = EC.presence_of_element_located(self._server_locator(locator))
+        try:
+            self.wait.until_not(condition, timeout, locator=locator)
+            return True
+        except TimeoutException:
+            return False
+    
+    def assert_element_disappears(self, locator, timeout=10):
+        """断言元素在timeout秒内消失，元素本来就不存在时立即通过"""
+        if not self.probe(locator):
+            return
+        if not self.wait_for_element_to_disappear(locator, timeout):
+            take_screenshot(self.driver, "element_not_disappeared", error_context=f"{locator} still present after {timeout}s")
+            raise AssertionError(f"Element {locator} did not disappear within {timeout}s")
+    
     def swipe(self, start_x, start_y, end_x, end_y, duration=800):
         """Swipe from one point to another with better error handling"""
-        self.logger.info(f"Swiping from ({start_x}, {start_y}) to ({end_x}, {end_y})")
+        self.logger.info("Swiping from (%s, %s) to (%s, %s)", start_x, start_y, end_x, end_y)
+        invalidate_step_snapshots(self.driver)
         try:
-            action = TouchAction(self.driver)
-            action.press(x=start_x, y=start_y).wait(duration).move_to(x=end_x, y=end_y).release().perform()
+            self.gestures.swipe(start_x, start_y, end_x, end_y, duration)
         except Exception as e:
-            self.logger.error(f"Failed to perform swipe: {str(e)}")
+            self.logger.error("Failed to perform swipe: %s", e)
             take_screenshot(self.driver, "swipe_failed", error_context="Swipe operation failed")
     
     def scroll_down(self):
         """Scroll down on the screen with better error handling"""
         self.logger.info("Scrolling down")
+        invalidate_step_snapshots(self.driver)
         try:
-            size = self.driver.get_window_size()
-            start_x = size['width'] // 2
-            start_y = size['height'] * 0.8
-            end_x = size['width'] // 2
-            end_y = size['height'] * 0.2
-            self.swipe(start_x, start_y, end_x, end_y)
+            # 屏幕尺寸在会话内缓存，不再每次滚动都请求
+            self.gestures.scroll('down')
         except Exception as e:
-            self.logger.error(f"Failed to scroll down: {str(e)}")
+            self.logger.error("Failed to scroll down: %s", e)
             take_screenshot(self.driver, "scroll_down_failed", error_context="Scroll down failed")
     
     def scroll_up(self):
         """Scroll up on the screen with better error handling"""
         self.logger.info("Scrolling up")
+        invalidate_step_snapshots(self.driver)
         try:
-            size = self.driver.get_window_size()
-            start_x = size['width'] // 2
-            start_y = size['height'] * 0.2
-            end_x = size['width'] // 2
-            end_y = size['height'] * 0.8
-            self.swipe(start_x, start_y, end_x, end_y)
+            self.gestures.scroll('up')
         except Exception as e:
-            self.logger.error(f"Failed to scroll up: {str(e)}")
+            self.logger.error("Failed to scroll up: %s", e)
             take_screenshot(self.driver, "scroll_up_failed", error_context="Scroll up failed")
             
+    def scroll_and_collect(self, item_locator, attributes=None, max_items=0, max_swipes=10):
+        """滚动列表并收集所有行的属性，服务器支持execute driver时整个过程只需一次请求
+        
+        Args:
+            item_locator: 行定位器或LocatorGroup
+            attributes: 读取的属性名列表，默认Android为text、iOS为label
+            max_items: 最多收集行数，0表示不限制
+            max_swipes: 最多滑动次数
+        
+        Returns:
+            [{属性名: 值}] 列表
+        """
+        platform = getattr(self, 'platform', 'android')
+        attributes = attributes or (['label'] if platform == 'ios' else ['text'])
+        if isinstance(item_locator, LocatorGroup):
+            item_locator = self._probe(item_locator, 'present') or self.locator_cache.order(item_locator, platform)[0]
+        
+        def screen_rows():
+            # 快照无法求值的定位器（没有lxml时的contains()、or谓词等）退回服务器查询
+            snapshot = self.snapshot()
+            try:
+                elements = snapshot.find_all(item_locator)
+                return [{name: snapshot.attribute_of(element, name) for name in attributes} for element in elements]
+            except UnsupportedLocator as e:
+                self.logger.debug("%s, querying server instead", e)
+            rows = []
+            for element in self.wait.probe(self._server_locator(item_locator)):
+                try:
+                    rows.append({name: element.text if name == 'text' else element.get_attribute(name) for name in attributes})
+                except StaleElementReferenceException:
+                    continue
+            return rows
+        
+        rows = self.gestures.scroll_and_collect(
+            self._server_locator(item_locator), attributes, screen_rows, max_items, max_swipes
+        )
+        invalidate_step_snapshots(self.driver)
+        self.logger.info("Collected %s rows for %s", len(rows), item_locator)
+        return rows
+    
     def wait_for_page_load(self, timeout=30):
         """等待页面加载完成
         
@@ -204,6 +505,43 @@ class BaseMobilePage:
             # 可以根据实际应用情况实现检查逻辑
             return True
         except Exception as e:
-            self.logger.error(f"Error waiting for page load: {str(e)}")
+            self.logger.error("Error waiting for page load: %s", e)
             take_screenshot(self.driver, "page_load_timeout", error_context="Page load timeout")
-            return False 
\ No newline at end of file
+            return False 
+    
+    def save_page_source(self, name):
+        """把完整的页面源码存入产物存储（按内容去重并压缩），返回产物路径，获取失败时返回None"""
+        try:
+            path = get_artifact_store().put('page_source', name, self.driver.page_source, 'xml', compress=True)
+        except Exception as e:
+            self.logger.warning("Cannot save page source: %s", e)
+            return None
+        self.logger.info("Page source saved: %s", path)
+        return path
+    
+    def check_visual(self, name, ignore=(), tolerance=None, max_diff_ratio=None):
+        """把当前屏幕截图与视觉基线比较
+        
+        Args:
+            name: 基线名称
+            ignore: 忽略区域列表，元素为定位器元组或屏幕坐标矩形(x, y, width, height)（逻辑点）
+            tolerance: 每通道容差，覆盖VISUAL_TOLERANCE
+            max_diff_ratio: 允许的差异像素比例，覆盖VISUAL_MAX_DIFF_RATIO
+        
+        Returns:
+            VisualResult，可直接作为布尔值使用
+        """
+        rects = []
+        for region in ignore:
+            if len(region) == 4:
+                rects.append(region)
+                continue
+            for element in self.driver.find_elements(*self._server_locator(region)):
+                rect = element.rect
+                rects.append((rect['x'], rect['y'], rect['width'], rect['height']))
+        # 元素坐标是逻辑点，截图是物理像素，由比对器按屏幕宽度换算
+        result = get_visual_comparator().compare(
+            name, self.driver.get_screenshot_as_png(), rects, self.gestures.screen_size()['width'], tolerance, max_diff_ratio
+        )
+        self.logger.info("Visual check %s", result)
+        return result
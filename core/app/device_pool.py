@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from core.app.appium_server_pool import get_appium_server_pool
+from core.app.device_state import get_device_state_cache
+from core.utils.config_manager import ConfigManager
+
+
+def _pid_alive(pid):
+    """判断进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+@contextmanager
+def _file_lock(path, timeout=10):
+    """基于O_EXCL的跨进程文件锁，持有者崩溃遗留的锁在timeout后被清除"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                deadline = time.monotonic() + timeout
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class DevicePool:
+    """多设备池和调度器
+
+    设备定义来自DEVICE_POOL_FILE（JSON列表，每个设备有独立的Appium地址和systemPort/wdaLocalPort）。
+    Gauge的每个并行流（独立进程）通过租约文件独占一个设备：
+    - 优先租用历史场景平均耗时最短的空闲设备
+    - 租用时检查设备健康状态，连续失败达到阈值的设备被隔离一段时间
+    - 持有租约的进程退出后，租约自动失效
+    """
+
+    def __init__(self, devices, state_dir, quarantine_threshold=2, quarantine_seconds=300):
+        self.logger = logging.getLogger(__name__)
+        self.devices = {device['name']: device for device in devices}
+        self.state_dir = state_dir
+        self.quarantine_threshold = quarantine_threshold
+        self.quarantine_seconds = quarantine_seconds
+        self._lease_dir = os.path.join(state_dir, 'leases')
+        self._state_file = os.path.join(state_dir, 'pool_state.json')
+        self._state_lock = os.path.join(state_dir, 'pool_state.lock')
+        # 本进程已经租用的设备，同一进程内的多个会话不能租到同一台设备
+        self._held = set()
+        self._held_lock = threading.Lock()
+        os.makedirs(self._lease_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls):
+        """根据配置创建设备池，未配置DEVICE_POOL_FILE时返回None"""
+        config = ConfigManager().get_device_pool_config()
+        if not config['pool_file']:
+            return None
+        with open(config['pool_file'], 'r', encoding='utf-8') as f:
+            devices = json.load(f)
+        return cls(devices, config['state_dir'], config['quarantine_threshold'], config['quarantine_seconds'])
+
+    def lease(self, platform, timeout=300):
+        """为当前进程租用一个健康的空闲设备
+
+        Args:
+            platform: 'android' 或 'ios'
+            timeout: 等待空闲设备的最长时间(秒)
+
+        Returns:
+            设备定义字典
+
+        Raises:
+            RuntimeError: 超时仍没有可用设备
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            for device in self._candidates(platform):
+                if not self._try_lease(device['name']):
+                    continue
+                if self.check_health(device):
+                    self.logger.info(f"Leased device {device['name']} ({device.get('appium_server', 'managed server')})")
+                    return device
+                self.report_failure(device)
+                self.release(device)
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"No healthy {platform} device available in pool after {timeout}s")
+            time.sleep(1)
+
+    def release(self, device):
+        """归还设备租约"""
+        path = self._lease_path(device['name'])
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                owner = int(f.read().strip() or 0)
+            if owner == os.getpid():
+                os.remove(path)
+                self.logger.info(f"Released device {device['name']}")
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._held_lock:
+                self._held.discard(device['name'])
+
+    def check_health(self, device):
+        """检查设备的Appium服务器是否可用，Android设备同时检查adb连接状态"""
+        device_state = get_device_state_cache()
+        server_url = device.get('appium_server')
+        if not server_url:
+            # 未指定地址的设备使用托管Appium服务器，endpoint()会等待服务器就绪
+            server_pool = get_appium_server_pool()
+            if server_pool is None:
+                return False
+            try:
+                server_url = server_pool.endpoint(device['name'])
+            except RuntimeError as e:
+                self.logger.warning(str(e))
+                return False
+        if not device_state.is_server_ready(server_url):
+            return False
+        if device.get('platform', 'android') == 'android' and device.get('udid') and shutil.which('adb'):
+            return device_state.devices().get(device['udid']) == 'device'
+        return True
+
+    def record_duration(self, device, seconds):
+        """记录设备上一个场景的耗时，用于后续调度"""
+        def update(state):
+            history = state.setdefault('durations', {}).setdefault(device['name'], [])
+            history.append(seconds)
+            del history[:-50]
+        self._update_state(update)
+
+    def report_success(self, device):
+        """设备正常工作，清除连续失败计数"""
+        self._update_state(lambda state: state.setdefault('failures', {}).pop(device['name'], None))
+
+    def report_failure(self, device):
+        """记录设备失败，连续失败达到阈值后隔离"""
+        def update(state):
+            failures = state.setdefault('failures', {})
+            failures[device['name']] = failures.get(device['name'], 0) + 1
+            if failures[device['name']] >= self.quarantine_threshold:
+                state.setdefault('quarantine', {})[device['name']] = time.time() + self.quarantine_seconds
+                failures.pop(device['name'])
+                self.logger.warning(f"Device {device['name']} quarantined for {self.quarantine_seconds}s")
+        self._update_state(update)
+
+    def _candidates(self, platform):
+        state = self._read_state()
+        now = time.time()
+        quarantine = state.get('quarantine', {})
+        durations = state.get('durations', {})
+
+        def expected_duration(name):
+            history = durations.get(name)
+            return sum(history) / len(history) if history else 0.0
+
+        candidates = [
+            device for name, device in self.devices.items()
+            if device.get('platform', 'android') == platform and quarantine.get(name, 0) <= now
+        ]
+        return sorted(candidates, key=lambda device: expected_duration(device['name']))
+
+    def _lease_path(self, name):
+        safe_name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name)
+        return os.path.join(self._lease_dir, f'{safe_name}.lease')
+
+    def _try_lease(self, name):
+        with self._held_lock:
+            if name in self._held:
+                return False
+            leased = self._acquire_lease_file(name)
+            if leased:
+                self._held.add(name)
+            return leased
+
+    def _acquire_lease_file(self, name):
+        path = self._lease_path(name)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # 持有租约的进程已退出时回收租约
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        owner = int(f.read().strip() or 0)
+                except (OSError, ValueError):
+                    owner = 0
+                # 本进程遗留的租约（未经release的旧实例）可以直接接管
+                if owner and _pid_alive(owner):
+                    return owner == os.getpid()
+                try:
+                    os.remove(path)
+                except OSError:
+                    return False
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def _read_state(self):
+        if not os.path.exists(self._state_file):
+            return {}
+        try:
+            with open(self._state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_state(self, update):
+        with _file_lock(self._state_lock):
+            state = self._read_state()
+            update(state)
+            tmp_path = f'{self._state_file}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self._state_file)
+
+
+_device_pool = None
+_device_pool_loaded = False
+_device_pool_lock = threading.Lock()
+
+
+def get_device_pool():
+    """返回进程内共享的设备池，未配置设备池时返回None"""
+    global _device_pool, _device_pool_loaded
+    with _device_pool_lock:
+        if not _device_pool_loaded:
+            _device_pool = DevicePool.from_config()
+            _device_pool_loaded = True
+        return _device_pool
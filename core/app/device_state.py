@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+import requests
+from core.utils.config_manager import ConfigManager
+
+
+class DeviceStateCache:
+    """设备和Appium服务器状态缓存
+
+    - Appium服务器/status检查结果按TTL缓存，并写入磁盘供并行流共享，
+      多个流同时启动时只有第一个流真正发起请求
+    - 应用安装状态使用 adb shell pm path <package> 精确查询，按设备和包名缓存
+    - 后台线程运行 adb track-devices，设备上线/下线时立即更新设备列表并清空该设备的包缓存
+    """
+
+    # 服务器不可用的结果只缓存很短时间，避免服务器刚启动时被误判
+    NEGATIVE_TTL = 5
+    # watcher启动后等待第一份设备列表的最长时间
+    FIRST_PAYLOAD_TIMEOUT = 3
+
+    def __init__(self, ttl=None, state_file=None):
+        self.logger = logging.getLogger(__name__)
+        config = ConfigManager().get_device_state_config()
+        self.ttl = ttl if ttl is not None else config['ttl']
+        self.state_file = state_file or config['state_file']
+        self._lock = threading.Lock()
+        self._servers = {}
+        self._packages = {}
+        self._devices = {}
+        self._devices_updated = 0.0
+        self._watcher = None
+        self._watcher_process = None
+        self._devices_received = threading.Event()
+
+    def is_server_ready(self, server_url, refresh=False):
+        """检查Appium服务器是否可用，结果在TTL内复用"""
+        server_url = self._normalize_server_url(server_url)
+        now = time.time()
+        if not refresh:
+            with self._lock:
+                cached = self._servers.get(server_url)
+            if cached is None:
+                cached = self._read_shared().get('servers', {}).get(server_url)
+            if cached and now - cached['checked'] < (self.ttl if cached['ready'] else min(self.ttl, self.NEGATIVE_TTL)):
+                return cached['ready']
+
+        ready = False
+        try:
+            response = requests.get(f"{server_url}/status", timeout=5)
+            ready = response.status_code == 200
+            if not ready:
+                self.logger.error(f"Appium server returned status code {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error connecting to Appium server: {str(e)}")
+
+        entry = {'ready': ready, 'checked': now}
+        with self._lock:
+            self._servers[server_url] = entry
+        self._update_shared('servers', server_url, entry)
+        return ready
+
+    def devices(self):
+        """返回已连接的Android设备 {serial: state}
+
+        后台watcher运行时返回其维护的列表（刚启动时先等待第一份设备列表），否则按TTL调用adb devices
+        """
+        with self._lock:
+            watching = self._watcher is not None and self._watcher.is_alive()
+        if watching and self._devices_received.wait(self.FIRST_PAYLOAD_TIMEOUT):
+            with self._lock:
+                return dict(self._devices)
+        with self._lock:
+            if time.time() - self._devices_updated < self.ttl:
+                return dict(self._devices)
+        try:
+            result = subprocess.run(['adb', 'devices'], capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError) as e:
+            self.logger.error(f"Error listing adb devices: {str(e)}")
+            with self._lock:
+                self._devices_updated = time.time()
+            return {}
+        self._set_devices(self._parse_devices(result.stdout.splitlines()[1:]))
+        with self._lock:
+            return dict(self._devices)
+
+    def is_package_installed(self, package_name, serial=None, refresh=False):
+        """检查Android设备上是否安装了指定应用
+
+        Args:
+            package_name: 应用包名
+            serial: 设备序列号，为空时使用唯一在线的设备（多台设备时不缓存结果）
+            refresh: 忽略缓存重新查询
+        """
+        if not package_name:
+            return False
+        serial = serial or self._default_serial()
+        key = (serial or '', package_name)
+        now = time.time()
+        if not refresh:
+            with self._lock:
+                cached = self._packages.get(key)
+            if cached and now - cached['checked'] < self.ttl:
+                return cached['installed']
+
+        cmd = ['adb'] + (['-s', serial] if serial else []) + ['shell', 'pm', 'path', package_name]
+        self.logger.info(f"Checking if app {package_name} is installed with command: {' '.join(cmd)}")
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
+            installed = result.returncode == 0 and 'package:' in result.stdout
+        except (OSError, subprocess.SubprocessError) as e:
+            self.logger.error(f"Error checking if app is installed: {str(e)}")
+            return False
+
+        if serial:
+            with self._lock:
+                self._packages[key] = {'installed': installed, 'checked': now}
+        return installed
+
+    def _default_serial(self):
+        # adb在只有一台在线设备时使用它作为默认设备；按实际序列号缓存，设备变化时只清除该设备的条目
+        online = [serial for serial, state in self.devices().items() if state == 'device']
+        return online[0] if len(online) == 1 else None
+
+    def invalidate_package(self, package_name, serial=None):
+        """应用安装/卸载后清除对应的缓存"""
+        serial = serial or self._default_serial()
+        with self._lock:
+            self._packages.pop((serial or '', package_name), None)
+
+    def warm_up(self, server_urls=(), packages=()):
+        """套件开始时预先填充缓存并启动设备监听，应用安装状态按每台在线设备查询"""
+        self.start_watcher()
+        for server_url in server_urls:
+            self.is_server_ready(server_url)
+        serials = [serial for serial, state in self.devices().items() if state == 'device']
+        for package_name in packages:
+            for serial in serials:
+                self.is_package_installed(package_name, serial)
+
+    def start_watcher(self):
+        """启动后台adb track-devices监听线程"""
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            try:
+                self._watcher_process = subprocess.Popen(
+                    ['adb', 'track-devices'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+                )
+            except OSError as e:
+                self.logger.warning(f"Cannot start adb track-devices: {str(e)}")
+                return
+            self._watcher = threading.Thread(target=self._watch, name='adb-track-devices', daemon=True)
+            self._watcher.start()
+
+    def stop_watcher(self):
+        """停止后台监听"""
+        with self._lock:
+            process, self._watcher_process = self._watcher_process, None
+        if process is not None:
+            process.terminate()
+
+    def _watch(self):
+        # track-devices输出格式：4位十六进制长度 + 设备列表（每行 serial\tstate）
+        stream = self._watcher_process.stdout
+        while True:
+            header = stream.read(4)
+            if len(header) < 4:
+                break
+            try:
+                length = int(header, 16)
+            except ValueError:
+                break
+            payload = stream.read(length).decode('utf-8', 'replace') if length else ''
+            self._set_devices(self._parse_devices(payload.splitlines()))
+        # 没收到任何设备列表就退出时不再让devices()等待
+        self._devices_received.set()
+        self.logger.info("adb track-devices watcher stopped")
+
+    def _set_devices(self, devices):
+        with self._lock:
+            changed = {serial for serial in set(devices) | set(self._devices)
+                       if devices.get(serial) != self._devices.get(serial)}
+            self._devices = devices
+            self._devices_updated = time.time()
+            if changed:
+                self._packages = {key: value for key, value in self._packages.items() if key[0] not in changed}
+        self._devices_received.set()
+        if changed:
+            self.logger.info(f"Android devices changed: {devices}")
+
+    @staticmethod
+    def _parse_devices(lines):
+        devices = {}
+        for line in lines:
+            parts = line.strip().split('\t')
+            if len(parts) == 2:
+                devices[parts[0]] = parts[1]
+        return devices
+
+    @staticmethod
+    def _normalize_server_url(server_url):
+        # 确保URL以http开头，Appium 2.x 不再使用/wd/hub路径
+        if not server_url.startswith('http'):
+            server_url = f"http://{server_url}"
+        return server_url.replace('/wd/hub', '').rstrip('/')
+
+    def _read_shared(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_shared(self, section, key, value):
+        if not self.state_file:
+            return
+        try:
+            state = self._read_shared()
+            state.setdefault(section, {})[key] = value
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp_path = f'{self.state_file}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            self.logger.debug(f"Cannot write shared device state: {str(e)}")
+
+
+_device_state = None
+_device_state_lock = threading.Lock()
+
+
+def get_device_state_cache():
+    """返回进程内共享的设备状态缓存"""
+    global _device_state
+    with _device_state_lock:
+        if _device_state is None:
+            _device_state = DeviceStateCache()
+        return _device_state
@@ -0,0 +1,221 @@
+import json
+import logging
+import threading
+import weakref
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.actions import interaction
+from selenium.webdriver.common.actions.action_builder import ActionBuilder
+from selenium.webdriver.common.actions.pointer_input import PointerInput
+
+_engines = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+def get_gesture_engine(driver):
+    """获取driver对应的手势引擎，同一个会话共享屏幕尺寸缓存"""
+    with _engines_lock:
+        engine = _engines.get(driver)
+        if engine is None:
+            engine = GestureEngine(driver)
+            _engines[driver] = engine
+        return engine
+
+
+# 在Appium服务器端运行的WebdriverIO脚本：反复查找列表行、读取属性、滑动，直到没有新行
+# 配置通过JSON嵌入脚本（execute driver不支持传参）；与overlap_rows相同，只去掉与上一屏结尾重合的行
+SCROLL_AND_COLLECT_SCRIPT = """
+const cfg = %s;
+const rows = [];
+let previous = [];
+let idle = 0;
+for (let swipes = 0; idle < 2; swipes++) {
+    const elements = await driver.findElements(cfg.using, cfg.value);
+    const screen = [];
+    for (const element of elements) {
+        const id = element['element-6066-11e4-a52e-4f735466cecf'] || element.ELEMENT;
+        const row = {};
+        for (const name of cfg.attributes) {
+            row[name] = await driver.getElementAttribute(id, name);
+        }
+        screen.push({key: JSON.stringify(row), row: row});
+    }
+    let overlap = Math.min(previous.length, screen.length);
+    while (overlap > 0 && !screen.slice(0, overlap).every((item, i) => item.key === previous[previous.length - overlap + i])) {
+        overlap--;
+    }
+    const added = screen.length - overlap;
+    for (const item of screen.slice(overlap)) {
+        rows.push(item.row);
+    }
+    previous = screen.map(item => item.key);
+    idle = added ? 0 : idle + 1;
+    if ((cfg.maxItems && rows.length >= cfg.maxItems) || swipes >= cfg.maxSwipes) {
+        break;
+    }
+    if (idle < 2) {
+        await driver.performActions([cfg.swipe]);
+        await driver.releaseActions();
+    }
+}
+return cfg.maxItems ? rows.slice(0, cfg.maxItems) : rows;
+"""
+
+
+def overlap_rows(previous, screen):
+    """返回screen开头与上一屏previous结尾重合的行数（取最长的重合）
+
+    滑动半屏时两屏之间有重叠，只跳过重叠部分，属性完全相同的不同行（例如同名商品）仍然保留。
+    两屏之间恰好只滑过若干完全相同的行时无法从界面上区分，这些行会被当作重叠。
+    """
+    for size in range(min(len(previous), len(screen)), 0, -1):
+        if previous[-size:] == screen[:size]:
+            return size
+    return 0
+
+
+class GestureEngine:
+    """基于W3C Actions的移动端手势
+
+    - 屏幕尺寸每个会话只获取一次
+    - 每个手势（包括多指手势）编码为一个W3C Actions请求
+    - run_script通过Appium的execute driver在服务器端一次执行多条命令，
+      scroll_and_collect优先使用它，服务器不支持时退回"页面源码快照 + 滑动"（每屏两次请求）
+    """
+
+    def __init__(self, driver):
+        # 引擎是_engines中以driver为键的值，只能弱引用driver，否则键永远不会被回收
+        self._driver = weakref.ref(driver)
+        self.logger = logging.getLogger(__name__)
+        self._screen_size = None
+        self._driver_script_supported = None
+
+    @property
+    def driver(self):
+        """引擎所属的driver，driver已被回收时返回None"""
+        return self._driver()
+
+    def screen_size(self, refresh=False):
+        """返回屏幕尺寸 {width, height}，会话内缓存，屏幕旋转后使用refresh=True重新获取"""
+        if self._screen_size is None or refresh:
+            size = self.driver.get_window_size()
+            self._screen_size = {'width': size['width'], 'height': size['height']}
+        return self._screen_size
+
+    def point(self, x_ratio, y_ratio):
+        """把屏幕比例坐标转换为像素坐标"""
+        size = self.screen_size()
+        return int(size['width'] * x_ratio), int(size['height'] * y_ratio)
+
+    def perform(self, *paths):
+        """在一个请求中执行多指手势
+
+        Args:
+            paths: 每个手指的轨迹，[(x, y, 移动耗时毫秒), ...]，第一个点为按下位置
+        """
+        builder = ActionBuilder(self.driver, mouse=PointerInput(interaction.POINTER_TOUCH, 'finger0'))
+        fingers = [builder.pointer_inputs[0]]
+        fingers += [builder.add_pointer_input(interaction.POINTER_TOUCH, f'finger{index}') for index in range(1, len(paths))]
+        for finger, path in zip(fingers, paths):
+            (start_x, start_y, _), moves = path[0], path[1:]
+            finger.create_pointer_move(duration=0, x=start_x, y=start_y)
+            finger.create_pointer_down(button=0)
+            finger.create_pause(0.1)
+            for x, y, duration in moves:
+                finger.create_pointer_move(duration=duration, x=x, y=y)
+            finger.create_pointer_up(button=0)
+        builder.perform()
+
+    def swipe(self, start_x, start_y, end_x, end_y, duration=800):
+        """单指滑动，一个请求完成"""
+        self.perform([(start_x, start_y, 0), (end_x, end_y, duration)])
+
+    def tap(self, x, y):
+        """单指点击指定坐标"""
+        self.perform([(x, y, 0)])
+
+    def scroll(self, direction='down', distance=0.6, duration=800):
+        """按屏幕比例滚动，direction为down时内容向上移动"""
+        start, end = 0.5 + distance / 2, 0.5 - distance / 2
+        if direction == 'up':
+            start, end = end, start
+        start_x, start_y = self.point(0.5, start)
+        end_x, end_y = self.point(0.5, end)
+        self.swipe(start_x, start_y, end_x, end_y, duration)
+
+    def pinch(self, center_ratio=(0.5, 0.5), spread=0.3, zoom_in=False, duration=500):
+        """双指捏合/张开，两根手指在同一个请求中同步移动"""
+        center_x, center_y = self.point(*center_ratio)
+        offset = int(self.screen_size()['width'] * spread / 2)
+        inner, outer = (10, offset)
+        start, end = (inner, outer) if zoom_in else (outer, inner)
+        self.perform(
+            [(center_x - start, center_y, 0), (center_x - end, center_y, duration)],
+            [(center_x + start, center_y, 0), (center_x + end, center_y, duration)]
+        )
+
+    def run_script(self, script, timeout_ms=None):
+        """在Appium服务器端执行WebdriverIO脚本，多条命令只需一次请求
+
+        需要服务器以 --allow-insecure execute_driver_script 启动
+
+        Returns:
+            脚本的返回值
+        """
+        response = self.driver.execute_driver(script, 'webdriverio', timeout_ms)
+        for line in response.logs.get('log', []) if isinstance(response.logs, dict) else []:
+            self.logger.debug(f"driver script: {line}")
+        return response.result
+
+    def scroll_and_collect(self, item_locator, attributes, rows_factory=None, max_items=0, max_swipes=10):
+        """滚动列表并收集所有行的属性
+
+        Args:
+            item_locator: 行定位器（已改写为服务器端策略）
+            attributes: 需要读取的属性名列表
+            rows_factory: 返回当前屏幕所有行 [{属性名: 值}]（按界面顺序）的可调用对象，服务器端脚本不可用时使用
+            max_items: 最多收集行数，0表示不限制
+            max_swipes: 最多滑动次数
+
+        Returns:
+            [{属性名: 值}] 列表
+        """
+        if self._driver_script_supported is not False:
+            start_x, start_y = self.point(0.5, 0.75)
+            end_x, end_y = self.point(0.5, 0.25)
+            config = {
+                'using': item_locator[0], 'value': item_locator[1], 'attributes': list(attributes),
+                'maxItems': max_items, 'maxSwipes': max_swipes,
+                'swipe': {'type': 'pointer', 'id': 'finger0', 'parameters': {'pointerType': 'touch'}, 'actions': [
+                    {'type': 'pointerMove', 'duration': 0, 'x': start_x, 'y': start_y},
+                    {'type': 'pointerDown', 'button': 0},
+                    {'type': 'pause', 'duration': 100},
+                    {'type': 'pointerMove', 'duration': 600, 'x': end_x, 'y': end_y},
+                    {'type': 'pointerUp', 'button': 0},
+                ]},
+            }
+            try:
+                rows = self.run_script(SCROLL_AND_COLLECT_SCRIPT % json.dumps(config))
+                self._driver_script_supported = True
+                return rows
+            except WebDriverException as e:
+                if self._driver_script_supported:
+                    raise
+                self._driver_script_supported = False
+                self.logger.info(f"Server-side driver scripts unavailable, collecting client-side: {str(e)}")
+        if rows_factory is None:
+            raise RuntimeError("scroll_and_collect needs a rows factory when driver scripts are unavailable")
+        return self._collect_client_side(rows_factory, max_items, max_swipes)
+
+    def _collect_client_side(self, rows_factory, max_items, max_swipes):
+        rows, previous, idle = [], [], 0
+        for swipes in range(max_swipes + 1):
+            screen = rows_factory()
+            added = screen[overlap_rows(previous, screen):]
+            rows.extend(added)
+            previous = screen
+            idle = 0 if added else idle + 1
+            # 连续两屏没有新行才认为到底，避免滚动惯性未结束导致提前退出
+            if idle >= 2 or (max_items and len(rows) >= max_items) or swipes >= max_swipes:
+                break
+            self.scroll('down', 0.5, 600)
+        return rows[:max_items] if max_items else rows
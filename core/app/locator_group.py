@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import threading
+from core.utils.config_manager import ConfigManager
+
+
+class LocatorGroup:
+    """同一个元素的一组候选定位器
+
+    页面对象用它代替"主定位器 + ALT_备用定位器"的写法：所有候选在同一个轮询循环中检查，
+    第一个匹配的候选胜出，胜出的候选被记录下来，下次优先尝试。
+    """
+
+    def __init__(self, name, *candidates):
+        self.name = name
+        # 去掉重复的候选，保持原有顺序
+        self.candidates = tuple(dict.fromkeys(tuple(candidate) for candidate in candidates))
+
+    def __iter__(self):
+        return iter(self.candidates)
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __repr__(self):
+        return f"LocatorGroup({self.name})"
+
+
+class LocatorWinnerCache:
+    """按平台和应用版本持久化每个定位器组胜出的候选
+
+    缓存文件在并行流之间共享，写入时合并磁盘上的最新内容，
+    应用版本（APP_VERSION）变化后使用新的缓存分区，旧版本的结果不会影响新版本。
+    """
+
+    def __init__(self, cache_file=None, app_version=None):
+        self.logger = logging.getLogger(__name__)
+        config = ConfigManager().get_locator_cache_config()
+        self.cache_file = cache_file or config['cache_file']
+        self.app_version = app_version if app_version is not None else config['app_version']
+        self._lock = threading.Lock()
+        self._winners = self._read()
+
+    def order(self, group, platform):
+        """返回候选定位器列表，上次胜出的候选排在最前"""
+        winner = self._winners.get(self._scope(platform), {}).get(group.name)
+        candidates = list(group)
+        if winner is not None and tuple(winner) in candidates:
+            candidates.remove(tuple(winner))
+            candidates.insert(0, tuple(winner))
+        return candidates
+
+    def record(self, group, platform, locator):
+        """记录胜出的候选，与上次结果相同时不写盘"""
+        scope = self._scope(platform)
+        with self._lock:
+            if self._winners.get(scope, {}).get(group.name) == list(locator):
+                return
+            self._winners.setdefault(scope, {})[group.name] = list(locator)
+            self.logger.info(f"{group} on {scope} resolved by {locator}")
+            self._write(scope, group.name, list(locator))
+
+    def _scope(self, platform):
+        return f"{platform}@{self.app_version}" if self.app_version else platform
+
+    def _read(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, scope, name, locator):
+        if not self.cache_file:
+            return
+        try:
+            winners = self._read()
+            winners.setdefault(scope, {})[name] = locator
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_path = f'{self.cache_file}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(winners, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            self.logger.debug(f"Cannot write locator cache: {str(e)}")
+
+
+_winner_cache = None
+_winner_cache_lock = threading.Lock()
+
+
+def get_locator_winner_cache():
+    """返回进程内共享的定位器胜出缓存"""
+    global _winner_cache
+    with _winner_cache_lock:
+        if _winner_cache is None:
+            _winner_cache = LocatorWinnerCache()
+        return _winner_cache
@@ -0,0 +1,378 @@
+"""移动端定位器优化器
+
+把XPath定位器改写为语义等价、但服务器端解析更快的策略：
+- Android: accessibility id 或 UiSelector（-android uiautomator）
+- iOS: accessibility id 或 class chain（-ios class chain）
+只处理能够严格等价转换的XPath子集，其余定位器保持不变。
+
+命令行用法：
+
+    python -m core.app.locator_optimizer                      # 静态分析页面对象中的定位器，按成本排序
+    python -m core.app.locator_optimizer --benchmark android  # 连接设备实测每个定位器的解析耗时
+"""
+import argparse
+import importlib
+import inspect
+import logging
+import pkgutil
+import re
+import statistics
+import threading
+import time
+from core.utils.config_manager import ConfigManager
+
+ACCESSIBILITY_ID = 'accessibility id'
+ANDROID_UIAUTOMATOR = '-android uiautomator'
+IOS_CLASS_CHAIN = '-ios class chain'
+IOS_PREDICATE = '-ios predicate string'
+
+# 各定位策略的相对解析成本，用于静态报告排序（数值越大越慢）
+STRATEGY_COST = {
+    ACCESSIBILITY_ID: 1,
+    'id': 1,
+    IOS_PREDICATE: 2,
+    IOS_CLASS_CHAIN: 2,
+    ANDROID_UIAUTOMATOR: 3,
+    'class name': 4,
+    'xpath': 10,
+}
+
+# XPath属性 -> UiSelector方法（等值、contains、starts-with）
+_ANDROID_ATTRIBUTES = {
+    'content-desc': ('description', 'descriptionContains', 'descriptionStartsWith'),
+    'text': ('text', 'textContains', 'textStartsWith'),
+    'resource-id': ('resourceId', None, None),
+    'class': ('className', None, None),
+    'package': ('packageName', None, None),
+}
+_ANDROID_BOOLEANS = ('checkable', 'checked', 'clickable', 'enabled', 'focusable', 'focused',
+                     'long-clickable', 'scrollable', 'selected')
+_IOS_ATTRIBUTES = ('name', 'label', 'value', 'type')
+_IOS_BOOLEANS = ('enabled', 'visible', 'accessible')
+
+_STEP_PATTERN = re.compile(r"(?P<axis>//|/)(?P<name>\*|[A-Za-z_][\w.\-]*)(?P<predicates>(?:\[[^\[\]]*\])*)")
+_PREDICATE_PATTERN = re.compile(r"\[([^\[\]]*)\]")
+# 值只匹配到与开引号相同的引号为止，避免吞掉后面的条件（如 @a='x' or @a='y'）
+_QUOTED_VALUE = r"""(?P<quote>['"])(?P<value>(?:(?!(?P=quote)).)*)(?P=quote)"""
+_CONDITION_PATTERNS = (
+    ('equals', re.compile(r"^@(?P<attr>[\w\-]+)\s*=\s*" + _QUOTED_VALUE + "$")),
+    ('contains', re.compile(r"^contains\(\s*@(?P<attr>[\w\-]+)\s*,\s*" + _QUOTED_VALUE + r"\s*\)$")),
+    ('starts-with', re.compile(r"^starts-with\(\s*@(?P<attr>[\w\-]+)\s*,\s*" + _QUOTED_VALUE + r"\s*\)$")),
+    ('index', re.compile(r"^(?P<value>[1-9]\d*)$")),
+)
+
+
+def _parse_xpath(expression):
+    """把XPath解析为步骤列表 [(axis, name, [(kind, attr, value)])]，不支持的语法返回None"""
+    steps, position = [], 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _STEP_PATTERN.match(expression, position)
+        if not match:
+            return None
+        conditions = []
+        for predicate in _PREDICATE_PATTERN.findall(match.group('predicates')):
+            # or没有等价的UiSelector / class chain写法
+            if _has_unquoted(predicate, r'\sor\s'):
+                return None
+            for part in _split_and(predicate.strip()):
+                condition = _parse_condition(part.strip())
+                if condition is None:
+                    return None
+                conditions.append(condition)
+        steps.append((match.group('axis'), match.group('name'), conditions))
+        position = match.end()
+    return steps or None
+
+
+def _has_unquoted(predicate, pattern):
+    """谓词中引号之外是否出现pattern"""
+    unquoted = re.sub(r"'[^']*'|\"[^\"]*\"", "''", predicate)
+    return re.search(pattern, unquoted) is not None
+
+
+def _split_and(predicate):
+    """按引号外的' and '拆分谓词"""
+    parts, quote, start = [], None, 0
+    for match in re.finditer(r"""['"]|\s+and\s+""", predicate):
+        token = match.group()
+        if token in ('"', "'"):
+            quote = None if quote == token else (quote or token)
+        elif quote is None:
+            parts.append(predicate[start:match.start()])
+            start = match.end()
+    parts.append(predicate[start:])
+    return parts
+
+
+def _parse_condition(text):
+    for kind, pattern in _CONDITION_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            groups = match.groupdict()
+            return kind, groups.get('attr'), groups['value']
+    return None
+
+
+def _quote_java(value):
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _to_ui_selector(steps):
+    # UiSelector只能表达单个任意深度的节点，位置索引（兄弟节点中的序号）没有等价写法
+    if len(steps) != 1 or steps[0][0] != '//':
+        return None
+    _, name, conditions = steps[0]
+    selector = 'new UiSelector()'
+    if name != '*':
+        selector += f'.className({_quote_java(name)})'
+    for kind, attr, value in conditions:
+        if kind == 'index':
+            return None
+        if attr in _ANDROID_BOOLEANS and kind == 'equals' and value in ('true', 'false'):
+            method = {'long-clickable': 'longClickable'}.get(attr, attr)
+            selector += f'.{method}({value})'
+            continue
+        methods = _ANDROID_ATTRIBUTES.get(attr)
+        method = methods and methods[('equals', 'contains', 'starts-with').index(kind)]
+        if not method:
+            return None
+        selector += f'.{method}({_quote_java(value)})'
+    return selector
+
+
+def _to_class_chain(steps):
+    parts = []
+    for index, (axis, name, conditions) in enumerate(steps):
+        # class chain中'**/'表示任意深度，'/'表示直接子节点；第一步的'/'从应用根节点开始，不做转换
+        if index == 0 and axis != '//':
+            return None
+        prefix = '**/' if axis == '//' else ''
+        if name != '*' and not name.startswith('XCUIElementType'):
+            return None
+        step = prefix + name
+        predicates, position = [], None
+        for kind, attr, value in conditions:
+            if position is not None:
+                # XPath中[2][@a='x']与[@a='x'][2]含义不同，只转换索引在最后的情况
+                return None
+            if kind == 'index':
+                # XPath的//X[2]是每个父节点下的第2个X，class chain的**/X[2]是所有后代中的第2个，不等价
+                if axis == '//':
+                    return None
+                position = value
+                continue
+            if attr in _IOS_BOOLEANS and kind == 'equals' and value in ('true', 'false'):
+                predicates.append(f'{attr} == {1 if value == "true" else 0}')
+                continue
+            if attr not in _IOS_ATTRIBUTES or '`' in value:
+                return None
+            operator = {'equals': '==', 'contains': 'CONTAINS', 'starts-with': 'BEGINSWITH'}[kind]
+            predicates.append(f'{attr} {operator} {_quote_java(value)}')
+        if predicates:
+            step += '[`' + ' AND '.join(predicates) + '`]'
+        if position is not None:
+            step += f'[{position}]'
+        parts.append(step)
+    return '/'.join(parts)
+
+
+def _accessibility_id(steps, platform):
+    # //*[@content-desc='x'] / //*[@name='x'] 与 accessibility id 完全等价
+    if len(steps) != 1 or steps[0][0] != '//' or steps[0][1] != '*' or len(steps[0][2]) != 1:
+        return None
+    kind, attr, value = steps[0][2][0]
+    if kind == 'equals' and attr == ('name' if platform == 'ios' else 'content-desc'):
+        return value
+    return None
+
+
+def detect_platform(locator, default='android'):
+    """根据XPath中的类名判断定位器所属平台"""
+    value = locator[1]
+    if 'XCUIElementType' in value:
+        return 'ios'
+    if 'android.' in value:
+        return 'android'
+    return default
+
+
+def rewrite(locator, platform='android'):
+    """把定位器改写为等价的更快策略，无法等价转换时返回原定位器"""
+    by, value = locator
+    if by != 'xpath':
+        return tuple(locator)
+    steps = _parse_xpath(value)
+    if steps is None:
+        return tuple(locator)
+    accessibility_id = _accessibility_id(steps, platform)
+    if accessibility_id is not None:
+        return ACCESSIBILITY_ID, accessibility_id
+    if platform == 'ios':
+        chain = _to_class_chain(steps)
+        return (IOS_CLASS_CHAIN, chain) if chain else tuple(locator)
+    selector = _to_ui_selector(steps)
+    return (ANDROID_UIAUTOMATOR, selector) if selector else tuple(locator)
+
+
+def estimate_cost(locator):
+    """静态成本估计：策略成本，XPath每多一层路径再加一"""
+    by, value = locator
+    cost = STRATEGY_COST.get(by, 5)
+    if by == 'xpath':
+        cost += value.count('/') - 2 + value.count('[')
+    return cost
+
+
+class LocatorOptimizer:
+    """运行时定位器改写层
+
+    页面对象发给服务器的定位器先经过这里，改写结果按(平台, 定位器)缓存；
+    LOCATOR_OPTIMIZER=false时原样返回。
+    """
+
+    def __init__(self, enabled=None):
+        self.logger = logging.getLogger(__name__)
+        if enabled is None:
+            enabled = ConfigManager().get_locator_cache_config()['optimize']
+        self.enabled = enabled
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def optimize(self, locator, platform='android'):
+        if not self.enabled:
+            return locator
+        key = (platform, tuple(locator))
+        with self._lock:
+            optimized = self._cache.get(key)
+        if optimized is None:
+            optimized = rewrite(locator, platform)
+            if optimized != tuple(locator):
+                self.logger.debug(f"Rewrote {locator} -> {optimized} for {platform}")
+            with self._lock:
+                self._cache[key] = optimized
+        return optimized
+
+
+_optimizer = None
+_optimizer_lock = threading.Lock()
+
+
+def get_locator_optimizer():
+    """返回进程内共享的定位器优化器"""
+    global _optimizer
+    with _optimizer_lock:
+        if _optimizer is None:
+            _optimizer = LocatorOptimizer()
+        return _optimizer
+
+
+def collect_page_locators(package='core.app.pages'):
+    """收集页面对象类中定义的定位器，IOS_前缀的属于iOS，其余属于Android
+
+    Returns:
+        [(名称, 平台, 定位器)] 列表
+    """
+    results = []
+    module = importlib.import_module(package)
+    for info in pkgutil.iter_modules(module.__path__):
+        page_module = importlib.import_module(f'{package}.{info.name}')
+        for class_name, cls in inspect.getmembers(page_module, inspect.isclass):
+            if cls.__module__ != page_module.__name__:
+                continue
+            for attr, value in vars(cls).items():
+                if (attr.isupper() and isinstance(value, tuple) and len(value) == 2
+                        and all(isinstance(part, str) for part in value)):
+                    platform = 'ios' if attr.startswith('IOS_') else detect_platform(value)
+                    results.append((f'{class_name}.{attr}', platform, value))
+    return results
+
+
+def analyze(locators):
+    """静态分析定位器，返回按原始成本降序排列的报告行"""
+    rows = []
+    for name, platform, locator in locators:
+        optimized = rewrite(locator, platform)
+        rows.append({
+            'name': name,
+            'platform': platform,
+            'original': locator,
+            'optimized': optimized,
+            'cost': estimate_cost(locator),
+            'optimized_cost': estimate_cost(optimized),
+        })
+    return sorted(rows, key=lambda row: (row['cost'], row['name']), reverse=True)
+
+
+def benchmark(driver, locators, repeats=5):
+    """在真实会话中测量每个定位器改写前后的解析耗时（find_elements中位数，毫秒）
+
+    Returns:
+        按原始耗时降序排列的报告行
+    """
+    def measure(locator):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            try:
+                count = len(driver.find_elements(*locator))
+            except Exception:
+                count = -1
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples), count
+
+    driver.implicitly_wait(0)
+    rows = []
+    for name, platform, locator in locators:
+        optimized = rewrite(locator, platform)
+        original_ms, original_count = measure(locator)
+        optimized_ms, optimized_count = measure(optimized) if optimized != tuple(locator) else (original_ms, original_count)
+        rows.append({
+            'name': name,
+            'platform': platform,
+            'original': locator,
+            'optimized': optimized,
+            'cost': original_ms,
+            'optimized_cost': optimized_ms,
+            # 改写前后匹配数量不同说明改写不等价，需要人工检查
+            'mismatch': original_count != optimized_count,
+        })
+    return sorted(rows, key=lambda row: row['cost'], reverse=True)
+
+
+def format_report(rows, unit=''):
+    """把分析或测量结果格式化为文本表格"""
+    lines = [f"{'Locator':<45} {'Platform':<8} {'Cost' + unit:>10} {'Optimized' + unit:>14}  Rewrite"]
+    for row in rows:
+        rewrite_text = '-' if row['optimized'] == tuple(row['original']) else f"{row['optimized'][0]}: {row['optimized'][1]}"
+        if row.get('mismatch'):
+            rewrite_text += '  (MATCH COUNT DIFFERS)'
+        lines.append(
+            f"{row['name']:<45} {row['platform']:<8} {row['cost']:>10.1f} {row['optimized_cost']:>14.1f}  {rewrite_text}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze and benchmark mobile page object locators')
+    parser.add_argument('--benchmark', choices=['android', 'ios'], help='measure resolution time on a live session')
+    parser.add_argument('--repeats', type=int, default=5, help='measurements per locator (default: 5)')
+    args = parser.parse_args(argv)
+
+    locators = collect_page_locators()
+    if not args.benchmark:
+        print(format_report(analyze(locators)))
+        return
+
+    from core.app.appium_factory import AppiumFactory
+    factory = AppiumFactory()
+    driver = factory.get_ios_driver() if args.benchmark == 'ios' else factory.get_android_driver()
+    try:
+        platform_locators = [entry for entry in locators if entry[1] == args.benchmark]
+        print(format_report(benchmark(driver, platform_locators, args.repeats), unit='(ms)'))
+    finally:
+        driver.quit()
+
+
+if __name__ == '__main__':
+    main()
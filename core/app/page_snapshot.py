@@ -0,0 +1,166 @@
+import logging
+import re
+import threading
+import weakref
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    # 没有lxml时使用标准库解析，只支持ElementTree的XPath子集
+    import xml.etree.ElementTree as etree
+    LXML_AVAILABLE = False
+
+
+# 每个driver当前步骤内最近一次的快照，步骤开始或界面被操作后失效
+_step_snapshots = weakref.WeakKeyDictionary()
+_step_snapshots_lock = threading.Lock()
+
+
+def get_step_snapshot(driver):
+    """返回driver在当前步骤内缓存的快照，没有时返回None"""
+    with _step_snapshots_lock:
+        return _step_snapshots.get(driver)
+
+
+def set_step_snapshot(driver, snapshot):
+    with _step_snapshots_lock:
+        _step_snapshots[driver] = snapshot
+
+
+def invalidate_step_snapshots(driver=None):
+    """清除快照缓存，driver为None时清除所有driver的缓存（在步骤开始时调用）"""
+    with _step_snapshots_lock:
+        if driver is None:
+            _step_snapshots.clear()
+        else:
+            _step_snapshots.pop(driver, None)
+
+
+class UnsupportedLocator(Exception):
+    """定位器无法在本地快照中求值（例如标准库不支持的XPath语法）"""
+
+
+class PageSnapshot:
+    """移动端页面源码快照
+
+    一次page_source请求得到整棵界面树，在本地按无障碍ID、resource-id/name、类名建立索引，
+    多个定位器（XPath、accessibility id、id、class name）都在内存中求值，不再逐个发送服务器查询。
+    安装了lxml时支持完整的XPath 1.0，否则使用ElementTree支持的XPath子集。
+    """
+
+    _BOUNDS_PATTERN = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+
+    def __init__(self, source, platform='android'):
+        self.logger = logging.getLogger(__name__)
+        self.source = source
+        self.platform = platform.lower()
+        self.root = etree.fromstring(source.encode('utf-8') if isinstance(source, str) else source)
+        self._by_accessibility_id = {}
+        self._by_id = {}
+        self._by_class = {}
+        for element in self.root.iter():
+            if not isinstance(element.tag, str):
+                continue
+            for value in self._accessibility_ids(element):
+                self._by_accessibility_id.setdefault(value, []).append(element)
+            for value in self._ids(element):
+                self._by_id.setdefault(value, []).append(element)
+            class_name = element.get('class') or element.get('type') or element.tag
+            self._by_class.setdefault(class_name, []).append(element)
+
+    def find_all(self, locator):
+        """在快照中查找定位器匹配的所有元素（保持文档顺序）
+
+        Raises:
+            UnsupportedLocator: 定位策略或XPath语法无法在本地求值
+        """
+        by, value = locator
+        if by == 'accessibility id':
+            return list(self._by_accessibility_id.get(value, []))
+        if by == 'id':
+            return list(self._by_id.get(value, []))
+        if by == 'class name':
+            return list(self._by_class.get(value, []))
+        if by == 'xpath':
+            return self._xpath(value)
+        raise UnsupportedLocator(f"Locator strategy '{by}' is not supported in snapshots")
+
+    def describe(self, element):
+        """返回元素的文本、可见性和位置 {text, visible, enabled, bounds}"""
+        return {
+            'text': self.text_of(element),
+            'visible': self.is_visible(element),
+            'enabled': element.get('enabled', 'true') == 'true',
+            'bounds': self.bounds_of(element)
+        }
+
+    def attributes(self, element):
+        """返回元素的属性包 {text, value, label, enabled, displayed, rect}"""
+        ios = self.platform == 'ios'
+        return {
+            'text': self.text_of(element),
+            'value': element.get('value') if ios else element.get('text'),
+            'label': element.get('label') if ios else element.get('content-desc'),
+            'enabled': element.get('enabled', 'true') == 'true',
+            'displayed': self.is_visible(element),
+            'rect': self.bounds_of(element)
+        }
+
+    def text_of(self, element):
+        if self.platform == 'ios':
+            return element.get('value') or element.get('label') or element.get('name') or ''
+        return element.get('text') or ''
+
+    def attribute_of(self, element, name):
+        """读取元素属性，'text'按平台映射到text或value/label"""
+        return self.text_of(element) if name == 'text' else element.get(name)
+
+    def is_visible(self, element):
+        attribute = 'visible' if self.platform == 'ios' else 'displayed'
+        return element.get(attribute, 'true') == 'true'
+
+    def bounds_of(self, element):
+        """返回元素位置 {x, y, width, height}，源码中没有位置信息时返回None"""
+        bounds = element.get('bounds')
+        if bounds:
+            match = self._BOUNDS_PATTERN.match(bounds)
+            if match:
+                left, top, right, bottom = (int(value) for value in match.groups())
+                return {'x': left, 'y': top, 'width': right - left, 'height': bottom - top}
+        try:
+            return {key: int(element.get(key)) for key in ('x', 'y', 'width', 'height')}
+        except (TypeError, ValueError):
+            return None
+
+    def _accessibility_ids(self, element):
+        keys = ('name',) if self.platform == 'ios' else ('content-desc',)
+        return [element.get(key) for key in keys if element.get(key)]
+
+    def _ids(self, element):
+        if self.platform == 'ios':
+            return [element.get('name')] if element.get('name') else []
+        resource_id = element.get('resource-id')
+        if not resource_id:
+            return []
+        # 同时支持完整的resource-id和省略包名的短id
+        return [resource_id, resource_id.split(':id/', 1)[-1]] if ':id/' in resource_id else [resource_id]
+
+    def _xpath(self, expression):
+        if LXML_AVAILABLE:
+            try:
+                return [node for node in self.root.xpath(expression) if not isinstance(node, str)]
+            except etree.XPathError as e:
+                raise UnsupportedLocator(f"Invalid XPath {expression}: {str(e)}")
+        # ElementTree只支持相对于根节点的路径
+        path = expression
+        if expression.startswith('//'):
+            path = '.' + expression
+        elif expression.startswith('/'):
+            root_tag, _, rest = expression[1:].partition('/')
+            if root_tag not in (self.root.tag, '*'):
+                return []
+            path = './' + rest if rest else '.'
+        try:
+            return self.root.findall(path)
+        except (SyntaxError, KeyError) as e:
+            raise UnsupportedLocator(f"XPath {expression} is not supported without lxml: {str(e)}")
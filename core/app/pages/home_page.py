@@ -10,6 +10,7 @@ except ImportError:
     AppiumBy = MobileBy
 
 from core.app.base_page import BaseMobilePage
+from core.app.locator_group import LocatorGroup
 
 class MobileHomePage(BaseMobilePage):
     """Page Object for the SauceLabs Sample App Home Page (after login)"""
@@ -64,87 +65,55 @@ class MobileHomePage(BaseMobilePage):
             self.ALT_CART_BADGE = self.IOS_ALT_CART_BADGE
             self.ALT_LOGOUT_BUTTON = self.IOS_ALT_LOGOUT_BUTTON
             self.ALT_PRODUCT_ITEM = self.IOS_ALT_PRODUCT_ITEM
+        
+        # 主定位器和备用定位器组成定位器组，在同一个轮询循环中竞争
+        self.products_title = LocatorGroup('home.products_title', self.PRODUCTS_TITLE, self.ALT_PRODUCTS_TITLE)
+        self.menu_button = LocatorGroup('home.menu_button', self.MENU_BUTTON, self.ALT_MENU_BUTTON)
+        self.cart_button = LocatorGroup('home.cart_button', self.CART_BUTTON, self.ALT_CART_BUTTON)
+        self.cart_badge = LocatorGroup('home.cart_badge', self.CART_BADGE, self.ALT_CART_BADGE)
+        self.logout_button = LocatorGroup('home.logout_button', self.LOGOUT_BUTTON, self.ALT_LOGOUT_BUTTON)
+        self.product_item = LocatorGroup('home.product_item', self.PRODUCT_ITEM, self.ALT_PRODUCT_ITEM)
     
     def click_menu_button(self):
         """Click the menu button"""
         self.logger.info("Clicking menu button")
-        try:
-            self.click(self.MENU_BUTTON)
-        except Exception as e:
-            self.logger.warning(f"Failed to find menu button with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for menu button")
-            self.click(self.ALT_MENU_BUTTON)
+        self.click(self.menu_button)
         return self
     
     def click_cart_button(self):
         """Click the cart button"""
         self.logger.info("Clicking cart button")
-        try:
-            self.click(self.CART_BUTTON)
-        except Exception as e:
-            self.logger.warning(f"Failed to find cart button with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for cart button")
-            self.click(self.ALT_CART_BUTTON)
+        self.click(self.cart_button)
         return self
     
     def get_cart_badge_count(self):
         """Get the cart badge count"""
         self.logger.info("Getting cart badge count")
-        try:
-            if self.is_element_visible(self.CART_BADGE):
-                return self.get_text(self.CART_BADGE)
-            else:
-                return "0"  # 如果徽章不可见，返回0
-        except Exception as e:
-            self.logger.warning(f"Failed to find cart badge with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for cart badge")
-            if self.is_element_visible(self.ALT_CART_BADGE):
-                return self.get_text(self.ALT_CART_BADGE)
-            else:
-                return "0"
+        # 购物车为空时徽章本来就不存在，使用零等待探测而不是等待超时
+        if self.probe_visible(self.cart_badge):
+            return self.get_text(self.cart_badge)
+        return "0"  # 如果徽章不可见，返回0
     
     def click_product_item(self, index=0):
         """Click on a product item at the given index"""
         self.logger.info(f"Clicking product item at index {index}")
-        try:
-            items = self.find_elements(self.PRODUCT_ITEM)
-            if items and len(items) > index:
-                items[index].click()
-            else:
-                raise Exception(f"No product item found at index {index}")
-        except Exception as e:
-            self.logger.warning(f"Failed to find/click product item with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for product item")
-            items = self.find_elements(self.ALT_PRODUCT_ITEM)
-            if items and len(items) > index:
-                items[index].click()
-            else:
-                raise Exception(f"No product item found at index {index} with alternative locator")
+        items = self.find_elements(self.product_item)
+        if len(items) <= index:
+            raise Exception(f"No product item found at index {index}")
+        items[index].click()
         return self
     
     def click_logout_button(self):
         """Click the logout button in the menu"""
         self.logger.info("Clicking logout button")
-        try:
-            self.click(self.LOGOUT_BUTTON)
-        except Exception as e:
-            self.logger.warning(f"Failed to find logout button with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for logout button")
-            self.click(self.ALT_LOGOUT_BUTTON)
+        self.click(self.logout_button)
         return self
     
     def get_products_title(self):
         """Get the products title text"""
-        try:
-            return self.get_text(self.PRODUCTS_TITLE)
-        except Exception as e:
-            self.logger.warning(f"Failed to find products title with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for products title")
-            return self.get_text(self.ALT_PRODUCTS_TITLE)
+        return self.get_text(self.products_title)
     
     def is_home_page_displayed(self):
         """Check if the home page is displayed"""
-        if self.is_element_visible(self.PRODUCTS_TITLE):
-            return True
-        self.logger.info("Products title not found with primary locator, trying alternative")
-        return self.is_element_visible(self.ALT_PRODUCTS_TITLE) 
\ No newline at end of file
+        # 从页面源码快照判断，不再逐个发送服务器查询
+        return self.batch_query({'title': self.products_title}, wait_for=['title'], timeout=5)['title']['visible'] 
\ No newline at end of file
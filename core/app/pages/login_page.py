@@ -10,8 +10,9 @@ except ImportError:
         CLASS_NAME = "class name"
     AppiumBy = MobileBy
 
-import os
 from core.app.base_page import BaseMobilePage
+from core.utils.common import take_screenshot
+from core.app.locator_group import LocatorGroup
 
 class MobileLoginPage(BaseMobilePage):
     """Page Object for the SauceLabs Sample App Login Page"""
@@ -40,111 +41,70 @@ class MobileLoginPage(BaseMobilePage):
         self.platform = platform.lower()
         
         # Set the correct locators based on platform
+        # 主定位器和备用定位器组成定位器组，在同一个轮询循环中竞争；iOS没有备用定位器
         if self.platform == 'ios':
             self.USERNAME_INPUT = self.IOS_USERNAME_INPUT
             self.PASSWORD_INPUT = self.IOS_PASSWORD_INPUT
             self.LOGIN_BUTTON = self.IOS_LOGIN_BUTTON
             self.ERROR_MESSAGE = self.IOS_ERROR_MESSAGE
-            
-        # 确保截图目录存在
-        self.screenshots_dir = os.path.join(os.getcwd(), 'screenshots')
-        os.makedirs(self.screenshots_dir, exist_ok=True)
-        
-        # 截取并保存屏幕截图，帮助我们调试
-        try:
-            screenshot_path = os.path.join(self.screenshots_dir, 'login_screen.png')
-            self.driver.save_screenshot(screenshot_path)
-            self.logger.info(f"保存了登录屏幕截图到{screenshot_path}")
-        except Exception as e:
-            self.logger.warning(f"无法保存截图: {str(e)}")
+            self.username_input = LocatorGroup('login.username', self.USERNAME_INPUT)
+            self.password_input = LocatorGroup('login.password', self.PASSWORD_INPUT)
+            self.login_button = LocatorGroup('login.button', self.LOGIN_BUTTON)
+            self.error_message = LocatorGroup('login.error', self.ERROR_MESSAGE)
+        else:
+            self.username_input = LocatorGroup('login.username', self.USERNAME_INPUT, self.ALT_USERNAME_INPUT)
+            self.password_input = LocatorGroup('login.password', self.PASSWORD_INPUT, self.ALT_PASSWORD_INPUT)
+            self.login_button = LocatorGroup('login.button', self.LOGIN_BUTTON, self.ALT_LOGIN_BUTTON)
+            self.error_message = LocatorGroup('login.error', self.ERROR_MESSAGE, self.ALT_ERROR_MESSAGE)
     
     def enter_username(self, username):
         """Enter the username"""
         self.logger.info(f"Entering username: {username}")
         try:
-            self.send_keys(self.USERNAME_INPUT, username)
+            self.send_keys(self.username_input, username)
         except Exception as e:
-            self.logger.warning(f"Failed to find username field with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for username field")
-            try:
-                self.send_keys(self.ALT_USERNAME_INPUT, username)
-            except Exception as e:
-                self.logger.error(f"Cannot send keys to element: {str(e)}")
-                # 获取页面源代码以便调试
-                try:
-                    page_source = self.driver.page_source
-                    self.logger.info(f"Page source: {page_source[:500]}...")
-                except Exception as e:
-                    self.logger.warning(f"Cannot get page source: {str(e)}")
-                raise
+            self.logger.error(f"Cannot send keys to element: {str(e)}")
+            # 保存完整的页面源码以便调试
+            self.save_page_source("username_input_failed")
+            raise
         return self
     
     def enter_password(self, password):
         """Enter the password"""
         self.logger.info(f"Entering password: {'*' * len(password)}")
         try:
-            self.send_keys(self.PASSWORD_INPUT, password)
+            self.send_keys(self.password_input, password)
         except Exception as e:
-            self.logger.warning(f"Failed to find password field with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for password field")
-            try:
-                self.send_keys(self.ALT_PASSWORD_INPUT, password)
-            except Exception as e:
-                self.logger.error(f"Cannot send keys to password element: {str(e)}")
-                # 获取页面源代码以便调试
-                try:
-                    page_source = self.driver.page_source
-                    self.logger.info(f"Page source: {page_source[:500]}...")
-                except Exception as e:
-                    self.logger.warning(f"Cannot get page source: {str(e)}")
-                # 尝试截图
-                try:
-                    screenshot_path = os.path.join(self.screenshots_dir, 'password_error.png')
-                    self.driver.save_screenshot(screenshot_path)
-                    self.logger.info(f"保存了错误截图到{screenshot_path}")
-                except Exception as e:
-                    self.logger.warning(f"无法保存截图: {str(e)}")
-                raise
+            self.logger.error(f"Cannot send keys to password element: {str(e)}")
+            # 保存完整的页面源码以便调试
+            self.save_page_source("password_input_failed")
+            take_screenshot(self.driver, "password_error", error_context="Failed to input password")
+            raise
         return self
     
     def click_login_button(self):
         """Click the login button"""
         self.logger.info("Clicking login button")
         try:
-            self.click(self.LOGIN_BUTTON)
+            self.click(self.login_button)
         except Exception as e:
-            self.logger.warning(f"Failed to find login button with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for login button")
+            self.logger.error(f"Cannot click login button: {str(e)}")
+            # 保存完整的页面源码以便调试
+            self.save_page_source("login_button_failed")
+            take_screenshot(self.driver, "login_button_error", error_context="Failed to click login button")
+            # 尝试直接通过坐标点击
             try:
-                self.click(self.ALT_LOGIN_BUTTON)
+                self.logger.info("尝试通过坐标点击登录按钮")
+                # 中心位置坐标，这个值需要根据实际情况调整
+                size = self.driver.get_window_size()
+                width = size['width']
+                height = size['height']
+                x = width // 2
+                y = int(height * 0.6)  # 假设按钮在屏幕下方60%位置
+                self.driver.tap([(x, y)], 500)
             except Exception as e:
-                self.logger.error(f"Cannot click login button: {str(e)}")
-                # 获取页面源代码以便调试
-                try:
-                    page_source = self.driver.page_source
-                    self.logger.info(f"Page source: {page_source[:500]}...")
-                except Exception as e:
-                    self.logger.warning(f"Cannot get page source: {str(e)}")
-                # 尝试截图
-                try:
-                    screenshot_path = os.path.join(self.screenshots_dir, 'login_button_error.png')
-                    self.driver.save_screenshot(screenshot_path)
-                    self.logger.info(f"保存了错误截图到{screenshot_path}")
-                except Exception as e:
-                    self.logger.warning(f"无法保存截图: {str(e)}")
-                # 尝试直接通过坐标点击
-                try:
-                    self.logger.info("尝试通过坐标点击登录按钮")
-                    # 中心位置坐标，这个值需要根据实际情况调整
-                    size = self.driver.get_window_size()
-                    width = size['width']
-                    height = size['height']
-                    x = width // 2
-                    y = int(height * 0.6)  # 假设按钮在屏幕下方60%位置
-                    self.driver.tap([(x, y)], 500)
-                except Exception as e:
-                    self.logger.error(f"Cannot tap on screen: {str(e)}")
-                raise
+                self.logger.error(f"Cannot tap on screen: {str(e)}")
+            raise
         return self
     
     def login(self, username, password):
@@ -156,24 +116,17 @@ class MobileLoginPage(BaseMobilePage):
     
     def get_error_message(self):
         """Get the error message text"""
-        try:
-            if self.is_element_visible(self.ERROR_MESSAGE):
-                return self.get_text(self.ERROR_MESSAGE)
-        except:
-            if self.is_element_visible(self.ALT_ERROR_MESSAGE):
-                return self.get_text(self.ALT_ERROR_MESSAGE)
-        return ""
+        # 可见性和文本从同一个页面源码快照读取
+        return self.batch_query({'error': self.error_message}, wait_for=['error'], timeout=5)['error']['text']
     
     def is_error_displayed(self):
         """Check if an error message is displayed"""
-        try:
-            return self.is_element_visible(self.ERROR_MESSAGE)
-        except:
-            return self.is_element_visible(self.ALT_ERROR_MESSAGE)
+        return self.batch_query({'error': self.error_message}, wait_for=['error'], timeout=5)['error']['visible']
     
     def is_login_page_displayed(self):
         """Check if the login page is displayed"""
-        try:
-            return self.is_element_visible(self.USERNAME_INPUT) and self.is_element_visible(self.PASSWORD_INPUT)
-        except:
-            return self.is_element_visible(self.ALT_USERNAME_INPUT) and self.is_element_visible(self.ALT_PASSWORD_INPUT) 
\ No newline at end of file
+        results = self.batch_query(
+            {'username': self.username_input, 'password': self.password_input},
+            wait_for=['username', 'password'], timeout=5
+        )
+        return results['username']['visible'] and results['password']['visible'] 
\ No newline at end of file
@@ -8,6 +8,7 @@ except ImportError:
         ID = "id"
 
 from core.app.base_page import BaseMobilePage
+from core.app.locator_group import LocatorGroup
 
 class MobileProductPage(BaseMobilePage):
     """Page Object for the SauceLabs Sample App Product Page"""
@@ -62,80 +63,71 @@ class MobileProductPage(BaseMobilePage):
             self.ALT_PRODUCT_PRICE = self.IOS_ALT_PRODUCT_PRICE
             self.ALT_ADD_TO_CART_BUTTON = self.IOS_ALT_ADD_TO_CART_BUTTON
             self.ALT_BACK_BUTTON = self.IOS_ALT_BACK_BUTTON
+        
+        # 主定位器和备用定位器组成定位器组，在同一个轮询循环中竞争
+        self.product_item = LocatorGroup('product.item', self.PRODUCT_ITEM, self.ALT_PRODUCT_ITEM)
+        self.product_title = LocatorGroup('product.title', self.PRODUCT_TITLE, self.ALT_PRODUCT_TITLE)
+        self.product_price = LocatorGroup('product.price', self.PRODUCT_PRICE, self.ALT_PRODUCT_PRICE)
+        self.add_to_cart_button = LocatorGroup('product.add_to_cart', self.ADD_TO_CART_BUTTON, self.ALT_ADD_TO_CART_BUTTON)
+        self.back_button = LocatorGroup('product.back', self.BACK_BUTTON, self.ALT_BACK_BUTTON)
     
     def get_product_items(self):
         """Get all product items in the list"""
         self.logger.info("Getting all product items")
-        try:
-            return self.find_elements(self.PRODUCT_ITEM)
-        except Exception as e:
-            self.logger.warning(f"Failed to find product items with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for product items")
-            return self.find_elements(self.ALT_PRODUCT_ITEM)
+        return self.find_elements(self.product_item)
+    
+    def collect_product_titles(self, max_items=0):
+        """滚动整个商品列表，返回所有商品标题"""
+        attribute = 'label' if self.platform == 'ios' else 'text'
+        rows = self.scroll_and_collect(self.product_title, [attribute], max_items=max_items)
+        return [row[attribute] for row in rows if row[attribute]]
     
     def click_product_item(self, index=0):
         """Click on a product item at the given index"""
         self.logger.info(f"Clicking product item at index {index}")
-        try:
-            items = self.find_elements(self.PRODUCT_ITEM)
-            if items and len(items) > index:
-                items[index].click()
-            else:
-                raise Exception(f"No product item found at index {index}")
-        except Exception as e:
-            self.logger.warning(f"Failed to find/click product item with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for product item")
-            items = self.find_elements(self.ALT_PRODUCT_ITEM)
-            if items and len(items) > index:
-                items[index].click()
-            else:
-                raise Exception(f"No product item found at index {index} with alternative locator")
+        items = self.find_elements(self.product_item)
+        if len(items) <= index:
+            raise Exception(f"No product item found at index {index}")
+        items[index].click()
         return self
     
     def click_add_to_cart(self):
         """Click the Add to Cart button"""
         self.logger.info("Clicking Add to Cart button")
-        try:
-            self.click(self.ADD_TO_CART_BUTTON)
-        except Exception as e:
-            self.logger.warning(f"Failed to find Add to Cart button with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for Add to Cart button")
-            self.click(self.ALT_ADD_TO_CART_BUTTON)
+        self.click(self.add_to_cart_button)
         return self
     
     def click_back_button(self):
         """Click the Back to Products button"""
         self.logger.info("Clicking Back to Products button")
-        try:
-            self.click(self.BACK_BUTTON)
-        except Exception as e:
-            self.logger.warning(f"Failed to find Back button with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for Back button")
-            self.click(self.ALT_BACK_BUTTON)
+        self.click(self.back_button)
         return self
     
     def get_product_title(self):
         """Get the product title text"""
-        try:
-            return self.get_text(self.PRODUCT_TITLE)
-        except Exception as e:
-            self.logger.warning(f"Failed to find product title with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for product title")
-            return self.get_text(self.ALT_PRODUCT_TITLE)
-    
+        return self.get_text(self.product_title)
+
     def get_product_price(self):
         """Get the product price text"""
-        try:
-            return self.get_text(self.PRODUCT_PRICE)
-        except Exception as e:
-            self.logger.warning(f"Failed to find product price with primary locator: {str(e)}")
-            self.logger.info("Trying alternative locator for product price")
-            return self.get_text(self.ALT_PRODUCT_PRICE)
-    
+        return self.get_text(self.product_price)
+
+    def get_product_details(self):
+        """一次读取商品标题和价格，两者共享同一个页面快照
+
+        快照在步骤内缓存，只适合在同一步骤中没有其他界面变化时批量读取；单独读取使用get_product_title/get_product_price
+
+        Returns:
+            {'title': 标题, 'price': 价格, 'attributes': {名称: 属性包}}
+        """
+        bundles = self.get_attributes({'title': self.product_title, 'price': self.product_price})
+        details = {name: self._text_of(bundle) for name, bundle in bundles.items()}
+        details['attributes'] = bundles
+        return details
+
+    @staticmethod
+    def _text_of(bundle):
+        return (bundle['text'] or bundle['value'] or '') if bundle else ''
+
     def is_product_page_displayed(self):
         """Check if the product page is displayed"""
-        try:
-            return self.is_element_visible(self.PRODUCT_TITLE)
-        except Exception:
-            self.logger.info("Product title not found with primary locator, trying alternative")
-            return self.is_element_visible(self.ALT_PRODUCT_TITLE) 
\ No newline at end of file
+        return self.batch_query({'title': self.product_title}, wait_for=['title'], timeout=5)['title']['visible'] 
\ No newline at end of file
@@ -0,0 +1,184 @@
+import logging
+import threading
+from core.app.appium_factory import AppiumFactory
+from core.app.device_pool import get_device_pool
+from core.utils.config_manager import ConfigManager
+
+
+class AppiumSessionManager:
+    """Appium会话管理器
+
+    每台设备保持一个Appium会话跨场景复用（按平台和设备的udid/名称区分），场景之间通过应用内重置恢复初始状态：
+    - restart: terminate_app + activate_app
+    - clear: 清除应用数据后重新启动（仅Android支持，iOS退化为restart）
+    - deeplink: 通过deep link直接跳转到起始页面
+    场景失败后或复用达到APPIUM_SESSION_MAX_SCENARIOS次后，下一个场景会重新创建会话。
+    配置了设备池时，创建会话前从池中租用设备，会话关闭时归还租约。
+    """
+
+    RESET_STRATEGIES = ('restart', 'clear', 'deeplink')
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.config_manager = ConfigManager()
+        self.session_config = dict(self.config_manager.get_appium_session_config())
+        if self.session_config['reset_strategy'] not in self.RESET_STRATEGIES:
+            self.logger.warning(f"Unknown APPIUM_RESET_STRATEGY '{self.session_config['reset_strategy']}', using 'restart'")
+            self.session_config['reset_strategy'] = 'restart'
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, platform):
+        """获取平台对应的driver，必要时创建新会话或重置应用
+
+        Args:
+            platform: 'android' 或 'ios'
+
+        Returns:
+            Appium WebDriver对象
+        """
+        platform = platform.lower()
+        with self._lock:
+            key = self._idle_session(platform)
+            session = self._sessions.get(key)
+            if session is not None and self._needs_restart(session):
+                self.logger.info(f"Restarting {self._label(key)} session after {session['scenarios']} scenarios (dirty: {session['dirty']})")
+                self._quit(key)
+                session = None
+
+            if session is not None:
+                try:
+                    self._reset_app(session['driver'], platform)
+                except Exception as e:
+                    self.logger.warning(f"In-app reset failed, recreating {self._label(key)} session: {str(e)}")
+                    self._quit(key)
+                    session = None
+
+            if session is None:
+                driver, device = self._create(platform)
+                key = (platform, self._device_id(driver, device))
+                if key in self._sessions:
+                    # 未配置设备池时同一台设备上的旧会话已经不可用
+                    self._quit(key)
+                session = {'driver': driver, 'device': device, 'scenarios': 0, 'dirty': False, 'in_use': False}
+                self._sessions[key] = session
+
+            session['scenarios'] += 1
+            session['in_use'] = True
+            return session['driver']
+
+    def release(self, platform, failed=False, duration=None, driver=None):
+        """场景结束时归还会话
+
+        Args:
+            platform: 'android' 或 'ios'
+            failed: 场景是否失败，失败的会话在下一个场景前重建
+            duration: 场景耗时(秒)，记录到设备池用于后续调度
+            driver: acquire返回的driver，同一平台有多个会话时用于确定归还哪一个
+        """
+        platform = platform.lower()
+        with self._lock:
+            key = next((key for key, session in self._sessions.items()
+                        if key[0] == platform and session['in_use'] and (driver is None or session['driver'] is driver)), None)
+            if key is None:
+                return
+            session = self._sessions[key]
+            session['in_use'] = False
+            if session['device'] is not None and duration is not None:
+                get_device_pool().record_duration(session['device'], duration)
+            if not self.session_config['reuse']:
+                self._quit(key)
+            elif failed:
+                session['dirty'] = True
+
+    def shutdown(self):
+        """关闭所有会话，在套件结束时调用"""
+        with self._lock:
+            for key in list(self._sessions):
+                self._quit(key)
+
+    def _needs_restart(self, session):
+        max_scenarios = self.session_config['max_scenarios']
+        return session['dirty'] or (max_scenarios > 0 and session['scenarios'] >= max_scenarios)
+
+    def _idle_session(self, platform):
+        """返回该平台一个空闲会话的键，没有时返回None"""
+        return next((key for key, session in self._sessions.items() if key[0] == platform and not session['in_use']), None)
+
+    @staticmethod
+    def _device_id(driver, device):
+        """会话所在设备的标识：设备池租约的udid/名称，未配置设备池时取会话能力中的udid/设备名"""
+        if device is not None:
+            return device.get('udid') or device['name']
+        capabilities = getattr(driver, 'capabilities', None) or {}
+        return capabilities.get('udid') or capabilities.get('deviceName') or ''
+
+    def _create(self, platform):
+        """创建会话，返回(driver, 设备定义)，未配置设备池时设备定义为None"""
+        pool = get_device_pool()
+        device = pool.lease(platform) if pool is not None else None
+        factory = AppiumFactory()
+        try:
+            driver = factory.get_ios_driver(device) if platform == 'ios' else factory.get_android_driver(device)
+            if driver is None:
+                raise RuntimeError(f"Cannot create {platform} driver")
+        except Exception:
+            if device is not None:
+                pool.report_failure(device)
+                pool.release(device)
+            raise
+        if device is not None:
+            pool.report_success(device)
+        return driver, device
+
+    @staticmethod
+    def _label(key):
+        platform, device_id = key
+        return f"{platform} ({device_id})" if device_id else platform
+
+    def _quit(self, key):
+        session = self._sessions.pop(key, None)
+        if session is None:
+            return
+        try:
+            session['driver'].quit()
+            self.logger.info(f"{self._label(key)} session quit")
+        except Exception as e:
+            self.logger.warning(f"Error quitting {self._label(key)} session: {str(e)}")
+        finally:
+            if session['device'] is not None:
+                get_device_pool().release(session['device'])
+
+    def _app_id(self, platform):
+        if platform == 'ios':
+            return self.config_manager.get_ios_config().get('bundle_id', '')
+        return self.config_manager.get_android_config().get('app_package', '')
+
+    def _reset_app(self, driver, platform):
+        """在已有会话中把应用恢复到初始状态"""
+        strategy = self.session_config['reset_strategy']
+        app_id = self._app_id(platform)
+        self.logger.info(f"Resetting {app_id} on {platform} with strategy '{strategy}'")
+
+        if strategy == 'deeplink' and self.session_config['deep_link']:
+            app_key = 'bundleId' if platform == 'ios' else 'package'
+            driver.execute_script('mobile: deepLink', {'url': self.session_config['deep_link'], app_key: app_id})
+            return
+
+        driver.terminate_app(app_id)
+        if strategy == 'clear' and platform == 'android':
+            driver.execute_script('mobile: clearApp', {'appId': app_id})
+        driver.activate_app(app_id)
+
+
+_session_manager = None
+_session_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    """返回进程内共享的会话管理器"""
+    global _session_manager
+    with _session_manager_lock:
+        if _session_manager is None:
+            _session_manager = AppiumSessionManager()
+        return _session_manager
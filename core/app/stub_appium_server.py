@@ -0,0 +1,50 @@
+"""本地替身Appium服务器，只实现/status接口
+
+用于在没有真实设备和Appium的情况下验证设备池的调度和健康检查：
+
+    python -m core.app.stub_appium_server 4723 4725
+"""
+import json
+import logging
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubStatusHandler(BaseHTTPRequestHandler):
+    """对/status返回ready，其余路径返回404"""
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/status':
+            body = json.dumps({'value': {'ready': True, 'message': 'Stub Appium server is ready'}}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+
+def start_stub_servers(ports):
+    """在后台线程启动替身服务器，返回服务器列表，调用shutdown()停止"""
+    servers = []
+    for port in ports:
+        server = ThreadingHTTPServer(('127.0.0.1', port), StubStatusHandler)
+        threading.Thread(target=server.serve_forever, name=f'stub-appium-{port}', daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+if __name__ == '__main__':
+    ports = [int(port) for port in sys.argv[1:]] or [4723]
+    servers = start_stub_servers(ports)
+    print(f"Stub Appium servers listening on {', '.join(str(port) for port in ports)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
@@ -0,0 +1,199 @@
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tarfile
+import threading
+from collections import Counter
+from datetime import datetime
+from core.utils.config_snapshot import PROJECT_ROOT, get_config
+from core.utils.log_pipeline import STREAM_ID, current_log_files, get_log_context
+
+
+class ArtifactStore:
+    """按内容寻址的运行产物存储（截图、页面源码等）
+
+    - 每个并行流一个运行目录 artifacts/<时间>_<流ID>/，产物按内容的SHA-256存放在 blobs/<前两位>/<哈希>.<扩展名>，
+      内容相同的产物（例如反复截到的同一个错误界面）只存一份，重复提交只追加一条索引记录
+    - 文本类产物（页面源码）用gzip压缩；截图由截图服务转码为WebP/JPEG后写入，不再重复压缩
+    - 每次提交在 index.jsonl 追加一行，记录名称、类型、所属场景和步骤，进程中途退出也不会丢失索引
+    - 套件结束时 write_manifest() 写出 manifest.json（按场景分组的产物列表和去重统计，路径会写入Gauge报告），
+      archive() 再连同本流的日志打包为 artifacts/<时间>_<流ID>.tar 并删除运行目录，每次运行只保存一份
+    - put()/截图服务返回的路径只在套件结束前有效；打包后同一产物是归档中的 <时间>_<流ID>/blobs/... 成员
+      （返回路径去掉 artifacts/ 前缀），关闭打包时运行目录保留
+    - 归档和运行目录都只保留最近的ARTIFACT_RETENTION个
+    """
+
+    def __init__(self, root, run_id, compress_level=6, retention=20):
+        self.logger = logging.getLogger(__name__)
+        self.root = root
+        self.run_id = run_id
+        self.run_dir = os.path.join(root, run_id)
+        self.compress_level = compress_level
+        self.retention = retention
+        self._blobs = {}
+        self._entries = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_key(data):
+        """返回内容的SHA-256十六进制摘要"""
+        return hashlib.sha256(data).hexdigest()
+
+    def put(self, kind, name, data, extension, compress=False):
+        """保存产物，内容相同时只写入一次
+
+        Args:
+            kind: 产物类型，如 page_source
+            name: 产物名称，写入索引
+            data: 内容（bytes或str）
+            extension: 文件扩展名
+            compress: 是否gzip压缩
+
+        Returns:
+            产物文件相对于项目根目录的路径
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        key = self.content_key(data)
+        if compress:
+            extension = f'{extension}.gz'
+        path, new = self.reserve(kind, name, key, extension, len(data))
+        if new:
+            if compress:
+                # mtime固定为0，相同内容的压缩结果也相同
+                data = gzip.compress(data, self.compress_level, mtime=0)
+            self.write_blob(path, data)
+        return os.path.relpath(path, PROJECT_ROOT)
+
+    def reserve(self, kind, name, key, extension, size=0, context=None):
+        """登记一个产物并返回 (blob路径, 是否需要写入)
+
+        内容已经存在时不需要再写，调用方可以跳过编码和写盘（截图服务据此跳过重复截图的转码）。
+        context为产生产物时的场景和步骤，默认取当前日志上下文。
+        """
+        path = os.path.join(self.run_dir, 'blobs', key[:2], f'{key}.{extension}')
+        context = context or get_log_context()
+        with self._lock:
+            new = key not in self._blobs
+            if new:
+                self._blobs[key] = path
+            entry = {
+                'time': datetime.now().isoformat(timespec='milliseconds'),
+                'kind': kind,
+                'name': name,
+                'sha256': key,
+                'path': os.path.relpath(path, self.run_dir),
+                'size': size,
+                'duplicate': not new,
+                'scenario': context['scenario'],
+                'step': context['step']
+            }
+            self._entries.append(entry)
+            os.makedirs(self.run_dir, exist_ok=True)
+            with open(os.path.join(self.run_dir, 'index.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return path, new
+
+    def write_blob(self, path, data):
+        """原子写入blob（临时文件 + os.replace）"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def manifest(self):
+        """返回运行清单：产物按场景分组，附带去重统计"""
+        with self._lock:
+            entries = list(self._entries)
+        scenarios = {}
+        for entry in entries:
+            scenarios.setdefault(entry['scenario'] or '(suite)', []).append(entry)
+        stored = sum(os.path.getsize(path) for path in self._blobs.values() if os.path.exists(path))
+        return {
+            'run_id': self.run_id,
+            'stream': STREAM_ID,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'artifacts': len(entries),
+            'unique': sum(1 for entry in entries if not entry['duplicate']),
+            'by_kind': dict(Counter(entry['kind'] for entry in entries)),
+            'stored_bytes': stored,
+            'scenarios': scenarios
+        }
+
+    def write_manifest(self):
+        """写出manifest.json并返回其相对于项目根目录的路径，没有产物时返回None"""
+        if not self._entries:
+            return None
+        path = os.path.join(self.run_dir, 'manifest.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        self._prune()
+        return os.path.relpath(path, PROJECT_ROOT)
+
+    def archive(self, include_logs=True):
+        """写出manifest.json并把运行目录（和本流的日志）打包为一个tar文件，然后删除运行目录
+
+        blob已经是压缩格式，tar不再整体压缩。没有任何产物时不生成归档。
+
+        Returns:
+            归档文件相对于项目根目录的路径，没有产物时返回None
+        """
+        if self.write_manifest() is None:
+            return None
+        manifest = self.manifest()
+        archive_path = os.path.join(self.root, f'{self.run_id}.tar')
+        tmp_path = f'{archive_path}.tmp'
+        with tarfile.open(tmp_path, 'w') as tar:
+            tar.add(self.run_dir, arcname=self.run_id)
+            for log_file in current_log_files() if include_logs else []:
+                tar.add(log_file, arcname=os.path.join(self.run_id, 'logs', os.path.basename(log_file)))
+        os.replace(tmp_path, archive_path)
+        self._remove_run_dir()
+        self._prune()
+        self.logger.info("Archived %s artifacts (%s unique, %s bytes) to %s",
+                         manifest['artifacts'], manifest['unique'], manifest['stored_bytes'], archive_path)
+        return os.path.relpath(archive_path, PROJECT_ROOT)
+
+    def _remove_run_dir(self):
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        with self._lock:
+            self._blobs.clear()
+            self._entries.clear()
+
+    def _prune(self):
+        # 归档和运行目录分别只保留最近的retention个，当前运行目录始终保留
+        archives = glob.glob(os.path.join(self.root, '*.tar'))
+        run_dirs = [path for path in glob.glob(os.path.join(self.root, '*'))
+                    if os.path.isdir(path) and os.path.abspath(path) != os.path.abspath(self.run_dir)]
+        for paths in (archives, run_dirs):
+            paths.sort(key=os.path.getmtime, reverse=True)
+            for path in paths[self.retention:] if self.retention > 0 else []:
+                try:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """返回本进程（并行流）的产物存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            config = get_config().artifacts
+            run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{STREAM_ID}"
+            _store = ArtifactStore(config.root, run_id, config.compress_level, config.retention)
+        return _store
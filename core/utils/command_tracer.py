@@ -0,0 +1,183 @@
+import logging
+import os
+import sys
+import threading
+import time
+from core.utils.config_manager import ConfigManager
+
+# 查找元素类命令的参数中带有定位器
+_FIND_COMMANDS = ('findElement', 'findElements', 'findChildElement', 'findChildElements')
+# 归属到页面对象方法时只看这些包中的调用帧
+_PAGE_MODULES = ('core.web.pages', 'core.app.pages')
+_TRACED_MODULES = ('core.', 'step_impl.')
+
+
+class CommandTracer:
+    """WebDriver命令级追踪
+
+    替换driver实例的execute方法（元素命令也经由它发送），记录每个命令的名称、定位器、耗时和结果，
+    并归属到当前Gauge步骤和发出命令的页面对象方法。套件结束时输出：
+    - 按总耗时排序的命令表和步骤表（步骤耗时拆分为命令耗时和命令之外的本地耗时）
+    - collapsed stack格式的火焰图数据（flamegraph.pl / speedscope可直接读取）
+    """
+
+    def __init__(self, output_dir, top=20):
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = output_dir
+        self.top = top
+        self._lock = threading.Lock()
+        self._step = None
+        self._step_started = None
+        self._commands = {}
+        self._steps = {}
+        self._stacks = {}
+
+    def instrument(self, driver):
+        """给driver实例安装追踪，返回同一个driver"""
+        if getattr(driver, '_command_tracer', None) is self:
+            return driver
+        execute = driver.execute
+
+        def traced_execute(driver_command, params=None):
+            started = time.perf_counter()
+            outcome = 'ok'
+            try:
+                return execute(driver_command, params)
+            except Exception as e:
+                outcome = type(e).__name__
+                raise
+            finally:
+                self.record(driver_command, params, time.perf_counter() - started, outcome)
+
+        driver.execute = traced_execute
+        driver._command_tracer = self
+        return driver
+
+    def start_step(self, name):
+        with self._lock:
+            self._step = name
+            self._step_started = time.perf_counter()
+
+    def end_step(self):
+        """步骤结束时记录步骤的总耗时"""
+        with self._lock:
+            if self._step is None:
+                return
+            stats = self._steps.setdefault(self._step, _new_stats())
+            stats['wall'] += time.perf_counter() - self._step_started
+            stats['runs'] += 1
+            self._step = None
+
+    def record(self, command, params, duration, outcome='ok'):
+        locator = None
+        if command in _FIND_COMMANDS and params:
+            locator = f"{params.get('using')}={params.get('value')}"
+        frames = _caller_frames()
+        owner = next((name for module, name in frames if module.startswith(_PAGE_MODULES)), None)
+        if owner is None and frames:
+            owner = frames[0][1]
+        with self._lock:
+            step = self._step or '(outside step)'
+            key = (command, locator, owner)
+            stats = self._commands.setdefault(key, _new_stats())
+            stats['count'] += 1
+            stats['total'] += duration
+            stats['max'] = max(stats['max'], duration)
+            if outcome != 'ok':
+                stats['errors'] += 1
+            step_stats = self._steps.setdefault(step, _new_stats())
+            step_stats['count'] += 1
+            step_stats['total'] += duration
+            stack = ';'.join([step] + _collapse(name for _, name in frames) + [command])
+            self._stacks[stack] = self._stacks.get(stack, 0) + duration
+
+    def report(self):
+        """返回按总耗时排序的命令表和步骤表文本"""
+        with self._lock:
+            commands = sorted(self._commands.items(), key=lambda item: item[1]['total'], reverse=True)[:self.top]
+            steps = sorted(self._steps.items(), key=lambda item: item[1]['total'], reverse=True)[:self.top]
+        lines = [f"Top {len(commands)} WebDriver commands by total time",
+                 f"{'total(s)':>9} {'count':>6} {'avg(ms)':>8} {'max(ms)':>8} {'err':>4}  command / locator / caller"]
+        for (command, locator, owner), stats in commands:
+            lines.append(
+                f"{stats['total']:9.3f} {stats['count']:6d} {stats['total'] / stats['count'] * 1000:8.1f} "
+                f"{stats['max'] * 1000:8.1f} {stats['errors']:4d}  {command} {locator or ''} <- {owner or '?'}"
+            )
+        lines += ["", f"Top {len(steps)} steps by WebDriver time",
+                  f"{'driver(s)':>9} {'local(s)':>9} {'commands':>8} {'runs':>5}  step"]
+        for step, stats in steps:
+            local = max(stats['wall'] - stats['total'], 0) if stats['runs'] else 0
+            lines.append(f"{stats['total']:9.3f} {local:9.3f} {stats['count']:8d} {stats['runs']:5d}  {step}")
+        return '\n'.join(lines)
+
+    def write_report(self):
+        """写出排序表和火焰图数据，并行流各自写入带进程号的文件，返回写出的文件路径"""
+        with self._lock:
+            if not self._commands:
+                return []
+            stacks = dict(self._stacks)
+        os.makedirs(self.output_dir, exist_ok=True)
+        report_path = os.path.join(self.output_dir, f'commands-{os.getpid()}.txt')
+        folded_path = os.path.join(self.output_dir, f'commands-{os.getpid()}.folded')
+        report = self.report()
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+        # collapsed stack格式：分号分隔的调用栈 + 空格 + 权重（微秒）
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            for stack, seconds in sorted(stacks.items()):
+                f.write(f"{stack.replace(' ', '_')} {max(int(seconds * 1_000_000), 1)}\n")
+        self.logger.info(f"WebDriver command trace written to {report_path}\n{report}")
+        return [report_path, folded_path]
+
+
+def _new_stats():
+    return {'count': 0, 'total': 0.0, 'max': 0.0, 'errors': 0, 'wall': 0.0, 'runs': 0}
+
+
+def _caller_frames():
+    """返回框架代码中的调用帧 [(模块, 'Class.method')]，从最外层到最内层"""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith(_TRACED_MODULES) and module != __name__:
+            owner = frame.f_locals.get('self')
+            name = frame.f_code.co_name
+            frames.append((module, f"{type(owner).__name__}.{name}" if owner is not None else name))
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _collapse(names):
+    # 合并连续重复的帧（例如重试循环中的递归调用）
+    collapsed = []
+    for name in names:
+        if not collapsed or collapsed[-1] != name:
+            collapsed.append(name)
+    return collapsed
+
+
+_tracer = None
+_tracer_loaded = False
+_tracer_lock = threading.Lock()
+
+
+def get_command_tracer():
+    """返回进程内共享的命令追踪器，未启用COMMAND_TRACE时返回None"""
+    global _tracer, _tracer_loaded
+    with _tracer_lock:
+        if not _tracer_loaded:
+            config = ConfigManager().get_command_trace_config()
+            if config['enabled']:
+                _tracer = CommandTracer(config['output_dir'], config['top'])
+            _tracer_loaded = True
+        return _tracer
+
+
+def trace_driver(driver):
+    """启用追踪时给driver安装命令追踪，返回同一个driver"""
+    tracer = get_command_tracer()
+    if tracer is None or driver is None:
+        return driver
+    return tracer.instrument(driver)
@@ -0,0 +1,581 @@
+import glob
+import json
+import logging
+import os
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, Optional, Tuple
+
+# 项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ENV_DIR = os.path.join(PROJECT_ROOT, 'env')
+
+_TRUE_VALUES = ('true', 'yes', '1')
+
+
+def load_properties(path: str) -> Dict[str, str]:
+    """解析Gauge/Java风格的properties文件
+
+    支持 key = value、key: value、#/!注释和行尾反斜杠续行，键和值两端的空白被去掉
+    """
+    values = {}
+    pending = ''
+    with open(path, 'r', encoding='utf-8') as f:
+        for raw_line in f:
+            line = pending + raw_line.strip()
+            pending = ''
+            if not line or line[0] in '#!':
+                continue
+            if line.endswith('\\'):
+                pending = line[:-1]
+                continue
+            separators = [index for index in (line.find('='), line.find(':')) if index > 0]
+            if not separators:
+                values[line] = ''
+                continue
+            index = min(separators)
+            values[line[:index].strip()] = line[index + 1:].strip()
+    return values
+
+
+def load_environment(env_names=(), env_dir: str = ENV_DIR, environ: Optional[Mapping] = None) -> Dict[str, str]:
+    """按 default → 指定环境 → 操作系统环境变量 的顺序合并配置，后面的层覆盖前面的层
+
+    Args:
+        env_names: 环境名列表或逗号分隔的字符串（对应env/<name>/*.properties）
+        env_dir: 环境配置目录
+        environ: 最高优先级的环境变量，默认为os.environ
+    """
+    if isinstance(env_names, str):
+        env_names = [name.strip() for name in env_names.split(',') if name.strip()]
+    values = {}
+    for name in ['default'] + [name for name in env_names if name != 'default']:
+        for path in sorted(glob.glob(os.path.join(env_dir, name, '*.properties'))):
+            values.update(load_properties(path))
+    values.update(os.environ if environ is None else environ)
+    return values
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, dict):
+        return MappingProxyType(dict(value))
+    return value
+
+
+class ConfigSection(Mapping):
+    """只读配置分组
+
+    字段存储在__slots__中，通过属性访问（config.web.base_url）；
+    同时实现Mapping接口，兼容原有的 config['key'] / config.get('key') 写法
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, _freeze(values[name]))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class WebConfig(ConfigSection):
+    __slots__ = ('base_url', 'browser', 'browser_matrix', 'headless', 'implicit_wait', 'browser_width',
+                 'browser_height', 'session_ttl', 'session_cache_dir', 'users')
+    base_url: str
+    browser: str
+    browser_matrix: Tuple[str, ...]
+    headless: bool
+    implicit_wait: int
+    browser_width: int
+    browser_height: int
+    session_ttl: int
+    session_cache_dir: str
+    users: Mapping
+
+
+class WaitConfig(ConfigSection):
+    __slots__ = ('step_budget', 'initial_poll', 'max_poll', 'backoff')
+    step_budget: float
+    initial_poll: float
+    max_poll: float
+    backoff: float
+
+
+class AndroidConfig(ConfigSection):
+    __slots__ = ('app_package', 'app_activity', 'platform_version', 'device_name', 'appium_server', 'implicit_wait')
+    app_package: str
+    app_activity: str
+    platform_version: str
+    device_name: str
+    appium_server: str
+    implicit_wait: int
+
+
+class IOSConfig(ConfigSection):
+    __slots__ = ('bundle_id', 'platform_version', 'device_name', 'appium_server', 'implicit_wait')
+    bundle_id: str
+    platform_version: str
+    device_name: str
+    appium_server: str
+    implicit_wait: int
+
+
+class AppiumSessionConfig(ConfigSection):
+    __slots__ = ('reuse', 'max_scenarios', 'reset_strategy', 'deep_link')
+    reuse: bool
+    max_scenarios: int
+    reset_strategy: str
+    deep_link: str
+
+
+class LocatorCacheConfig(ConfigSection):
+    __slots__ = ('cache_file', 'app_version', 'optimize')
+    cache_file: str
+    app_version: str
+    optimize: bool
+
+
+class DeviceStateConfig(ConfigSection):
+    __slots__ = ('ttl', 'state_file')
+    ttl: float
+    state_file: str
+
+
+class DevicePoolConfig(ConfigSection):
+    __slots__ = ('pool_file', 'state_dir', 'quarantine_threshold', 'quarantine_seconds')
+    pool_file: str
+    state_dir: str
+    quarantine_threshold: int
+    quarantine_seconds: int
+
+
+class AppiumServerPoolConfig(ConfigSection):
+    __slots__ = ('managed', 'command', 'startup_timeout', 'max_restarts', 'log_dir')
+    managed: int
+    command: str
+    startup_timeout: float
+    max_restarts: int
+    log_dir: str
+
+
+class AppArtifactConfig(ConfigSection):
+    __slots__ = ('android_app_path', 'ios_app_path', 'install_workers', 'state_file')
+    android_app_path: str
+    ios_app_path: str
+    install_workers: int
+    state_file: str
+
+
+class CommandTraceConfig(ConfigSection):
+    __slots__ = ('enabled', 'output_dir', 'top')
+    enabled: bool
+    output_dir: str
+    top: int
+
+
+class LoggingConfig(ConfigSection):
+    __slots__ = ('level', 'log_dir', 'max_bytes', 'backup_count', 'retention')
+    level: str
+    log_dir: str
+    max_bytes: int
+    backup_count: int
+    retention: int
+
+
+class ScreenshotConfig(ConfigSection):
+    __slots__ = ('policy', 'image_format', 'quality', 'sample_rate', 'ring_size')
+    policy: str
+    image_format: str
+    quality: int
+    sample_rate: float
+    ring_size: int
+
+
+class VisualConfig(ConfigSection):
+    __slots__ = ('baseline_dir', 'diff_dir', 'tolerance', 'max_diff_ratio', 'hash_threshold', 'update_baselines')
+    baseline_dir: str
+    diff_dir: str
+    tolerance: int
+    max_diff_ratio: float
+    hash_threshold: int
+    update_baselines: bool
+
+
+class ArtifactConfig(ConfigSection):
+    __slots__ = ('root', 'compress_level', 'archive', 'include_logs', 'retention')
+    root: str
+    compress_level: int
+    archive: bool
+    include_logs: bool
+    retention: int
+
+
+class RetryConfig(ConfigSection):
+    __slots__ = ('max_attempts', 'base_delay', 'max_delay', 'multiplier', 'scenario_budget')
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    multiplier: float
+    scenario_budget: int
+
+
+class _SectionBuilder:
+    """从合并后的配置解析各个分组，每个分组只解析一次（由ConfigSnapshot按需调用）"""
+
+    def __init__(self, env, snapshot):
+        self.logger = logging.getLogger(__name__)
+        self.env = env
+        self.snapshot = snapshot
+
+    def api_base_url(self):
+        return self.env.get('API_BASE_URL', '')
+
+    def web(self):
+        # 尝试获取浏览器窗口大小
+        try:
+            browser_width = int(self.env.get('BROWSER_WIDTH', '0'))
+            browser_height = int(self.env.get('BROWSER_HEIGHT', '0'))
+        except ValueError:
+            browser_width, browser_height = 0, 0
+            self.logger.warning("Invalid browser dimensions in environment variables")
+
+        # 尝试获取implicit_wait
+        try:
+            implicit_wait = int(self.env.get('WEB_IMPLICIT_WAIT', '10'))
+        except ValueError:
+            implicit_wait = 10
+            self.logger.warning("Invalid implicit wait value in environment variables")
+
+        # 解析headless值
+        headless_value = self.env.get('WEB_HEADLESS', 'True')
+        if headless_value.lower() in _TRUE_VALUES:
+            headless = True
+        elif headless_value.lower() in ('false', 'no', '0'):
+            headless = False
+        else:
+            headless = True
+            self.logger.warning(f"Invalid headless value '{headless_value}', defaulting to True")
+
+        # 登录会话快照缓存
+        try:
+            session_ttl = int(self.env.get('WEB_SESSION_TTL', '1800'))
+        except ValueError:
+            session_ttl = 1800
+            self.logger.warning("Invalid session TTL value in environment variables, defaulting to 1800")
+        session_cache_dir = self.env.get('WEB_SESSION_CACHE_DIR', '') or os.path.join(PROJECT_ROOT, '.session_cache')
+
+        # 测试账号，格式为 user1:password1,user2:password2
+        users = {}
+        for entry in self.env.get('WEB_USERS', '').split(','):
+            if ':' in entry:
+                username, password = entry.split(':', 1)
+                users[username.strip()] = password.strip()
+
+        # 多浏览器矩阵模式，格式为 chrome,firefox,edge
+        browser_matrix = [b.strip().lower() for b in self.env.get('WEB_BROWSER_MATRIX', '').split(',') if b.strip()]
+
+        config = {
+            'base_url': self.env.get('WEB_BASE_URL', ''),
+            'browser': self.env.get('WEB_BROWSER', 'chrome'),
+            'browser_matrix': browser_matrix,
+            'headless': headless,
+            'implicit_wait': implicit_wait,
+            'browser_width': browser_width,
+            'browser_height': browser_height,
+            'session_ttl': session_ttl,
+            'session_cache_dir': session_cache_dir,
+            'users': users
+        }
+        self.logger.debug(f"Web config: {json.dumps(dict(config, users=sorted(users)))}")
+        return WebConfig(**config)
+
+    def wait(self):
+        defaults = {
+            'step_budget': ('WAIT_STEP_BUDGET', 60.0),
+            'initial_poll': ('WAIT_INITIAL_POLL', 0.05),
+            'max_poll': ('WAIT_MAX_POLL', 0.5),
+            'backoff': ('WAIT_BACKOFF', 1.5)
+        }
+        config = {}
+        for key, (env_name, default) in defaults.items():
+            try:
+                config[key] = float(self.env.get(env_name, default))
+            except ValueError:
+                config[key] = default
+                self.logger.warning(f"Invalid {env_name} value in environment variables, defaulting to {default}")
+        return self._section(WaitConfig, config)
+
+    def android(self):
+        app_package = self.env.get('ANDROID_APP_PACKAGE', '')
+        app_activity = self.env.get('ANDROID_APP_ACTIVITY', '')
+        appium_server = self.env.get('APPIUM_SERVER', '')
+
+        # 验证必需的配置
+        if not app_package:
+            self.logger.warning("ANDROID_APP_PACKAGE is not set")
+        if not app_activity:
+            self.logger.warning("ANDROID_APP_ACTIVITY is not set")
+        if not appium_server and self.snapshot.appium_server_pool.managed <= 0:
+            self.logger.warning("APPIUM_SERVER is not set, using default localhost:4723")
+            appium_server = "http://localhost:4723"
+
+        return self._section(AndroidConfig, {
+            'app_package': app_package,
+            'app_activity': app_activity,
+            'platform_version': self.env.get('ANDROID_PLATFORM_VERSION', ''),
+            'device_name': self.env.get('ANDROID_DEVICE_NAME', ''),
+            'appium_server': appium_server,
+            'implicit_wait': self._int('IMPLICIT_WAIT', 10)
+        })
+
+    def ios(self):
+        bundle_id = self.env.get('IOS_BUNDLE_ID', '')
+        appium_server = self.env.get('APPIUM_SERVER', '')
+
+        # 验证必需的配置
+        if not bundle_id:
+            self.logger.warning("IOS_BUNDLE_ID is not set")
+        if not appium_server and self.snapshot.appium_server_pool.managed <= 0:
+            self.logger.warning("APPIUM_SERVER is not set, using default localhost:4724")
+            appium_server = "http://localhost:4724"
+
+        return self._section(IOSConfig, {
+            'bundle_id': bundle_id,
+            'platform_version': self.env.get('IOS_PLATFORM_VERSION', ''),
+            'device_name': self.env.get('IOS_DEVICE_NAME', ''),
+            'appium_server': appium_server,
+            'implicit_wait': self._int('IMPLICIT_WAIT', 10)
+        })
+
+    def appium_session(self):
+        return self._section(AppiumSessionConfig, {
+            'reuse': self._bool('APPIUM_SESSION_REUSE', 'true'),
+            'max_scenarios': self._int('APPIUM_SESSION_MAX_SCENARIOS', 20),
+            'reset_strategy': self.env.get('APPIUM_RESET_STRATEGY', 'clear').lower(),
+            'deep_link': self.env.get('APPIUM_DEEP_LINK', '')
+        })
+
+    def locator_cache(self):
+        return self._section(LocatorCacheConfig, {
+            'cache_file': self.env.get('LOCATOR_CACHE_FILE', '') or os.path.join(PROJECT_ROOT, '.cache', 'locator_winners.json'),
+            'app_version': self.env.get('APP_VERSION', '').strip(),
+            'optimize': self._bool('LOCATOR_OPTIMIZER', 'true')
+        })
+
+    def device_state(self):
+        return self._section(DeviceStateConfig, {
+            'ttl': self._float('DEVICE_STATE_TTL', 60.0),
+            'state_file': self.env.get('DEVICE_STATE_FILE', '') or os.path.join(PROJECT_ROOT, '.cache', 'device_state.json')
+        })
+
+    def device_pool(self):
+        return self._section(DevicePoolConfig, {
+            'pool_file': self._path('DEVICE_POOL_FILE'),
+            'state_dir': self.env.get('DEVICE_POOL_STATE_DIR', '') or os.path.join(PROJECT_ROOT, '.cache', 'device_pool'),
+            'quarantine_threshold': self._int('DEVICE_QUARANTINE_THRESHOLD', 2),
+            'quarantine_seconds': self._int('DEVICE_QUARANTINE_SECONDS', 300)
+        })
+
+    def appium_server_pool(self):
+        return self._section(AppiumServerPoolConfig, {
+            'managed': self._int('APPIUM_MANAGED_SERVERS', 0),
+            'command': self.env.get('APPIUM_COMMAND', '') or 'appium --address 127.0.0.1 --port {port}',
+            'startup_timeout': self._float('APPIUM_STARTUP_TIMEOUT', 60.0),
+            'max_restarts': self._int('APPIUM_MAX_RESTARTS', 3),
+            'log_dir': self.env.get('APPIUM_LOG_DIR', '') or os.path.join(PROJECT_ROOT, 'logs', 'appium')
+        })
+
+    def app_artifact(self):
+        return self._section(AppArtifactConfig, {
+            'android_app_path': self._path('ANDROID_APP_PATH'),
+            'ios_app_path': self._path('IOS_APP_PATH'),
+            'install_workers': self._int('APP_INSTALL_WORKERS', 4),
+            'state_file': self.env.get('APP_INSTALL_STATE_FILE', '') or os.path.join(PROJECT_ROOT, '.cache', 'installed_apps.json')
+        })
+
+    def command_trace(self):
+        return self._section(CommandTraceConfig, {
+            'enabled': self._bool('COMMAND_TRACE', 'false'),
+            'output_dir': self.env.get('COMMAND_TRACE_DIR', '') or os.path.join(PROJECT_ROOT, 'logs', 'command_trace'),
+            'top': self._int('COMMAND_TRACE_TOP', 20)
+        })
+
+    def logging(self):
+        level = self.env.get('LOG_LEVEL', 'INFO').upper()
+        if not isinstance(logging.getLevelName(level), int):
+            self.logger.warning(f"Invalid LOG_LEVEL '{level}', defaulting to INFO")
+            level = 'INFO'
+        return self._section(LoggingConfig, {
+            'level': level,
+            'log_dir': self._path('LOG_DIR') or os.path.join(PROJECT_ROOT, 'logs'),
+            'max_bytes': self._int('LOG_MAX_BYTES', 10 * 1024 * 1024),
+            'backup_count': self._int('LOG_BACKUP_COUNT', 5),
+            'retention': self._int('LOG_RETENTION', 50)
+        })
+
+    def screenshot(self):
+        return self._section(ScreenshotConfig, {
+            'policy': self.env.get('SCREENSHOT_POLICY', 'ring').lower(),
+            'image_format': self.env.get('SCREENSHOT_FORMAT', 'webp').lower(),
+            'quality': self._int('SCREENSHOT_QUALITY', 80),
+            'sample_rate': self._float('SCREENSHOT_SAMPLE_RATE', 0.1),
+            'ring_size': self._int('SCREENSHOT_RING_SIZE', 5)
+        })
+
+    def visual(self):
+        return self._section(VisualConfig, {
+            'baseline_dir': self._path('VISUAL_BASELINE_DIR') or os.path.join(PROJECT_ROOT, 'visual_baselines'),
+            'diff_dir': self._path('VISUAL_DIFF_DIR') or os.path.join(PROJECT_ROOT, 'screenshots', 'visual_diffs'),
+            'tolerance': self._int('VISUAL_TOLERANCE', 16),
+            'max_diff_ratio': self._float('VISUAL_MAX_DIFF_RATIO', 0.001),
+            'hash_threshold': self._int('VISUAL_HASH_THRESHOLD', 12),
+            'update_baselines': self._bool('VISUAL_UPDATE_BASELINES', 'false')
+        })
+
+    def artifacts(self):
+        return self._section(ArtifactConfig, {
+            'root': self._path('ARTIFACT_DIR') or os.path.join(PROJECT_ROOT, 'artifacts'),
+            'compress_level': self._int('ARTIFACT_COMPRESS_LEVEL', 6),
+            'archive': self._bool('ARTIFACT_ARCHIVE', 'true'),
+            'include_logs': self._bool('ARTIFACT_INCLUDE_LOGS', 'true'),
+            'retention': self._int('ARTIFACT_RETENTION', 20)
+        })
+
+    def retry(self):
+        return self._section(RetryConfig, {
+            'max_attempts': self._int('RETRY_MAX_ATTEMPTS', 3),
+            'base_delay': self._float('RETRY_BASE_DELAY', 0.5),
+            'max_delay': self._float('RETRY_MAX_DELAY', 8.0),
+            'multiplier': self._float('RETRY_MULTIPLIER', 2.0),
+            'scenario_budget': self._int('RETRY_SCENARIO_BUDGET', 20)
+        })
+
+    def _section(self, section_class, config):
+        self.logger.debug(f"{section_class.__name__}: {json.dumps(config)}")
+        return section_class(**config)
+
+    def _int(self, key, default):
+        try:
+            return int(self.env.get(key, default))
+        except ValueError:
+            self.logger.warning(f"Invalid {key} value, defaulting to {default}")
+            return default
+
+    def _float(self, key, default):
+        try:
+            return float(self.env.get(key, default))
+        except ValueError:
+            self.logger.warning(f"Invalid {key} value, defaulting to {default}")
+            return default
+
+    def _bool(self, key, default):
+        return self.env.get(key, default).lower() in _TRUE_VALUES
+
+    def _path(self, key):
+        # 相对路径相对于项目根目录
+        path = self.env.get(key, '')
+        return os.path.join(PROJECT_ROOT, path) if path and not os.path.isabs(path) else path
+
+
+_SECTIONS = ('api_base_url', 'web', 'wait', 'android', 'ios', 'appium_session', 'locator_cache', 'device_state',
+             'device_pool', 'appium_server_pool', 'app_artifact', 'command_trace', 'logging',
+             'screenshot', 'visual', 'artifacts', 'retry')
+
+
+class ConfigSnapshot:
+    """进程级只读配置快照
+
+    合并后的配置（default → 环境 → 操作系统环境变量）在创建时固定，之后不再读取os.environ；
+    各分组在第一次访问时解析一次并存入slot，之后的访问是普通的属性读取，没有字典拷贝和日志。
+    """
+
+    __slots__ = ('env_names', 'environ', '_builder', '_lock') + _SECTIONS
+
+    def __init__(self, env_names=(), env_dir: str = ENV_DIR, environ: Optional[Mapping] = None):
+        if isinstance(env_names, str):
+            env_names = [name.strip() for name in env_names.split(',') if name.strip()]
+        values = load_environment(env_names, env_dir, environ)
+        object.__setattr__(self, 'env_names', tuple(env_names))
+        object.__setattr__(self, 'environ', MappingProxyType(values))
+        object.__setattr__(self, '_builder', _SectionBuilder(values, self))
+        # 分组之间可能相互引用（android依赖appium_server_pool），需要可重入锁
+        object.__setattr__(self, '_lock', threading.RLock())
+
+    def __getattr__(self, name):
+        # 只有slot尚未赋值时才会进入这里
+        if name not in _SECTIONS:
+            raise AttributeError(name)
+        with self._lock:
+            try:
+                return object.__getattribute__(self, name)
+            except AttributeError:
+                value = getattr(self._builder, name)()
+                object.__setattr__(self, name, value)
+                return value
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("ConfigSnapshot is read-only")
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """读取合并后的原始配置值"""
+        return self.environ.get(key, default)
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_config() -> ConfigSnapshot:
+    """返回进程级配置快照，第一次调用时加载
+
+    Gauge运行时properties已经导出到环境变量中；脱离Gauge运行工具或基准测试时，
+    可以通过CONFIG_ENV（逗号分隔的环境名，如android）直接加载env/<name>/*.properties
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = ConfigSnapshot(os.environ.get('CONFIG_ENV', ''))
+            snapshot = _snapshot
+    return snapshot
+
+
+def load_config(env_names=(), env_dir: str = ENV_DIR) -> ConfigSnapshot:
+    """按指定环境重新加载进程级配置快照"""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = ConfigSnapshot(env_names, env_dir)
+        return _snapshot
+
+
+def reload_config() -> None:
+    """丢弃当前快照，下次get_config()时重新加载（环境变量变化后使用）"""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
@@ -0,0 +1,136 @@
+import atexit
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from core.utils.config_snapshot import get_config
+
+# Gauge并行执行时每个流是独立进程，通过GAUGE_PARALLEL_STREAM_ID区分
+STREAM_ID = os.environ.get('GAUGE_PARALLEL_STREAM_ID') or f'pid{os.getpid()}'
+
+# 当前场景和步骤，由hooks在Gauge钩子中设置
+_context = {'scenario': None, 'step': None}
+
+_listener = None
+_log_file = None
+_setup_lock = threading.Lock()
+
+
+def set_log_context(**values):
+    """设置附加到之后每条日志上的上下文（scenario / step），值为None表示清除"""
+    _context.update(values)
+
+
+def get_log_context():
+    """返回当前的场景和步骤"""
+    return dict(_context)
+
+
+def current_log_files():
+    """返回本进程写过的日志文件（当前文件和已滚动压缩的文件）"""
+    return sorted(glob.glob(f'{_log_file}*')) if _log_file else []
+
+
+class ContextFilter(logging.Filter):
+    """在调用线程中给日志记录附加场景、步骤和流ID（入队之前，保证归属正确）"""
+
+    def filter(self, record):
+        record.scenario = _context['scenario']
+        record.step = _context['step']
+        record.stream = STREAM_ID
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'stream': getattr(record, 'stream', STREAM_ID),
+            'scenario': getattr(record, 'scenario', None),
+            'step': getattr(record, 'step', None),
+            'thread': record.threadName
+        }
+        # 异常堆栈已由QueueHandler在入队时合并到message中
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _gzip_rotator(source, dest):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _compress_old_logs(log_dir, retention, idle_seconds=3600):
+    """压缩之前运行留下的日志，并只保留最近retention个压缩文件
+
+    只处理一段时间内没有写入的文件，避免压缩并行流正在写的日志
+    """
+    now = time.time()
+    for path in glob.glob(os.path.join(log_dir, '*.log')) + glob.glob(os.path.join(log_dir, '*.jsonl')):
+        try:
+            if now - os.path.getmtime(path) > idle_seconds:
+                _gzip_rotator(path, f'{path}.gz')
+        except OSError:
+            continue
+    archives = sorted(glob.glob(os.path.join(log_dir, '*.gz')), key=os.path.getmtime, reverse=True)
+    for path in archives[retention:] if retention > 0 else []:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def setup_log_pipeline():
+    """配置基于队列的日志管道，多次调用只生效一次
+
+    - 根logger只挂一个QueueHandler，调用方只负责入队，格式化和写文件在后台监听线程中进行
+    - 每个并行流写自己的JSON日志文件（logs/test_run_<时间>_<流ID>.jsonl），流之间没有锁竞争
+    - 日志文件超过大小时滚动并gzip压缩，之前运行的日志在后台压缩并按数量清理
+
+    Returns:
+        根logger
+    """
+    global _listener, _log_file
+    root = logging.getLogger()
+    with _setup_lock:
+        if _listener is not None:
+            return root
+        config = get_config().logging
+        os.makedirs(config.log_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_file = _log_file = os.path.join(config.log_dir, f'test_run_{timestamp}_{STREAM_ID}.jsonl')
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=config.max_bytes, backupCount=config.backup_count, encoding='utf-8'
+        )
+        file_handler.namer = lambda name: f'{name}.gz'
+        file_handler.rotator = _gzip_rotator
+        file_handler.setFormatter(JsonFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        root.setLevel(config.level)
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        threading.Thread(
+            target=_compress_old_logs, args=(config.log_dir, config.retention), name='log-compress', daemon=True
+        ).start()
+    return root
@@ -0,0 +1,246 @@
+import functools
+import logging
+import random
+import threading
+import time
+from collections import Counter
+import requests
+import urllib3.exceptions
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, NoSuchElementException
+from core.utils.config_snapshot import get_config
+
+# 异常分类，按顺序匹配第一个命中的类别（requests.ConnectTimeout同时是Timeout和ConnectionError，归为timeout）
+EXCEPTION_CATEGORIES = (
+    ('stale', (StaleElementReferenceException,)),
+    ('timeout', (TimeoutException, requests.Timeout, TimeoutError)),
+    ('network', (requests.ConnectionError, urllib3.exceptions.HTTPError, ConnectionError)),
+    ('not_found', (NoSuchElementException,)),
+)
+
+
+def classify(exception):
+    """返回异常的重试类别：stale / timeout / network / not_found / other"""
+    for category, exception_types in EXCEPTION_CATEGORIES:
+        if isinstance(exception, exception_types):
+            return category
+    return 'other'
+
+
+class RetryBudget:
+    """每个场景的重试预算（进程内共享）
+
+    一个场景内所有重试策略累计的重试次数不能超过预算，预算耗尽后失败直接抛出，
+    避免多层重试相互叠加成远超预期的运行时间。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._remaining = None
+
+    def reset(self, retries=None):
+        """重置预算，retries为None或<=0时表示不限制"""
+        with self._lock:
+            self._remaining = retries if retries and retries > 0 else None
+
+    def remaining(self):
+        """返回剩余的重试次数，不限制时返回None"""
+        return self._remaining
+
+    def take(self):
+        """消耗一次重试，预算已耗尽时返回False"""
+        with self._lock:
+            if self._remaining is None:
+                return True
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            return True
+
+
+class RetryMetrics:
+    """按策略名称统计重试次数、重试后成功、次数用尽和因预算被拒绝的次数"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, policy, event, category=None):
+        with self._lock:
+            stats = self._stats.setdefault(policy, Counter())
+            stats[event] += 1
+            if category is not None:
+                stats[f'{event}.{category}'] += 1
+
+    def summary(self):
+        """返回 {策略名称: {retried, recovered, exhausted, budget_denied, retried.<类别>...}}"""
+        with self._lock:
+            return {policy: dict(stats) for policy, stats in self._stats.items()}
+
+    def log_summary(self):
+        for policy, stats in sorted(self.summary().items()):
+            self.logger.info("Retry policy %s: %s retries, %s recovered, %s exhausted, %s denied by budget",
+                             policy, stats.get('retried', 0), stats.get('recovered', 0),
+                             stats.get('exhausted', 0), stats.get('budget_denied', 0))
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_scenario_budget = RetryBudget()
+_metrics = RetryMetrics()
+
+
+def reset_retry_budget(retries=None):
+    """在场景开始时重置重试预算，默认使用配置中的RETRY_SCENARIO_BUDGET"""
+    if retries is None:
+        retries = get_config().retry.scenario_budget
+    _scenario_budget.reset(retries)
+
+
+def get_retry_metrics():
+    """返回进程内共享的重试统计"""
+    return _metrics
+
+
+class RetryPolicy:
+    """指数退避重试策略
+
+    页面对象和API客户端按操作声明策略，未指定的参数使用RETRY_*配置：
+
+        STALE_RETRY = RetryPolicy('web.stale', retry_on=('stale',), base_delay=0.05)
+
+        @STALE_RETRY                      # 装饰器
+        def read_total(self): ...
+
+        for attempt in STALE_RETRY:       # 上下文管理器，适合只重试方法中的一段代码
+            with attempt:
+                element.click()
+
+    - 只重试retry_on中类别的异常（见classify），retry_on为None时重试所有异常
+    - 第n次重试前等待 uniform(0, min(max_delay, base_delay * multiplier**(n-1)))（full jitter），jitter=False时等待上限值
+    - retry_on_result(result)为真时把返回值当作可重试的失败（类别result），次数用尽后返回最后一次的结果
+    - 每次重试消耗场景重试预算，预算耗尽时不再重试
+    """
+
+    def __init__(self, name, retry_on=('stale', 'network'), max_attempts=None, base_delay=None, max_delay=None,
+                 multiplier=None, jitter=True, retry_on_result=None):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.retry_on = None if retry_on is None else frozenset(retry_on)
+        self.jitter = jitter
+        self.retry_on_result = retry_on_result
+        self._overrides = {'max_attempts': max_attempts, 'base_delay': base_delay, 'max_delay': max_delay, 'multiplier': multiplier}
+        self._settings = None
+
+    @property
+    def settings(self):
+        # 策略通常在类定义时创建，配置在使用时按当前快照读取，reload_config()之后自动使用新的配置
+        config = get_config()
+        cached = self._settings
+        if cached is None or cached[0] is not config:
+            retry = config.retry
+            cached = self._settings = (config, {key: retry[key] if value is None else value for key, value in self._overrides.items()})
+        return cached[1]
+
+    def retries(self, category):
+        """该类别的失败是否可以重试"""
+        return category == 'result' or self.retry_on is None or category in self.retry_on
+
+    def delay(self, retry_number):
+        """返回第retry_number次重试前的等待秒数"""
+        settings = self.settings
+        cap = min(settings['max_delay'], settings['base_delay'] * settings['multiplier'] ** (retry_number - 1))
+        return random.uniform(0, cap) if self.jitter else cap
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.run(func, *args, **kwargs)
+        return wrapper
+
+    def run(self, func, *args, **kwargs):
+        """按策略调用func并返回结果"""
+        state = _RetryState(self)
+        while True:
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not state.retry(e, classify(e)):
+                    raise
+                continue
+            if self.retry_on_result is not None and self.retry_on_result(result):
+                if state.retry(result, 'result'):
+                    continue
+                # 次数或预算用尽，返回最后一次的结果由调用方处理
+                return result
+            state.succeeded()
+            return result
+
+    def __iter__(self):
+        state = _RetryState(self)
+        while True:
+            attempt = Attempt(state)
+            yield attempt
+            if not attempt.retrying:
+                return
+
+
+class Attempt:
+    """上下文管理器形式的一次尝试，可重试的异常在退出时被吞掉并等待退避时间"""
+
+    __slots__ = ('_state', 'retrying')
+
+    def __init__(self, state):
+        self._state = state
+        self.retrying = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is None:
+            self._state.succeeded()
+            return False
+        if not isinstance(exc, Exception):
+            return False
+        self.retrying = self._state.retry(exc, classify(exc))
+        return self.retrying
+
+
+class _RetryState:
+    """一次调用的重试状态：计数、预算、统计和退避等待"""
+
+    __slots__ = ('policy', 'retries')
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.retries = 0
+
+    def retry(self, outcome, category):
+        """记录一次失败，需要重试时等待退避时间并返回True"""
+        policy = self.policy
+        if not policy.retries(category):
+            return False
+        max_attempts = policy.settings['max_attempts']
+        if self.retries + 1 >= max_attempts:
+            if max_attempts > 1:
+                _metrics.record(policy.name, 'exhausted', category)
+                policy.logger.error("%s failed after %s attempts (%s): %s", policy.name, max_attempts, category, outcome)
+            return False
+        if not _scenario_budget.take():
+            _metrics.record(policy.name, 'budget_denied', category)
+            policy.logger.error("%s not retried, scenario retry budget exhausted (%s): %s", policy.name, category, outcome)
+            return False
+        self.retries += 1
+        delay = policy.delay(self.retries)
+        _metrics.record(policy.name, 'retried', category)
+        policy.logger.warning("%s attempt %s/%s failed (%s): %s - retrying in %.2fs",
+                              policy.name, self.retries, max_attempts, category, outcome, delay)
+        time.sleep(delay)
+        return True
+
+    def succeeded(self):
+        if self.retries:
+            _metrics.record(self.policy.name, 'recovered')
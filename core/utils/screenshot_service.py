@@ -0,0 +1,171 @@
+import atexit
+import io
+import logging
+import os
+import queue
+import random
+import threading
+import weakref
+from collections import deque
+from datetime import datetime
+from PIL import Image, features
+from core.utils.config_snapshot import PROJECT_ROOT, get_config
+from core.utils.artifact_store import get_artifact_store
+from core.utils.log_pipeline import get_log_context
+
+POLICIES = ('always', 'on_failure', 'sampled', 'ring')
+
+
+class ScreenshotService:
+    """异步截图服务
+
+    测试线程只负责向driver获取PNG字节（整屏或元素截图），解码、转码（WebP/JPEG）和写盘都在后台线程完成。
+    截图按PNG内容的哈希存入产物存储，重复的画面只登记索引，不再转码和写盘。
+    截图策略（SCREENSHOT_POLICY）：
+    - always: 每次请求都写出
+    - on_failure: 忽略过程中的请求，只在场景失败时截取最终画面
+    - sampled: 按比例抽样写出
+    - ring: 每个场景在内存中保留最近N张，场景失败时连同最终画面一起写出，通过时丢弃；
+      环形缓冲按driver区分，浏览器矩阵中各浏览器的截图互不挤占
+    """
+
+    def __init__(self, store, policy='ring', image_format='webp', quality=80, sample_rate=0.1, ring_size=5):
+        self.logger = logging.getLogger(__name__)
+        if policy not in POLICIES:
+            self.logger.warning("Unknown SCREENSHOT_POLICY '%s', using 'ring'", policy)
+            policy = 'ring'
+        self.store = store
+        self.policy = policy
+        if image_format == 'webp' and not features.check('webp'):
+            self.logger.warning("Pillow is built without WebP support, writing JPEG screenshots")
+            image_format = 'jpeg'
+        self.image_format = image_format
+        self.quality = quality
+        self.sample_rate = sample_rate
+        self.ring_size = max(1, ring_size)
+        self._rings = weakref.WeakKeyDictionary()
+        self._ring_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def capture(self, driver, name, error_context=None, element=None):
+        """按策略截图
+
+        Args:
+            driver: WebDriver实例
+            name: 截图名称
+            error_context: 写入日志的错误上下文
+            element: 只截取该元素（元素截图）
+
+        Returns:
+            截图在产物存储中相对于项目根目录的路径（只在套件结束打包前有效），本次请求不写出时返回None
+        """
+        if self.policy == 'on_failure' or (self.policy == 'sampled' and random.random() >= self.sample_rate):
+            return None
+        png = self._grab(driver, element)
+        if png is None:
+            return None
+        if self.policy == 'ring':
+            with self._ring_lock:
+                ring = self._rings.get(driver)
+                if ring is None:
+                    ring = self._rings[driver] = deque(maxlen=self.ring_size)
+                # 记录截图时的场景和步骤，场景失败写出时索引到原来的步骤
+                ring.append((name, error_context, png, datetime.now(), get_log_context()))
+            return None
+        return self._submit(name, error_context, png, datetime.now())
+
+    def start_scenario(self):
+        """场景开始时丢弃上一个场景的缓冲"""
+        with self._ring_lock:
+            self._rings.clear()
+
+    def end_scenario(self, driver, failed):
+        """场景结束时（driver关闭前）对每个driver调用：失败场景写出该driver缓冲的截图和最终画面
+
+        Returns:
+            写出的截图路径列表
+        """
+        with self._ring_lock:
+            ring = self._rings.pop(driver, None) if driver is not None else None
+            buffered = list(ring) if ring else []
+        if not failed or driver is None or self.policy in ('always', 'sampled'):
+            return []
+        paths = [self._submit(*entry) for entry in buffered]
+        png = self._grab(driver)
+        if png is not None:
+            paths.append(self._submit('scenario_failed', None, png, datetime.now()))
+        return paths
+
+    def flush(self):
+        """等待后台线程写完已提交的截图"""
+        if self._worker is not None:
+            self._queue.join()
+
+    def _grab(self, driver, element=None):
+        try:
+            return element.screenshot_as_png if element is not None else driver.get_screenshot_as_png()
+        except Exception as e:
+            self.logger.error("Failed to take screenshot: %s", e)
+            return None
+
+    def _submit(self, name, error_context, png, taken_at, context=None):
+        extension = 'jpg' if self.image_format in ('jpeg', 'jpg') else self.image_format
+        path, new = self.store.reserve('screenshot', f"{name}_{taken_at.strftime('%H%M%S_%f')}",
+                                       self.store.content_key(png), extension, len(png), context)
+        if new:
+            self._ensure_worker()
+            self._queue.put((path, png))
+        relative_path = os.path.relpath(path, PROJECT_ROOT)
+        if error_context:
+            self.logger.error("Screenshot taken: %s (%s) - Error context: %s", name, relative_path, error_context)
+        else:
+            self.logger.info("Screenshot taken: %s (%s)", name, relative_path)
+        return relative_path
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='screenshot-writer', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            path, png = self._queue.get()
+            try:
+                self._write(path, png)
+            except Exception as e:
+                self.logger.error("Failed to write screenshot %s: %s", path, e)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path, png):
+        if self.image_format == 'png':
+            self.store.write_blob(path, png)
+            return
+        image = Image.open(io.BytesIO(png))
+        encoded = io.BytesIO()
+        if self.image_format in ('jpeg', 'jpg'):
+            image.convert('RGB').save(encoded, 'JPEG', quality=self.quality, optimize=True)
+        else:
+            image.save(encoded, 'WEBP', quality=self.quality, method=4)
+        self.store.write_blob(path, encoded.getvalue())
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_screenshot_service():
+    """返回进程内共享的截图服务"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            config = get_config().screenshot
+            _service = ScreenshotService(
+                get_artifact_store(), config.policy, config.image_format, config.quality, config.sample_rate, config.ring_size
+            )
+            # 写盘线程是守护线程，进程退出前等待队列写完
+            atexit.register(_service.flush)
+        return _service
@@ -0,0 +1,216 @@
+import io
+import logging
+import os
+import threading
+import numpy as np
+from PIL import Image
+from core.utils.config_snapshot import get_config
+
+
+class VisualResult:
+    """一次视觉比对的结果"""
+
+    __slots__ = ('name', 'matched', 'diff_ratio', 'diff_pixels', 'hash_distance', 'baseline_path', 'diff_path', 'created')
+
+    def __init__(self, name, matched, diff_ratio=0.0, diff_pixels=0, hash_distance=0,
+                 baseline_path=None, diff_path=None, created=False):
+        self.name = name
+        self.matched = matched
+        self.diff_ratio = diff_ratio
+        self.diff_pixels = diff_pixels
+        self.hash_distance = hash_distance
+        self.baseline_path = baseline_path
+        self.diff_path = diff_path
+        self.created = created
+
+    def __bool__(self):
+        return self.matched
+
+    def __repr__(self):
+        return (f"VisualResult({self.name}, matched={self.matched}, diff_ratio={self.diff_ratio:.5f}, "
+                f"hash_distance={self.hash_distance}, diff={self.diff_path})")
+
+
+def dhash(image, size=8):
+    """差异哈希（dHash）：缩小到(size+1)×size的灰度图后比较相邻像素，返回64位整数"""
+    # 先缩小再转灰度，整图只被读取一次
+    pixels = np.asarray(image.resize((size + 1, size), Image.BILINEAR, reducing_gap=2.0).convert('L'), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def diff_mask(current, baseline, tolerance=0):
+    """返回任一通道差值超过tolerance的像素掩码（H×W布尔数组）
+
+    使用uint8的max/min相减避免升级为int16，三个通道按元素取最大值而不是沿轴归约，1080p约几毫秒
+    """
+    if tolerance <= 0:
+        difference = current != baseline
+        return difference[..., 0] | difference[..., 1] | difference[..., 2]
+    delta = np.maximum(current, baseline)
+    delta -= np.minimum(current, baseline)
+    channel_max = np.maximum(np.maximum(delta[..., 0], delta[..., 1]), delta[..., 2])
+    return channel_max > tolerance
+
+
+class VisualComparator:
+    """基于NumPy向量化像素差异的截图基线比对
+
+    - 与基线逐字节相同时直接判定一致，不计算哈希和逐像素差异
+    - 感知哈希（dHash）距离超过阈值时直接判定不一致（保存实际截图），能发现逐像素比例很小的布局错位；
+      哈希接近时才做逐像素比较
+    - 逐像素比较支持每通道容差和忽略区域（动态内容，如时间、轮播图）
+    - 基线解码后的数组和哈希缓存在内存中，同一个基线在套件中只解码一次
+    - 逐像素比较不一致时写出差异图（差异像素标红，其余变暗）
+    - 基线不存在或开启VISUAL_UPDATE_BASELINES时把当前截图保存为基线
+    """
+
+    def __init__(self, baseline_dir, diff_dir, tolerance=16, max_diff_ratio=0.001, hash_threshold=12, update_baselines=False):
+        self.logger = logging.getLogger(__name__)
+        self.baseline_dir = baseline_dir
+        self.diff_dir = diff_dir
+        self.tolerance = tolerance
+        self.max_diff_ratio = max_diff_ratio
+        self.hash_threshold = hash_threshold
+        self.update_baselines = update_baselines
+        self._baselines = {}
+        self._masked = {}
+        self._lock = threading.Lock()
+
+    def compare(self, name, screenshot, ignore_regions=(), viewport_width=None, tolerance=None, max_diff_ratio=None):
+        """比较截图与基线
+
+        Args:
+            name: 基线名称，可以包含子目录（如 android/home）
+            screenshot: PNG字节或PIL图像
+            ignore_regions: 忽略区域 [(x, y, width, height)]
+            viewport_width: 忽略区域所用坐标系的宽度（CSS像素或设备逻辑点），为空时忽略区域按截图像素处理
+            tolerance: 每通道容差，覆盖默认值
+            max_diff_ratio: 允许的差异像素比例，覆盖默认值
+
+        Returns:
+            VisualResult
+        """
+        tolerance = self.tolerance if tolerance is None else tolerance
+        max_diff_ratio = self.max_diff_ratio if max_diff_ratio is None else max_diff_ratio
+        image = Image.open(io.BytesIO(screenshot)) if isinstance(screenshot, (bytes, bytearray)) else screenshot
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        baseline_path = os.path.join(self.baseline_dir, f'{name}.png')
+
+        baseline = None if self.update_baselines else self._load_baseline(baseline_path)
+        if baseline is None:
+            self._save_baseline(baseline_path, image)
+            self.logger.info("Visual baseline %s saved", baseline_path)
+            return VisualResult(name, True, baseline_path=baseline_path, created=True)
+        baseline_pixels, baseline_hash = baseline
+
+        current = np.asarray(image)
+        if current.shape != baseline_pixels.shape:
+            self.logger.error("Visual check %s: size %s differs from baseline %s", name, current.shape, baseline_pixels.shape)
+            return VisualResult(name, False, 1.0, current.shape[0] * current.shape[1],
+                                baseline_path=baseline_path, diff_path=self._save_current(name, image))
+
+        # 忽略区域在两张图中都被覆盖，哈希也基于覆盖后的图像计算；覆盖后的基线按忽略区域缓存
+        if ignore_regions:
+            scale = current.shape[1] / viewport_width if viewport_width else 1
+            regions = tuple(tuple(int(round(value * scale)) for value in region) for region in ignore_regions)
+            baseline_pixels, baseline_hash = self._masked_baseline(baseline_path, baseline_pixels, regions)
+            current = self._cover(current, regions)
+
+        # 与基线完全相同（稳定界面最常见的情况）时一次内存比较即可判定一致，不再计算哈希和逐像素差异
+        if np.array_equal(current, baseline_pixels):
+            return VisualResult(name, True, baseline_path=baseline_path)
+
+        # 哈希距离超过阈值（布局错位、整页内容变化）时直接判定不一致，不做逐像素比较，保存实际截图
+        if ignore_regions:
+            image = Image.fromarray(current)
+        hash_distance = bin(dhash(image) ^ baseline_hash).count('1')
+        if hash_distance > self.hash_threshold:
+            diff_path = self._save_current(name, image)
+            self.logger.error("Visual check %s failed: hash distance %s exceeds %s, actual screenshot saved to %s",
+                              name, hash_distance, self.hash_threshold, diff_path)
+            return VisualResult(name, False, 1.0, current.shape[0] * current.shape[1], hash_distance, baseline_path, diff_path)
+
+        # 哈希接近时无法区分小范围的变化（文字、图标），由逐像素比较决定
+        mask = diff_mask(current, baseline_pixels, tolerance)
+        diff_pixels = int(np.count_nonzero(mask))
+        diff_ratio = diff_pixels / mask.size
+        if diff_ratio <= max_diff_ratio:
+            return VisualResult(name, True, diff_ratio, diff_pixels, hash_distance, baseline_path)
+        diff_path = self._save_diff(name, current, mask)
+        self.logger.error("Visual check %s failed: %.4f%% pixels differ, hash distance %s, diff saved to %s",
+                          name, diff_ratio * 100, hash_distance, diff_path)
+        return VisualResult(name, False, diff_ratio, diff_pixels, hash_distance, baseline_path, diff_path)
+
+    @staticmethod
+    def _cover(pixels, regions):
+        covered = pixels.copy()
+        for x, y, width, height in regions:
+            covered[max(0, y):y + height, max(0, x):x + width] = 0
+        return covered
+
+    def _masked_baseline(self, path, pixels, regions):
+        """返回覆盖忽略区域后的基线数组和哈希，同一基线和忽略区域只计算一次"""
+        key = (path, regions)
+        with self._lock:
+            cached = self._masked.get(key)
+        if cached is None:
+            covered = self._cover(pixels, regions)
+            cached = (covered, dhash(Image.fromarray(covered)))
+            with self._lock:
+                self._masked[key] = cached
+        return cached
+
+    def _load_baseline(self, path):
+        with self._lock:
+            cached = self._baselines.get(path)
+        if cached is not None:
+            return cached
+        if not os.path.exists(path):
+            return None
+        with Image.open(path) as image:
+            image = image.convert('RGB')
+            baseline = (np.asarray(image), dhash(image))
+        with self._lock:
+            self._baselines[path] = baseline
+        return baseline
+
+    def _save_baseline(self, path, image):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image.save(path, 'PNG')
+        with self._lock:
+            self._baselines[path] = (np.asarray(image), dhash(image))
+            self._masked = {key: value for key, value in self._masked.items() if key[0] != path}
+
+    def _save_diff(self, name, current, mask):
+        # 非差异区域亮度减半，差异像素标为红色
+        overlay = current // 2
+        overlay[mask] = (255, 0, 0)
+        path = os.path.join(self.diff_dir, f'{name}.diff.png')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.fromarray(overlay).save(path, 'PNG')
+        return path
+
+    def _save_current(self, name, image):
+        path = os.path.join(self.diff_dir, f'{name}.actual.png')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image.save(path, 'PNG')
+        return path
+
+
+_comparator = None
+_comparator_lock = threading.Lock()
+
+
+def get_visual_comparator():
+    """返回进程内共享的视觉比对器（基线缓存在进程内共享）"""
+    global _comparator
+    with _comparator_lock:
+        if _comparator is None:
+            config = get_config().visual
+            _comparator = VisualComparator(
+                config.baseline_dir, config.diff_dir, config.tolerance, config.max_diff_ratio,
+                config.hash_threshold, config.update_baselines
+            )
+        return _comparator
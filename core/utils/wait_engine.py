@@ -0,0 +1,241 @@
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
+from core.utils.config_manager import ConfigManager
+
+
+class WaitBudget:
+    """每个步骤的总等待预算（线程隔离）
+
+    一个步骤内所有显式等待累计消耗的时间不能超过预算，
+    预算耗尽后后续等待立即超时，避免多个等待叠加成远超预期的失败时间。
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self, seconds=None):
+        """重置当前线程的预算，seconds为None或<=0时表示不限制"""
+        self._local.total = seconds if seconds and seconds > 0 else None
+        self._local.spent = 0.0
+
+    def remaining(self):
+        """返回当前线程剩余的预算秒数，不限制时返回None"""
+        total = getattr(self._local, 'total', None)
+        if total is None:
+            return None
+        return max(0.0, total - self._local.spent)
+
+    def consume(self, seconds):
+        """记录当前线程消耗的等待时间"""
+        if getattr(self._local, 'total', None) is not None:
+            self._local.spent += seconds
+
+
+_step_budget = WaitBudget()
+_engines = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+def get_wait_engine(driver):
+    """获取driver对应的等待引擎，同一个driver共享同一个引擎和统计数据"""
+    with _engines_lock:
+        engine = _engines.get(driver)
+        if engine is None:
+            engine = WaitEngine(driver)
+            _engines[driver] = engine
+        return engine
+
+
+def reset_step_budget(seconds=None):
+    """在步骤开始时重置等待预算，默认使用配置中的WAIT_STEP_BUDGET"""
+    if seconds is None:
+        seconds = ConfigManager().get_wait_config().get('step_budget', 0)
+    _step_budget.reset(seconds)
+
+
+def restore_implicit_waits():
+    """恢复所有引擎挂起的隐式等待，通常在步骤结束时调用
+
+    绑定到其他线程的driver（浏览器矩阵的工作线程）不在这里恢复，由其所属线程自己恢复
+    """
+    current_thread = threading.get_ident()
+    with _engines_lock:
+        engines = [engine for engine in _engines.values() if engine.owner_thread in (None, current_thread)]
+    for engine in engines:
+        engine.restore_implicit_wait()
+
+
+class WaitEngine:
+    """Web和移动端页面对象共享的显式等待引擎
+
+    - 等待期间挂起driver的隐式等待，避免显式等待和隐式等待叠加
+    - 轮询间隔自适应退避：前几次快速轮询，之后逐渐变慢
+    - 按定位器记录等待耗时
+    - 遵守每个步骤的总等待预算
+    """
+
+    IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException)
+
+    def __init__(self, driver):
+        # 引擎是_engines中以driver为键的值，只能弱引用driver，否则键永远不会被回收
+        self._driver = weakref.ref(driver)
+        self.logger = logging.getLogger(__name__)
+        config = ConfigManager().get_wait_config()
+        self.initial_poll = config.get('initial_poll', 0.05)
+        self.max_poll = config.get('max_poll', 0.5)
+        self.backoff = config.get('backoff', 1.5)
+        self._lock = threading.RLock()
+        self._implicit_wait = None
+        self._implicit_suspended = False
+        self._stats = {}
+        self.owner_thread = None
+
+    @property
+    def driver(self):
+        """引擎所属的driver，driver已被回收时返回None"""
+        return self._driver()
+
+    def bind_to_current_thread(self):
+        """声明driver只在当前线程使用，restore_implicit_waits()在其他线程调用时跳过该引擎"""
+        self.owner_thread = threading.get_ident()
+
+    def suspend_implicit_wait(self):
+        """挂起隐式等待（设置为0），重复调用不会产生额外的请求"""
+        with self._lock:
+            if self._implicit_suspended:
+                return
+            try:
+                if self._implicit_wait is None:
+                    self._implicit_wait = self.driver.timeouts.implicit_wait
+                if self._implicit_wait:
+                    self.driver.implicitly_wait(0)
+                self._implicit_suspended = True
+            except Exception as e:
+                self.logger.debug("Cannot suspend implicit wait: %s", e)
+
+    def restore_implicit_wait(self):
+        """恢复driver原有的隐式等待"""
+        with self._lock:
+            if not self._implicit_suspended:
+                return
+            self._implicit_suspended = False
+            try:
+                if self._implicit_wait:
+                    self.driver.implicitly_wait(self._implicit_wait)
+            except Exception as e:
+                self.logger.debug("Cannot restore implicit wait: %s", e)
+
+    @contextmanager
+    def implicit_wait_suspended(self):
+        """在with块内挂起隐式等待，退出时恢复（若进入前已挂起则保持挂起）"""
+        already_suspended = self._implicit_suspended
+        self.suspend_implicit_wait()
+        try:
+            yield
+        finally:
+            if not already_suspended:
+                self.restore_implicit_wait()
+
+    def probe(self, locator):
+        """零等待查找元素：挂起隐式等待后只发一次find_elements请求
+
+        Returns:
+            匹配的元素列表，不存在或查找出错时返回空列表
+        """
+        self.suspend_implicit_wait()
+        start = time.monotonic()
+        try:
+            return self.driver.find_elements(*locator)
+        except WebDriverException as e:
+            self.logger.debug("Probe failed for %s: %s", locator, e)
+            return []
+        finally:
+            self._record(locator, time.monotonic() - start, True)
+
+    def poll_intervals(self):
+        """生成自适应退避的轮询间隔"""
+        interval = self.initial_poll
+        while True:
+            yield interval
+            interval = min(interval * self.backoff, self.max_poll)
+
+    def until(self, condition, timeout=10, locator=None, message=''):
+        """等待condition(driver)返回真值并返回该值，超时抛出TimeoutException
+
+        Args:
+            condition: 接收driver的可调用对象，例如expected_conditions中的条件
+            timeout: 本次等待的超时时间(秒)，会被步骤剩余预算截断
+            locator: 用于统计的定位器
+            message: 超时异常信息
+        """
+        return self._wait(condition, timeout, locator, message, expect_truthy=True)
+
+    def until_not(self, condition, timeout=10, locator=None, message=''):
+        """等待condition(driver)返回假值，超时抛出TimeoutException"""
+        return self._wait(condition, timeout, locator, message, expect_truthy=False)
+
+    def _wait(self, condition, timeout, locator, message, expect_truthy):
+        remaining_budget = _step_budget.remaining()
+        budget_limited = remaining_budget is not None and remaining_budget < timeout
+        if budget_limited:
+            timeout = remaining_budget
+        self.suspend_implicit_wait()
+
+        start = time.monotonic()
+        end_time = start + timeout
+        intervals = self.poll_intervals()
+        try:
+            while True:
+                try:
+                    value = condition(self.driver)
+                    if bool(value) == expect_truthy:
+                        self._record(locator, time.monotonic() - start, True)
+                        return value if expect_truthy else True
+                except self.IGNORED_EXCEPTIONS:
+                    if not expect_truthy:
+                        self._record(locator, time.monotonic() - start, True)
+                        return True
+                now = time.monotonic()
+                if now >= end_time:
+                    break
+                time.sleep(min(next(intervals), end_time - now))
+        finally:
+            _step_budget.consume(time.monotonic() - start)
+
+        self._record(locator, time.monotonic() - start, False)
+        message = message or f"Wait timed out after {timeout:.2f}s for {locator}"
+        if budget_limited:
+            message = f"{message} (step wait budget exhausted)"
+        raise TimeoutException(message)
+
+    def _record(self, locator, elapsed, success):
+        key = str(locator) if locator is not None else '<condition>'
+        with self._lock:
+            stats = self._stats.setdefault(key, {'calls': 0, 'timeouts': 0, 'total_time': 0.0, 'max_time': 0.0})
+            stats['calls'] += 1
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            if not success:
+                stats['timeouts'] += 1
+
+    def get_stats(self):
+        """返回按累计等待时间降序排列的定位器统计"""
+        with self._lock:
+            items = [(key, dict(value)) for key, value in self._stats.items()]
+        return sorted(items, key=lambda item: item[1]['total_time'], reverse=True)
+
+    def log_summary(self, limit=10):
+        """将等待时间最长的定位器输出到日志"""
+        stats = self.get_stats()
+        if not stats:
+            return
+        self.logger.info("Wait time by locator (top %s):", limit)
+        for key, value in stats[:limit]:
+            self.logger.info(
+                "  %s - calls: %s, timeouts: %s, total: %.2fs, max: %.2fs",
+                key, value['calls'], value['timeouts'], value['total_time'], value['max_time']
+            )
@@ -1,100 +1,158 @@
 import logging
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, ElementNotInteractableException, WebDriverException
-from core.utils.common import take_screenshot, retry
+from core.utils.common import take_screenshot
+from core.utils.retry_policy import RetryPolicy
+from core.utils.wait_engine import get_wait_engine
+from core.utils.visual_compare import get_visual_comparator
+from core.utils.artifact_store import get_artifact_store
+from core.web import js_snippets
+from core.web.element_cache import ElementCache
 
 class BasePage:
     """Base Page Object class for all pages"""
     
+    # 元素状态对应的等待条件和在缓存句柄上的快速检查（句柄过期时检查抛出StaleElementReferenceException）
+    ELEMENT_STATES = {
+        'present': (EC.presence_of_element_located, lambda element: bool(element.tag_name)),
+        'visible': (EC.visibility_of_element_located, lambda element: element.is_displayed()),
+        'clickable': (EC.element_to_be_clickable, lambda element: element.is_displayed() and element.is_enabled())
+    }
+    
+    # 缓存的或刚找到的元素句柄过期时丢弃缓存、重新查找并重试
+    STALE_RETRY = RetryPolicy('web.stale_element', retry_on=('stale',), base_delay=0.05, max_delay=0.5)
+    
     def __init__(self, driver):
         self.driver = driver
         self.logger = logging.getLogger(__name__)
+        self.wait = get_wait_engine(driver)
+        self.element_cache = ElementCache(driver)
     
     def navigate_to(self, url):
         """Navigate to a URL"""
-        self.logger.info(f"Navigating to {url}")
+        self.logger.info("Navigating to %s", url)
+        self.element_cache.clear()
         self.driver.get(url)
     
+    def invalidate_element_cache(self):
+        """清空元素缓存，在会改变DOM的操作之后调用"""
+        self.element_cache.clear()
+    
+    def _get_element(self, locator, state='present', timeout=10):
+        """获取处于指定状态的元素，优先使用缓存句柄
+        
+        缓存句柄已过期或不满足状态时重新等待查找，并更新缓存
+        """
+        condition, check = self.ELEMENT_STATES[state]
+        element = self.element_cache.get(locator)
+        if element is not None:
+            try:
+                if check(element):
+                    return element
+            except StaleElementReferenceException:
+                self.element_cache.discard(locator, stale=True)
+        element = self.wait.until(condition(locator), timeout, locator=locator)
+        self.element_cache.put(locator, element)
+        return element
+    
+    def _with_element(self, locator, action, state='present', timeout=10):
+        """对元素执行action，元素句柄过期时重新查找
+        
+        缓存句柄过期属于正常的缓存失效，立即重新查找一次；重新查找的元素仍然过期（页面正在重新渲染）时按STALE_RETRY退避重试
+        """
+        element = self._get_element(locator, state, timeout)
+        try:
+            return action(element)
+        except StaleElementReferenceException:
+            self.element_cache.discard(locator, stale=True)
+        for attempt in self.STALE_RETRY:
+            with attempt:
+                element = self._get_element(locator, state, timeout)
+                try:
+                    return action(element)
+                except StaleElementReferenceException:
+                    self.element_cache.discard(locator, stale=True)
+                    raise
+    
     def find_element(self, locator, timeout=10):
         """Find an element on the page"""
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located(locator)
-            )
-            return element
+            return self._get_element(locator, 'present', timeout)
         except (TimeoutException, NoSuchElementException) as e:
-            self.logger.error(f"Element not found: {str(e)}")
+            self.logger.error("Element not found: %s", e)
             take_screenshot(self.driver, "element_not_found")
             raise
     
     def find_elements(self, locator, timeout=10):
         """Find elements on the page"""
         try:
-            elements = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_all_elements_located(locator)
+            elements = self.wait.until(
+                EC.presence_of_all_elements_located(locator), timeout, locator=locator
             )
             return elements
         except (TimeoutException, NoSuchElementException) as e:
-            self.logger.error(f"Elements not found: {str(e)}")
-            take_screenshot(self.driver, "elements_not_found")
+            # 空结果是合法的查询结果，不截图
+            self.logger.error("Elements not found: %s", e)
             return []
     
-    def click(self, locator, timeout=10):
-        """Click an element on the page with improved error handling and fallbacks"""
+    def click(self, locator, timeout=10, invalidate_cache=True):
+        """Click an element on the page with improved error handling and fallbacks
+        
+        点击通常会改变DOM或触发跳转，默认点击后清空元素缓存；
+        确定点击不会改变页面结构时可以传入invalidate_cache=False保留缓存
+        """
         try:
             # 首先尝试常规点击
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable(locator)
-            )
+            element = self._get_element(locator, 'clickable', timeout)
             try:
                 element.click()
+            except StaleElementReferenceException:
+                self.element_cache.discard(locator, stale=True)
+                self._with_element(locator, lambda element: element.click(), 'clickable', timeout)
             except (ElementNotInteractableException, WebDriverException) as e:
-                self.logger.warning(f"Normal click failed, trying JS click: {str(e)}")
+                self.logger.warning("Normal click failed, trying JS click: %s", e)
                 try:
                     self.driver.execute_script("arguments[0].click();", element)
                 except Exception as js_error:
-                    self.logger.error(f"JS click also failed: {str(js_error)}")
+                    self.logger.error("JS click also failed: %s", js_error)
                     # 尝试使用Actions类点击
                     from selenium.webdriver.common.action_chains import ActionChains
                     self.logger.warning("Trying click with ActionChains")
                     ActionChains(self.driver).move_to_element(element).click().perform()
         except (TimeoutException, NoSuchElementException, StaleElementReferenceException) as e:
-            self.logger.error(f"Element not clickable: {locator} - {str(e)}")
+            self.logger.error("Element not clickable: %s - %s", locator, e)
             take_screenshot(self.driver, "element_not_clickable", error_context=f"Failed to click {locator}")
             raise
+        finally:
+            if invalidate_cache:
+                self.element_cache.clear()
     
     def send_keys(self, locator, text, timeout=10):
         """Send keys to an element on the page"""
-        try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
+        def clear_and_type(element):
             element.clear()
             element.send_keys(text)
+        
+        try:
+            self._with_element(locator, clear_and_type, 'visible', timeout)
         except (TimeoutException, NoSuchElementException) as e:
-            self.logger.error(f"Cannot send keys to element: {str(e)}")
+            self.logger.error("Cannot send keys to element: %s", e)
             take_screenshot(self.driver, "send_keys_failed")
             raise
     
     def get_text(self, locator, timeout=10):
         """Get text from an element on the page"""
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
-            return element.text
+            return self._with_element(locator, lambda element: element.text, 'visible', timeout)
         except (TimeoutException, NoSuchElementException) as e:
-            self.logger.error(f"Cannot get text from element: {str(e)}")
+            self.logger.error("Cannot get text from element: %s", e)
             take_screenshot(self.driver, "get_text_failed")
             return ""
     
     def is_element_visible(self, locator, timeout=5):
         """Check if an element is visible on the page with improved error handling"""
         try:
-            WebDriverWait(self.driver, timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
+            self._get_element(locator, 'visible', timeout)
             return True
         except (TimeoutException, NoSuchElementException):
             return False
@@ -102,13 +160,61 @@ class BasePage:
     def wait_for_element_to_disappear(self, locator, timeout=10):
         """Wait for an element to disappear from the page"""
         try:
-            WebDriverWait(self.driver, timeout).until_not(
-                EC.presence_of_element_located(locator)
+            self.wait.until_not(
+                EC.presence_of_element_located(locator), timeout, locator=locator
             )
             return True
         except TimeoutException:
             return False
     
+    def probe(self, locator):
+        """零等待检查元素是否存在，单次请求立即返回，不截图"""
+        return len(self.wait.probe(locator)) > 0
+    
+    def probe_visible(self, locator):
+        """零等待检查元素是否存在且可见，元素不存在时只需一次请求"""
+        elements = self.wait.probe(locator)
+        try:
+            return bool(elements) and elements[0].is_displayed()
+        except StaleElementReferenceException:
+            return False
+    
+    def assert_element_disappears(self, locator, timeout=10):
+        """断言元素在timeout秒内消失，元素本来就不存在时立即通过"""
+        if not self.probe(locator):
+            return
+        if not self.wait_for_element_to_disappear(locator, timeout):
+            take_screenshot(self.driver, "element_not_disappeared", error_context=f"{locator} still present after {timeout}s")
+            raise AssertionError(f"Element {locator} did not disappear within {timeout}s")
+    
+    def batch_query(self, locators, attributes=None, wait_for=None, timeout=10):
+        """一次脚本调用读取多个元素的存在性、可见性、文本和属性
+        
+        Args:
+            locators: {名称: 定位器} 字典
+            attributes: 需要额外读取的属性名列表，如['value', 'href']
+            wait_for: 需要等待可见的名称列表，为空时立即返回当前状态
+            timeout: wait_for的超时时间(秒)
+        
+        Returns:
+            {名称: {'present', 'visible', 'count', 'text', 'attributes', 'error'}} 字典
+        """
+        queries = {name: list(locator) for name, locator in locators.items()}
+        args = (js_snippets.BATCH_QUERY, queries, list(attributes or []))
+        if not wait_for:
+            return self.driver.execute_script(*args)
+        
+        def all_visible(driver):
+            result = driver.execute_script(*args)
+            return result if all(result[name]['visible'] for name in wait_for) else False
+        
+        try:
+            return self.wait.until(all_visible, timeout, locator=tuple(wait_for))
+        except TimeoutException:
+            self.logger.error("Batch query timed out waiting for %s", list(wait_for))
+            take_screenshot(self.driver, "batch_query_failed", error_context=f"Waiting for {list(wait_for)}")
+            return self.driver.execute_script(*args)
+    
     def wait_for_page_load(self, timeout=30):
         """等待页面加载完成
         
@@ -116,12 +222,12 @@ class BasePage:
         """
         self.logger.info("Waiting for page to load...")
         try:
-            WebDriverWait(self.driver, timeout).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
+            self.wait.until(
+                lambda d: d.execute_script("return document.readyState") == "complete", timeout
             )
             return True
         except Exception as e:
-            self.logger.error(f"Error waiting for page load: {str(e)}")
+            self.logger.error("Error waiting for page load: %s", e)
             take_screenshot(self.driver, "page_load_timeout", error_context="Page load timeout")
             return False
     
@@ -130,7 +236,7 @@ class BasePage:
         try:
             return self.driver.execute_script(script, *args)
         except Exception as e:
-            self.logger.error(f"Error executing JavaScript: {str(e)}")
+            self.logger.error("Error executing JavaScript: %s", e)
             take_screenshot(self.driver, "js_error", error_context=f"JS error: {script[:50]}...")
             return None
     
@@ -147,20 +253,20 @@ class BasePage:
         """
         try:
             if contains:
-                WebDriverWait(self.driver, timeout).until(
-                    lambda driver: expected_title in driver.title
+                self.wait.until(
+                    lambda driver: expected_title in driver.title, timeout
                 )
-                self.logger.info(f"Page title contains '{expected_title}'")
+                self.logger.info("Page title contains '%s'", expected_title)
                 return True
             else:
-                WebDriverWait(self.driver, timeout).until(
-                    lambda driver: driver.title == expected_title
+                self.wait.until(
+                    lambda driver: driver.title == expected_title, timeout
                 )
-                self.logger.info(f"Page title is exactly '{expected_title}'")
+                self.logger.info("Page title is exactly '%s'", expected_title)
                 return True
         except TimeoutException:
             actual_title = self.driver.title
-            self.logger.error(f"Page title verification failed. Expected: '{expected_title}', Actual: '{actual_title}'")
+            self.logger.error("Page title verification failed. Expected: '%s', Actual: '%s'", expected_title, actual_title)
             take_screenshot(self.driver, "title_verification_failed")
             return False
     
@@ -174,16 +280,72 @@ class BasePage:
         Returns:
             元素对象或None
         """
-        try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located(locator)
-            )
-            self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-            # 等待滚动完成
-            import time
-            time.sleep(0.5)
+        def scroll(element):
+            # 滚动结束事件触发或元素位置连续3帧不变时脚本才返回，不再固定等待
+            settled = self.driver.execute_async_script(js_snippets.SCROLL_INTO_VIEW_SETTLED, element, 3, 3000)
+            if not settled:
+                self.logger.warning("Scrolling to %s did not settle within 3s", locator)
             return element
-        except (TimeoutException, NoSuchElementException) as e:
-            self.logger.error(f"Cannot scroll to element {locator}: {str(e)}")
+        
+        try:
+            return self._with_element(locator, scroll, 'present', timeout)
+        except (TimeoutException, NoSuchElementException, StaleElementReferenceException) as e:
+            self.logger.error("Cannot scroll to element %s: %s", locator, e)
             take_screenshot(self.driver, "scroll_to_element_failed", error_context=f"Failed to scroll to {locator}")
-            return None 
\ No newline at end of file
+            return None 
+    
+    def scroll_and_collect(self, item_locator, attributes=None, container_locator=None, max_items=0, idle_timeout=1.0, timeout=20):
+        """一次脚本调用滚动整个列表（包括无限滚动加载的内容）并收集所有行
+        
+        Args:
+            item_locator: 行元素定位器
+            attributes: 每行需要额外读取的属性名列表
+            container_locator: 滚动容器定位器，为空时滚动整个页面
+            max_items: 最多收集的行数，0表示不限制
+            idle_timeout: 滚动到底部后等待新内容加载的秒数
+            timeout: 最长执行时间(秒)，需小于driver的脚本超时时间
+        
+        Returns:
+            [{'text': 行文本, 'attributes': {属性名: 值}}] 列表
+        """
+        container = self.find_element(container_locator) if container_locator else None
+        result = self.driver.execute_async_script(
+            js_snippets.SCROLL_AND_COLLECT, list(item_locator), list(attributes or []), container,
+            max_items, int(idle_timeout * 1000), int(timeout * 1000)
+        )
+        if not result['complete']:
+            self.logger.warning("Scroll and collect for %s stopped after %ss with %s rows", item_locator, timeout, len(result['rows']))
+        return result['rows']
+    
+    def save_page_source(self, name):
+        """把完整的页面源码存入产物存储（按内容去重并压缩），返回产物路径，获取失败时返回None"""
+        try:
+            path = get_artifact_store().put('page_source', name, self.driver.page_source, 'html', compress=True)
+        except Exception as e:
+            self.logger.warning("Cannot save page source: %s", e)
+            return None
+        self.logger.info("Page source saved: %s", path)
+        return path
+    
+    def check_visual(self, name, ignore=(), tolerance=None, max_diff_ratio=None):
+        """把当前视口截图与视觉基线比较
+        
+        Args:
+            name: 基线名称
+            ignore: 忽略区域列表，元素为定位器元组或视口坐标矩形(x, y, width, height)（CSS像素）
+            tolerance: 每通道容差，覆盖VISUAL_TOLERANCE
+            max_diff_ratio: 允许的差异像素比例，覆盖VISUAL_MAX_DIFF_RATIO
+        
+        Returns:
+            VisualResult，可直接作为布尔值使用
+        """
+        locators = [list(region) for region in ignore if len(region) == 2]
+        rects = [region for region in ignore if len(region) == 4]
+        # 定位器的矩形和视口宽度在截图前一次脚本调用取回，截图与视口的比例由比对器换算
+        viewport = self.driver.execute_script(js_snippets.ELEMENT_RECTS, locators)
+        rects.extend(viewport['rects'])
+        result = get_visual_comparator().compare(
+            name, self.driver.get_screenshot_as_png(), rects, viewport['viewportWidth'], tolerance, max_diff_ratio
+        )
+        self.logger.info("Visual check %s", result)
+        return result
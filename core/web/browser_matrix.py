@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.utils.wait_engine import get_wait_engine, reset_step_budget
+from core.web.driver_factory import WebDriverFactory
+
+# 整个测试套件内每个浏览器的累计耗时，用于套件结束时的横向对比
+_suite_timings = {}
+_suite_lock = threading.Lock()
+
+
+def get_suite_timings():
+    """返回套件内每个浏览器的累计统计"""
+    with _suite_lock:
+        return {browser: dict(stats) for browser, stats in _suite_timings.items()}
+
+
+def format_timings(timings):
+    """把浏览器耗时统计格式化为对比表格"""
+    if not timings:
+        return ""
+    fastest = min(stats['total'] for stats in timings.values()) or 1e-9
+    lines = [f"{'Browser':<10} {'Steps':>6} {'Failures':>9} {'Total(s)':>9} {'vs fastest':>11}"]
+    for browser, stats in sorted(timings.items(), key=lambda item: item[1]['total']):
+        lines.append(
+            f"{browser:<10} {stats['steps']:>6} {stats['failures']:>9} {stats['total']:>9.2f} {stats['total'] / fastest:>10.2f}x"
+        )
+    return "\n".join(lines)
+
+
+class BrowserMatrix:
+    """多浏览器矩阵执行器
+
+    同一个场景在配置的多个浏览器上并发执行：每个浏览器有自己的单线程工作池
+    （WebDriver实例只在创建它的线程里使用），每个步骤分发到所有浏览器并等待全部完成，
+    任一浏览器失败时汇总所有浏览器的错误后抛出。
+    """
+
+    def __init__(self, browsers):
+        self.logger = logging.getLogger(__name__)
+        self.browsers = list(browsers)
+        self._executors = {
+            browser: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"matrix-{browser}")
+            for browser in self.browsers
+        }
+        # 每个浏览器独立的场景数据，替代data_store.scenario
+        self.stores = {browser: {'browser': browser} for browser in self.browsers}
+        self.timings = {browser: {'steps': 0, 'failures': 0, 'total': 0.0} for browser in self.browsers}
+
+    def start(self):
+        """并发为每个浏览器创建WebDriver"""
+        def create_driver(store):
+            store['web_driver'] = WebDriverFactory().get_driver(store['browser'])
+            # 步骤结束的hook在主线程运行，隐式等待改为在工作线程中恢复（见_timed）
+            get_wait_engine(store['web_driver']).bind_to_current_thread()
+        self.run(create_driver, record=False)
+        self.logger.info(f"Browser matrix started: {', '.join(self.browsers)}")
+
+    def run(self, action, record=True):
+        """在所有浏览器上并发执行action(store)
+
+        Returns:
+            {浏览器: 返回值} 字典
+
+        Raises:
+            AssertionError: 任一浏览器执行失败，信息中包含每个失败浏览器的错误
+        """
+        futures = {
+            browser: self._executors[browser].submit(self._timed, action, self.stores[browser])
+            for browser in self.browsers
+        }
+        results, errors = {}, []
+        for browser, future in futures.items():
+            elapsed, result, error = future.result()
+            if record:
+                self._record(browser, elapsed, error is not None)
+            if error is not None:
+                errors.append(f"[{browser}] {type(error).__name__}: {error}")
+            else:
+                results[browser] = result
+        if errors:
+            raise AssertionError("Step failed in browser matrix:\n" + "\n".join(errors))
+        return results
+
+    def quit(self):
+        """关闭所有浏览器并释放工作线程"""
+        def quit_driver(store):
+            driver = store.pop('web_driver', None)
+            if driver:
+                driver.quit()
+        try:
+            self.run(quit_driver, record=False)
+        except AssertionError as e:
+            self.logger.error(f"Error quitting browser matrix: {str(e)}")
+        finally:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False)
+
+    def report(self):
+        """返回本场景各浏览器的耗时对比表格"""
+        return format_timings(self.timings)
+
+    @staticmethod
+    def _timed(action, store):
+        # 每个工作线程有独立的等待预算
+        reset_step_budget()
+        start = time.monotonic()
+        try:
+            result = action(store)
+        except Exception as e:
+            return time.monotonic() - start, None, e
+        finally:
+            # 在driver所属的工作线程中恢复本次执行挂起的隐式等待
+            driver = store.get('web_driver')
+            if driver is not None:
+                get_wait_engine(driver).restore_implicit_wait()
+        return time.monotonic() - start, result, None
+
+    def _record(self, browser, elapsed, failed):
+        stats = self.timings[browser]
+        stats['steps'] += 1
+        stats['total'] += elapsed
+        stats['failures'] += int(failed)
+        with _suite_lock:
+            suite_stats = _suite_timings.setdefault(browser, {'steps': 0, 'failures': 0, 'total': 0.0})
+            suite_stats['steps'] += 1
+            suite_stats['total'] += elapsed
+            suite_stats['failures'] += int(failed)
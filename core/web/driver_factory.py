@@ -7,6 +7,7 @@ from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.firefox import GeckoDriverManager
 from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from core.utils.config_manager import ConfigManager
+from core.utils.command_tracer import trace_driver
 
 class WebDriverFactory:
     """Factory class for creating WebDriver instances"""
@@ -16,22 +17,26 @@ class WebDriverFactory:
         self.web_config = self.config.get_web_config()
         self.logger = logging.getLogger(__name__)
     
-    def get_driver(self):
-        """Get a WebDriver instance based on the configuration"""
-        browser = self.web_config.get('browser', 'chrome').lower()
+    def get_driver(self, browser=None):
+        """Get a WebDriver instance based on the configuration
+        
+        Args:
+            browser: 浏览器名称，为空时使用配置中的WEB_BROWSER
+        """
+        browser = (browser or self.web_config.get('browser', 'chrome')).lower()
         headless = self.web_config.get('headless', False)
         implicit_wait = self.web_config.get('implicit_wait', 10)
         
-        self.logger.info(f"Creating WebDriver for browser: {browser}, headless: {headless}")
+        self.logger.info("Creating WebDriver for browser: %s, headless: %s", browser, headless)
         
         if browser == 'chrome':
-            return self._get_chrome_driver(headless, implicit_wait)
+            return trace_driver(self._get_chrome_driver(headless, implicit_wait))
         elif browser == 'firefox':
-            return self._get_firefox_driver(headless, implicit_wait)
+            return trace_driver(self._get_firefox_driver(headless, implicit_wait))
         elif browser == 'edge':
-            return self._get_edge_driver(headless, implicit_wait)
+            return trace_driver(self._get_edge_driver(headless, implicit_wait))
         else:
-            self.logger.error(f"Unsupported browser: {browser}")
+            self.logger.error("Unsupported browser: %s", browser)
             raise ValueError(f"Unsupported browser: {browser}")
     
     def _get_chrome_driver(self, headless, implicit_wait):
@@ -0,0 +1,81 @@
+import threading
+import weakref
+
+# 每个driver的页面代数，任何页面对象跳转或改变DOM后加一，
+# 使同一driver上所有页面对象的缓存一起失效
+_generations = weakref.WeakKeyDictionary()
+_generations_lock = threading.Lock()
+
+
+def _current_generation(driver):
+    with _generations_lock:
+        return _generations.get(driver, 0)
+
+
+def _bump_generation(driver):
+    with _generations_lock:
+        _generations[driver] = _generations.get(driver, 0) + 1
+
+
+class ElementCache:
+    """页面对象的元素句柄缓存
+
+    按定位器缓存已经找到的元素，避免同一页面上重复查找同一个元素。
+    缓存在页面跳转或调用方声明会改变DOM的操作后失效（对同一driver上的所有页面对象生效），
+    元素过期（StaleElementReferenceException）时由调用方丢弃后重新查找。
+    """
+
+    # 进程内所有页面对象的累计命中统计
+    _totals = {'hits': 0, 'misses': 0, 'stale': 0}
+    _totals_lock = threading.Lock()
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._elements = {}
+        self._generation = _current_generation(driver)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, locator):
+        """返回缓存的元素，未命中返回None"""
+        generation = _current_generation(self.driver)
+        if generation != self._generation:
+            self._elements.clear()
+            self._generation = generation
+        element = self._elements.get(tuple(locator))
+        if element is None:
+            self._count('misses')
+        else:
+            self._count('hits')
+        return element
+
+    def put(self, locator, element):
+        """缓存元素句柄"""
+        self._elements[tuple(locator)] = element
+
+    def discard(self, locator, stale=False):
+        """丢弃某个定位器的缓存，stale为True时计入过期次数"""
+        if self._elements.pop(tuple(locator), None) is not None and stale:
+            self._count('stale')
+
+    def clear(self):
+        """清空缓存，在页面跳转或DOM变化后调用"""
+        self._elements.clear()
+        _bump_generation(self.driver)
+        self._generation = _current_generation(self.driver)
+
+    def stats(self):
+        """返回当前页面对象的缓存统计"""
+        return {'hits': self.hits, 'misses': self.misses, 'stale': self.stale, 'size': len(self._elements)}
+
+    @classmethod
+    def totals(cls):
+        """返回进程内所有页面对象的累计统计，hits即节省的查找次数"""
+        with cls._totals_lock:
+            return dict(cls._totals)
+
+    def _count(self, name):
+        setattr(self, name, getattr(self, name) + 1)
+        with self._totals_lock:
+            self._totals[name] += 1
@@ -0,0 +1,160 @@
+"""注入浏览器执行的JavaScript片段
+
+页面对象通过这些脚本在一次execute_script调用中完成原本需要多次WebDriver请求的操作。
+"""
+
+# 按Selenium定位策略在浏览器内查找元素，供其他脚本拼接使用
+LOCATE_FUNCTIONS = """
+function __locateAll(by, value, root) {
+    root = root || document;
+    switch (by) {
+        case 'id':
+            return Array.prototype.slice.call(root.querySelectorAll('[id="' + value.replace(/"/g, '\\\\"') + '"]'));
+        case 'css selector':
+            return Array.prototype.slice.call(root.querySelectorAll(value));
+        case 'class name':
+            return Array.prototype.slice.call(root.getElementsByClassName(value));
+        case 'name':
+            return Array.prototype.slice.call(root.querySelectorAll('[name="' + value.replace(/"/g, '\\\\"') + '"]'));
+        case 'tag name':
+            return Array.prototype.slice.call(root.getElementsByTagName(value));
+        case 'link text':
+        case 'partial link text':
+            return Array.prototype.filter.call(root.querySelectorAll('a'), function (a) {
+                var text = (a.innerText || '').trim();
+                return by === 'link text' ? text === value : text.indexOf(value) !== -1;
+            });
+        case 'xpath':
+            var snapshot = document.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var nodes = [];
+            for (var i = 0; i < snapshot.snapshotLength; i++) {
+                nodes.push(snapshot.snapshotItem(i));
+            }
+            return nodes;
+    }
+    throw new Error('Unsupported locator strategy: ' + by);
+}
+
+function __isVisible(el) {
+    if (!el.isConnected) {
+        return false;
+    }
+    var style = window.getComputedStyle(el);
+    if (style.display === 'none' || style.visibility === 'hidden' || parseFloat(style.opacity) === 0) {
+        return false;
+    }
+    var rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+}
+"""
+
+# arguments[0]: {name: [by, value]}, arguments[1]: 需要读取的属性名列表
+BATCH_QUERY = LOCATE_FUNCTIONS + """
+var queries = arguments[0];
+var attributes = arguments[1] || [];
+var result = {};
+Object.keys(queries).forEach(function (name) {
+    var by = queries[name][0], value = queries[name][1];
+    var entry = {present: false, visible: false, count: 0, text: '', attributes: {}, error: null};
+    try {
+        var elements = __locateAll(by, value);
+        entry.count = elements.length;
+        if (elements.length) {
+            var el = elements[0];
+            entry.present = true;
+            entry.visible = __isVisible(el);
+            entry.text = entry.visible ? (el.innerText || el.textContent || '').trim() : '';
+            attributes.forEach(function (attr) {
+                entry.attributes[attr] = attr === 'value' && 'value' in el ? el.value : el.getAttribute(attr);
+            });
+        }
+    } catch (e) {
+        entry.error = String(e);
+    }
+    result[name] = entry;
+});
+return result;
+"""
+
+# 异步脚本：平滑滚动元素到视口中央，在滚动结束事件触发或元素位置连续多帧不变时返回
+# arguments[0]: 元素, arguments[1]: 需要保持稳定的帧数, arguments[2]: 最长等待毫秒数
+SCROLL_INTO_VIEW_SETTLED = """
+var el = arguments[0], stableFrames = arguments[1], maxMs = arguments[2];
+var done = arguments[arguments.length - 1];
+var start = performance.now(), last = null, stable = 0, finished = false;
+function finish(settled) {
+    if (finished) { return; }
+    finished = true;
+    window.removeEventListener('scrollend', onScrollEnd, true);
+    done(settled);
+}
+function onScrollEnd() { finish(true); }
+function tick() {
+    if (finished) { return; }
+    var rect = el.getBoundingClientRect();
+    var key = rect.top + ',' + rect.left;
+    stable = key === last ? stable + 1 : 0;
+    last = key;
+    if (stable >= stableFrames) { return finish(true); }
+    if (performance.now() - start > maxMs) { return finish(false); }
+    requestAnimationFrame(tick);
+}
+window.addEventListener('scrollend', onScrollEnd, true);
+el.scrollIntoView({behavior: 'smooth', block: 'center'});
+requestAnimationFrame(tick);
+"""
+
+# 异步脚本：一次性滚动长列表（含无限滚动加载）并收集所有行
+# arguments[0]: [by, value] 行定位器, arguments[1]: 属性名列表, arguments[2]: 滚动容器（null表示整个页面）,
+# arguments[3]: 最多收集行数（0不限制）, arguments[4]: 到底后等待新内容的毫秒数, arguments[5]: 最长执行毫秒数
+SCROLL_AND_COLLECT = LOCATE_FUNCTIONS + """
+var by = arguments[0][0], value = arguments[0][1], attributes = arguments[1] || [];
+var container = arguments[2], maxItems = arguments[3], idleMs = arguments[4], maxMs = arguments[5];
+var done = arguments[arguments.length - 1];
+var scroller = container || document.scrollingElement || document.documentElement;
+var viewport = container ? container.clientHeight : window.innerHeight;
+var seen = new Set(), rows = [], start = performance.now(), lastChange = start, lastHeight = scroller.scrollHeight;
+function collect() {
+    __locateAll(by, value).forEach(function (el) {
+        if (seen.has(el)) { return; }
+        seen.add(el);
+        var row = {text: (el.innerText || el.textContent || '').trim(), attributes: {}};
+        attributes.forEach(function (attr) { row.attributes[attr] = el.getAttribute(attr); });
+        rows.push(row);
+    });
+}
+function step() {
+    collect();
+    var now = performance.now();
+    if (maxItems && rows.length >= maxItems) { return done({rows: rows.slice(0, maxItems), complete: true}); }
+    if (now - start > maxMs) { return done({rows: rows, complete: false}); }
+    if (scroller.scrollHeight !== lastHeight) {
+        lastHeight = scroller.scrollHeight;
+        lastChange = now;
+    }
+    var atBottom = scroller.scrollTop + viewport >= scroller.scrollHeight - 2;
+    if (!atBottom) {
+        scroller.scrollTop = scroller.scrollTop + viewport * 0.9;
+        lastChange = now;
+    } else if (now - lastChange > idleMs) {
+        return done({rows: rows, complete: true});
+    }
+    requestAnimationFrame(step);
+}
+step();
+"""
+
+# 返回定位器匹配的所有可见元素相对视口的矩形和视口宽度，用于视觉比对的忽略区域
+ELEMENT_RECTS = LOCATE_FUNCTIONS + """
+var locators = arguments[0];
+var rects = [];
+locators.forEach(function (locator) {
+    __locateAll(locator[0], locator[1]).forEach(function (el) {
+        var rect = el.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0) {
+            rects.push([rect.left, rect.top, rect.width, rect.height]);
+        }
+    });
+});
+return {rects: rects, viewportWidth: window.innerWidth};
+"""
@@ -1,6 +1,7 @@
 from selenium.webdriver.common.by import By
 from core.web.base_page import BasePage
 from core.utils.config_manager import ConfigManager
+from core.web.session_cache import SessionCache
 
 class LoginPage(BasePage):
     """Page Object for the Login Page"""
@@ -11,10 +12,14 @@ class LoginPage(BasePage):
     LOGIN_BUTTON = (By.CSS_SELECTOR, "button[type='submit']")
     FLASH_MESSAGE = (By.ID, "flash")
     
+    # 登录成功后进入的页面，未登录访问时会被重定向回登录页
+    SECURE_PATH = "/secure"
+    
     def __init__(self, driver):
         super().__init__(driver)
         self.config = ConfigManager()
         self.base_url = self.config.get_web_config().get('base_url')
+        self.session_cache = SessionCache()
     
     def open(self):
         """Open the login page"""
@@ -47,10 +52,47 @@ class LoginPage(BasePage):
         self.click_login_button()
         return self
     
+    def login_fast(self, username, password=None):
+        """优先注入缓存的登录会话，缓存未命中或会话失效时回退到UI登录
+        
+        Args:
+            username: 用户名
+            password: 密码，为空时从WEB_USERS配置中查找，仅在回退到UI登录时使用
+        """
+        key = self.session_cache.key_for(self.driver, username)
+        secure_url = f"{self.base_url}{self.SECURE_PATH}"
+        self.invalidate_element_cache()
+        if self.session_cache.restore(self.driver, key, secure_url):
+            if self.SECURE_PATH in self.driver.current_url:
+                self.logger.info(f"Logged in as {username} from cached session")
+                return self
+            self.logger.info(f"Cached session for {username} was rejected, falling back to UI login")
+            self.session_cache.invalidate(key)
+        
+        if password is None:
+            password = self.config.get_web_config().get('users', {}).get(username)
+        if password is None:
+            raise ValueError(f"No password configured for user {username} in WEB_USERS")
+        
+        self.open()
+        self.login(username, password)
+        if self.is_login_successful():
+            self.session_cache.save(self.driver, key)
+        return self
+    
     def get_flash_message(self):
         """Get the flash message text"""
         return self.get_text(self.FLASH_MESSAGE)
     
+    def get_snapshot(self, wait_for=None, timeout=10):
+        """一次请求读取登录页所有字段的状态"""
+        return self.batch_query({
+            'username': self.USERNAME_INPUT,
+            'password': self.PASSWORD_INPUT,
+            'login_button': self.LOGIN_BUTTON,
+            'flash_message': self.FLASH_MESSAGE
+        }, attributes=['value'], wait_for=wait_for, timeout=timeout)
+    
     def is_login_successful(self):
         """Check if login was successful"""
         message = self.get_flash_message()
@@ -23,7 +23,15 @@ class SecurePage(BasePage):
         """Get the header text"""
         return self.get_text(self.SECURE_AREA_HEADER)
     
+    def get_snapshot(self, wait_for=None, timeout=10):
+        """一次请求读取安全页所有字段的状态"""
+        return self.batch_query({
+            'header': self.SECURE_AREA_HEADER,
+            'flash_message': self.FLASH_MESSAGE,
+            'logout_button': self.LOGOUT_BUTTON
+        }, wait_for=wait_for, timeout=timeout)
+    
     def is_secure_page_displayed(self):
         """Check if the secure page is displayed"""
-        header_text = self.get_header_text()
-        return "Secure Area" in header_text 
\ No newline at end of file
+        snapshot = self.get_snapshot(wait_for=['header'])
+        return "Secure Area" in snapshot['header']['text'] and snapshot['logout_button']['visible'] 
\ No newline at end of file
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from core.utils.config_manager import ConfigManager
+
+# 读取/写入Web存储的脚本
+READ_STORAGE_SCRIPT = """
+return {
+    origin: window.location.origin,
+    local: Object.assign({}, window.localStorage),
+    session: Object.assign({}, window.sessionStorage)
+};
+"""
+
+WRITE_STORAGE_SCRIPT = """
+var data = arguments[0];
+Object.keys(data.local || {}).forEach(function (k) { window.localStorage.setItem(k, data.local[k]); });
+Object.keys(data.session || {}).forEach(function (k) { window.sessionStorage.setItem(k, data.session[k]); });
+"""
+
+# 在新文档加载前写入存储，只在快照所属的源上生效
+PRELOAD_STORAGE_TEMPLATE = """
+(function () {
+    var data = %s;
+    if (window.location.origin !== data.origin) { return; }
+    Object.keys(data.local || {}).forEach(function (k) { window.localStorage.setItem(k, data.local[k]); });
+    Object.keys(data.session || {}).forEach(function (k) { window.sessionStorage.setItem(k, data.session[k]); });
+})();
+"""
+
+
+def _origin(url):
+    """返回URL的源（scheme://host:port）"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class SessionCache:
+    """登录会话快照缓存
+
+    登录成功后保存cookie和Web存储，后续场景直接把快照注入浏览器，
+    用一次页面跳转代替完整的UI登录流程。快照同时保存在内存和磁盘上，
+    同一次运行的多个并行流可以共享。
+    """
+
+    _memory = {}
+    _lock = threading.Lock()
+
+    def __init__(self, cache_dir=None, ttl=None):
+        self.logger = logging.getLogger(__name__)
+        web_config = ConfigManager().get_web_config()
+        self.cache_dir = cache_dir or web_config.get('session_cache_dir')
+        self.ttl = ttl if ttl is not None else web_config.get('session_ttl', 1800)
+
+    def key_for(self, driver, username):
+        """根据浏览器类型和用户名生成缓存键"""
+        browser = (getattr(driver, 'capabilities', None) or {}).get('browserName', 'browser')
+        return f"{browser}_{username}"
+
+    def save(self, driver, key):
+        """保存当前浏览器的登录状态快照"""
+        try:
+            storage = driver.execute_script(READ_STORAGE_SCRIPT)
+            cookies = driver.get_cookies()
+        except Exception as e:
+            self.logger.warning(f"Cannot snapshot session for {key}: {str(e)}")
+            return None
+
+        expires = time.time() + self.ttl
+        cookie_expiries = [cookie['expiry'] for cookie in cookies if cookie.get('expiry')]
+        if cookie_expiries:
+            expires = min(expires, min(cookie_expiries))
+
+        snapshot = {
+            'origin': storage['origin'],
+            'cookies': cookies,
+            'local': storage['local'],
+            'session': storage['session'],
+            'created': time.time(),
+            'expires': expires
+        }
+        with self._lock:
+            self._memory[key] = snapshot
+        self._write(key, snapshot)
+        self.logger.info(f"Session snapshot saved for {key} ({len(cookies)} cookies)")
+        return snapshot
+
+    def load(self, key):
+        """读取未过期的快照，不存在或已过期时返回None"""
+        with self._lock:
+            snapshot = self._memory.get(key)
+        if snapshot is None:
+            snapshot = self._read(key)
+        if snapshot is None:
+            return None
+        if snapshot.get('expires', 0) <= time.time():
+            self.logger.info(f"Session snapshot for {key} expired")
+            self.invalidate(key)
+            return None
+        with self._lock:
+            self._memory[key] = snapshot
+        return snapshot
+
+    def restore(self, driver, key, target_url):
+        """把快照注入浏览器并打开target_url
+
+        Chrome/Edge通过CDP在跳转前写入cookie和存储，只需一次页面跳转；
+        其他浏览器需要先打开同源页面才能写入cookie。
+
+        Returns:
+            布尔值表示是否命中缓存并完成注入
+        """
+        snapshot = self.load(key)
+        if snapshot is None:
+            return False
+        if _origin(target_url) != snapshot['origin']:
+            self.logger.warning(f"Session snapshot origin {snapshot['origin']} does not match {target_url}")
+            return False
+
+        try:
+            if hasattr(driver, 'execute_cdp_cmd'):
+                self._restore_with_cdp(driver, snapshot, target_url)
+            else:
+                self._restore_with_navigation(driver, snapshot, target_url)
+            self.logger.info(f"Session snapshot restored for {key}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Cannot restore session snapshot for {key}: {str(e)}")
+            self.invalidate(key)
+            return False
+
+    def invalidate(self, key):
+        """删除快照"""
+        with self._lock:
+            self._memory.pop(key, None)
+        path = self._path(key)
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _restore_with_cdp(self, driver, snapshot, target_url):
+        cookies = []
+        for cookie in snapshot['cookies']:
+            cdp_cookie = {key: cookie[key] for key in ('name', 'value', 'path', 'secure', 'httpOnly', 'sameSite') if key in cookie}
+            cdp_cookie['domain'] = cookie.get('domain') or urlparse(snapshot['origin']).hostname
+            if cookie.get('expiry'):
+                cdp_cookie['expires'] = cookie['expiry']
+            cookies.append(cdp_cookie)
+        if cookies:
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+
+        script_id = None
+        if snapshot['local'] or snapshot['session']:
+            source = PRELOAD_STORAGE_TEMPLATE % json.dumps(snapshot)
+            script_id = driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': source})['identifier']
+        try:
+            driver.get(target_url)
+        finally:
+            if script_id is not None:
+                driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument', {'identifier': script_id})
+
+    def _restore_with_navigation(self, driver, snapshot, target_url):
+        current_url = driver.current_url or ''
+        if not current_url.startswith(snapshot['origin']):
+            driver.get(snapshot['origin'])
+        for cookie in snapshot['cookies']:
+            driver.add_cookie({key: value for key, value in cookie.items() if key != 'sameSite' or value in ('Strict', 'Lax', 'None')})
+        driver.execute_script(WRITE_STORAGE_SCRIPT, snapshot)
+        driver.get(target_url)
+
+    def _path(self, key):
+        if not self.cache_dir:
+            return None
+        safe_key = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in key)
+        return os.path.join(self.cache_dir, f'{safe_key}.json')
+
+    def _read(self, key):
+        path = self._path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Cannot read session snapshot {path}: {str(e)}")
+            return None
+
+    def _write(self, key, snapshot):
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Cannot write session snapshot {path}: {str(e)}")
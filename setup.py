@@ -12,6 +12,8 @@ setup(
         "pytest",
         "appium-python-client",
         "pytest-html",
-        "Pillow"
+        "Pillow",
+        "numpy",
+        "lxml"
     ],
 ) 
\ No newline at end of file
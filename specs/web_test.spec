@@ -31,11 +31,8 @@ This specification demonstrates web testing with The Internet login page.
 
 ## Logout from Secure Area
 
-* I open the login page
-* I enter username "tomsmith"
-* I enter password "SuperSecretPassword!"
-* I click the login button
-* I should be successfully logged in
+* I am logged in as "tomsmith"
+* The secure area page should be displayed
 * I click the logout button
 * I should be logged out
 * The login page should be displayed 
\ No newline at end of file
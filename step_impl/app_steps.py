@@ -1,17 +1,26 @@
 import logging
 import os
 import time
-from getgauge.python import step, data_store, before_scenario, after_scenario, ExecutionContext
+from getgauge.python import step, data_store, before_suite, before_scenario, after_scenario, after_suite, ExecutionContext
+from core.utils.wait_engine import get_wait_engine
+from core.utils.screenshot_service import get_screenshot_service
 
 try:
     from core.app.appium_factory import AppiumFactory
+    from core.app.session_manager import get_session_manager
+    from core.app.device_state import get_device_state_cache
+    from core.app.appium_server_pool import get_appium_server_pool
+    from core.app.app_artifacts import get_app_artifact_manager
+    from core.app.device_pool import get_device_pool
+    from core.utils.config_manager import ConfigManager
     from core.app.pages.login_page import MobileLoginPage
     from core.app.pages.home_page import MobileHomePage
     from core.app.pages.product_page import MobileProductPage
     APPIUM_AVAILABLE = True
 except ImportError:
     # 当缺少Appium时提供模拟实现
-    AppiumFactory = MobileLoginPage = MobileHomePage = MobileProductPage = None
+    AppiumFactory = MobileLoginPage = MobileHomePage = MobileProductPage = get_session_manager = get_device_state_cache = get_appium_server_pool = ConfigManager = None
+    get_app_artifact_manager = get_device_pool = None
     APPIUM_AVAILABLE = False
 
 # Setup logging
@@ -75,6 +84,47 @@ def has_tag(context, tag):
         logger.error(f"Error checking tags: {str(e)}")
         return False
 
+@before_suite
+def before_mobile_suite_hook(context):
+    """套件开始时启动托管Appium服务器，并预热设备和Appium服务器状态缓存"""
+    if not APPIUM_AVAILABLE:
+        return
+    env_tags = os.environ.get('TAGS', '').lower()
+    if 'android' not in env_tags and 'ios' not in env_tags:
+        return
+    # 托管服务器在后台启动，就绪检查与下面的缓存预热重叠进行
+    server_pool = get_appium_server_pool()
+    if server_pool is not None:
+        server_pool.start()
+    config_manager = ConfigManager()
+    if 'android' in env_tags:
+        config = config_manager.get_android_config()
+        servers = [] if server_pool is not None else [config['appium_server']]
+        get_device_state_cache().warm_up(servers, [config['app_package']])
+    elif server_pool is None:
+        get_device_state_cache().warm_up([config_manager.get_ios_config()['appium_server']])
+    install_app_artifacts('android' if 'android' in env_tags else 'ios')
+
+def install_app_artifacts(platform):
+    """在所有目标设备上并行安装被测应用，安装包哈希未变化的设备直接跳过
+    
+    Args:
+        platform: 平台名称，android或ios
+    """
+    artifacts = get_app_artifact_manager(platform)
+    if artifacts is None:
+        return
+    device_pool = get_device_pool()
+    if device_pool is not None:
+        device_ids = [device.get('udid') or name for name, device in device_pool.devices.items()
+                      if device.get('platform', platform) == platform]
+    elif platform == 'android':
+        device_ids = [ConfigManager().get_android_config()['device_name']]
+    else:
+        device_ids = ['booted']
+    results = artifacts.ensure_installed(device_ids)
+    logger.info(f"{platform} app artifact status: {results}")
+
 @before_scenario
 def before_android_scenario(context):
     """Android场景前置钩子"""
@@ -92,12 +142,12 @@ def before_android_scenario(context):
     if is_android_test:
         logger.info(f"Setting up Android driver for the scenario with tags: {env_tags}")
         try:
-            # 初始化Android driver
-            appium_factory = AppiumFactory()
-            driver = appium_factory.get_android_driver()
+            # 获取Android driver，会话在场景之间复用，只重置应用状态
+            driver = get_session_manager().acquire("android")
             # 存储driver和platform到data store
             data_store.scenario["app_driver"] = driver  # 使用独立的键存储Appium驱动
             data_store.scenario["platform"] = "android"
+            data_store.scenario["scenario_start"] = time.monotonic()
             logger.info("Android driver created successfully")
         except Exception as e:
             logger.error(f"Error creating Android driver: {str(e)}")
@@ -125,12 +175,12 @@ def before_ios_scenario_hook(context):
             # 这里为了简化，我们假设如果在iOS环境中，应用已经安装
             # 实际项目中可以添加更具体的检查
             
-            # Initialize iOS driver
-            appium_factory = AppiumFactory()
-            driver = appium_factory.get_ios_driver()
+            # 获取iOS driver，会话在场景之间复用，只重置应用状态
+            driver = get_session_manager().acquire("ios")
             # Store the driver in the data store for later use
             data_store.scenario["app_driver"] = driver  # 使用独立的键存储Appium驱动
             data_store.scenario["platform"] = "ios"
+            data_store.scenario["scenario_start"] = time.monotonic()
             logger.info("iOS driver created successfully")
         except Exception as e:
             logger.error(f"Error setting up iOS driver: {str(e)}")
@@ -149,12 +199,28 @@ def after_mobile_scenario_hook(context):
         # Get the driver from the data store
         driver = data_store.scenario.get("app_driver")  # 使用独立的键获取Appium驱动
         if driver:
+            # 失败场景写出缓冲的截图，必须在会话归还前调用
+            get_screenshot_service().end_scenario(driver, context.scenario.is_failing)
+            get_wait_engine(driver).log_summary()
             try:
-                # Quit the driver
-                driver.quit()
-                logger.info("Mobile driver quit successfully")
+                # 归还会话而不是直接退出，失败场景的会话会在下一个场景前重建
+                platform = data_store.scenario.get("platform", "android")
+                start = data_store.scenario.get("scenario_start")
+                duration = time.monotonic() - start if start is not None else None
+                get_session_manager().release(platform, failed=context.scenario.is_failing, duration=duration, driver=driver)
+                logger.info("Mobile session released successfully")
             except Exception as e:
-                logger.error(f"Error quitting mobile driver: {str(e)}")
+                logger.error(f"Error releasing mobile session: {str(e)}")
+
+@after_suite
+def after_mobile_suite_hook(context):
+    """套件结束时关闭所有复用的Appium会话和托管Appium服务器"""
+    if APPIUM_AVAILABLE:
+        get_session_manager().shutdown()
+        get_device_state_cache().stop_watcher()
+        server_pool = get_appium_server_pool()
+        if server_pool is not None:
+            server_pool.stop()
 
 def check_mobile_test_skipped(step_name):
     """检查移动测试是否应该被跳过
@@ -240,7 +306,9 @@ def click_mobile_login_button():
         
     logger.info("Clicking the mobile login button")
     login_page = data_store.scenario["login_page"]
-    login_page.click_login_button()
+    # 等待界面切换（进入主页或出现错误信息）完成，后续验证步骤不再需要固定等待
+    with login_page.expect_transition():
+        login_page.click_login_button()
 
 @step("I should be successfully logged into the mobile app")
 def verify_mobile_successful_login():
@@ -252,9 +320,6 @@ def verify_mobile_successful_login():
     driver = data_store.scenario["app_driver"]  # 使用独立的键获取Appium驱动
     platform = data_store.scenario["platform"]
     
-    # 等待登录后页面加载
-    time.sleep(1)
-    
     home_page = MobileHomePage(driver, platform)
     # Store the home page in the data store for later use
     data_store.scenario["home_page"] = home_page
@@ -278,17 +343,7 @@ def verify_mobile_error_message_displayed():
         
     logger.info("Verifying mobile error message is displayed")
     login_page = data_store.scenario["login_page"]
-    
-    # 增加重试逻辑，有时错误消息可能需要时间出现
-    max_retries = 3
-    retry_count = 0
-    while retry_count < max_retries:
-        if login_page.is_error_displayed():
-            break
-        logger.info(f"Error message not displayed yet, retrying ({retry_count+1}/{max_retries})...")
-        time.sleep(0.5)
-        retry_count += 1
-    
+    # is_error_displayed会轮询页面源码快照直到错误信息出现或超时
     assert login_page.is_error_displayed(), "Error message is not displayed"
 
 @step("The mobile error message should contain <message>")
@@ -0,0 +1,64 @@
+import logging
+from getgauge.python import before_scenario, after_scenario, before_step, after_step, after_suite, Messages
+from core.utils.wait_engine import reset_step_budget, restore_implicit_waits
+from core.utils.command_tracer import get_command_tracer
+from core.utils.retry_policy import reset_retry_budget, get_retry_metrics
+from core.utils.log_pipeline import set_log_context
+from core.utils.screenshot_service import get_screenshot_service
+from core.utils.artifact_store import get_artifact_store
+from core.utils.config_snapshot import get_config
+from core.app.page_snapshot import invalidate_step_snapshots
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+@before_scenario
+def before_scenario_log_hook(context):
+    """把当前场景附加到之后的日志记录上，清空上一个场景的截图缓冲并重置重试预算"""
+    set_log_context(scenario=context.scenario.name)
+    get_screenshot_service().start_scenario()
+    reset_retry_budget()
+
+@after_scenario
+def after_scenario_log_hook(context):
+    """场景结束时清除日志上下文"""
+    set_log_context(scenario=None, step=None)
+
+@before_step
+def before_step_hook(context):
+    """每个步骤开始时重置显式等待预算，清除上一个步骤缓存的页面快照，并设置日志和命令追踪的步骤归属"""
+    reset_step_budget()
+    invalidate_step_snapshots()
+    set_log_context(step=context.step.text)
+    tracer = get_command_tracer()
+    if tracer is not None:
+        tracer.start_step(context.step.text)
+
+@after_step
+def after_step_hook(context):
+    """步骤结束时恢复被等待引擎挂起的隐式等待"""
+    restore_implicit_waits()
+    set_log_context(step=None)
+    tracer = get_command_tracer()
+    if tracer is not None:
+        tracer.end_step()
+
+@after_suite
+def write_command_trace_hook(context):
+    """套件结束时输出命令耗时排序表、火焰图数据和重试统计，等待截图写完后写出产物清单（路径写入报告）并把本流的产物和日志打包归档"""
+    tracer = get_command_tracer()
+    if tracer is not None:
+        tracer.write_report()
+    get_retry_metrics().log_summary()
+    get_screenshot_service().flush()
+    config = get_config().artifacts
+    store = get_artifact_store()
+    if not config.archive:
+        manifest_path = store.write_manifest()
+        if manifest_path is not None:
+            Messages.write_message(f"Artifact manifest: {manifest_path}")
+        return
+    archive_path = store.archive(config.include_logs)
+    if archive_path is not None:
+        # 运行目录已删除，日志中的产物路径去掉artifacts/前缀即为归档中的成员
+        Messages.write_message(f"Artifact archive: {archive_path} (manifest: {store.run_id}/manifest.json)")
@@ -1,9 +1,14 @@
 import logging
 import os
-from getgauge.python import step, data_store, before_scenario, after_scenario
+from getgauge.python import step, data_store, before_scenario, after_scenario, after_suite, Messages
+from core.utils.config_manager import ConfigManager
 from core.web.driver_factory import WebDriverFactory
+from core.web.browser_matrix import BrowserMatrix, get_suite_timings, format_timings
 from core.web.pages.login_page import LoginPage
 from core.web.pages.secure_page import SecurePage
+from core.utils.wait_engine import get_wait_engine
+from core.utils.screenshot_service import get_screenshot_service
+from core.web.element_cache import ElementCache
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -31,15 +36,40 @@ def is_web_test(context):
     # 默认认为是Web测试
     return True
 
+def run_web(action):
+    """执行步骤逻辑：单浏览器模式下直接作用于data_store.scenario，
+    矩阵模式下在每个浏览器各自的数据上并发执行
+    
+    Args:
+        action: 接收场景数据（支持按键读写）的可调用对象
+    """
+    matrix = data_store.scenario.get("browser_matrix")
+    if matrix:
+        return matrix.run(action)
+    return action(data_store.scenario)
+
 # 只在Web测试情况下创建WebDriver
 @before_scenario
 def before_scenario_hook(context):
     # 仅在非移动测试时创建WebDriver
     if is_web_test(context):
+        browsers = ConfigManager().get_web_config().get('browser_matrix', [])
+        if len(browsers) > 1:
+            logger.info(f"Setting up browser matrix for Web test scenario: {browsers}")
+            matrix = BrowserMatrix(browsers)
+            try:
+                matrix.start()
+            except Exception as e:
+                logger.error(f"Error starting browser matrix: {str(e)}")
+                matrix.quit()
+                raise
+            data_store.scenario["browser_matrix"] = matrix
+            return
+        
         logger.info("Setting up WebDriver for Web test scenario")
         try:
             driver_factory = WebDriverFactory()
-            driver = driver_factory.get_driver()
+            driver = driver_factory.get_driver(browsers[0] if browsers else None)
             # Store the driver in the data store for later use
             data_store.scenario["web_driver"] = driver  # 使用独立的键存储Web驱动
             logger.info("WebDriver created successfully")
@@ -53,11 +83,30 @@ def before_scenario_hook(context):
 def after_scenario_hook(context):
     # 仅在非移动测试时清理WebDriver
     if is_web_test(context):
+        matrix = data_store.scenario.get("browser_matrix")
+        if matrix:
+            logger.info("Tearing down browser matrix after the scenario")
+            report = matrix.report()
+            logger.info(f"Browser matrix timings:\n{report}")
+            Messages.write_message(f"Browser matrix timings:\n{report}")
+            # 失败场景在各浏览器自己的工作线程中写出缓冲的截图，必须在driver退出前调用
+            screenshots = get_screenshot_service()
+            try:
+                matrix.run(lambda store: screenshots.end_scenario(store.get('web_driver'), context.scenario.is_failing), record=False)
+            except AssertionError as e:
+                logger.error(f"Error writing browser matrix screenshots: {str(e)}")
+            matrix.quit()
+            return
+        
         logger.info("Tearing down WebDriver after the scenario")
         try:
             # Get the driver from the data store using the web-specific key
             driver = data_store.scenario.get("web_driver")
             if driver:
+                # 失败场景写出缓冲的截图，必须在driver退出前调用
+                get_screenshot_service().end_scenario(driver, context.scenario.is_failing)
+                get_wait_engine(driver).log_summary()
+                logger.info(f"Element cache totals: {ElementCache.totals()}")
                 # Quit the driver
                 driver.quit()
                 logger.info("WebDriver quit successfully")
@@ -66,84 +115,107 @@ def after_scenario_hook(context):
     else:
         logger.info("Skipping WebDriver teardown for mobile test scenario")
 
+@after_suite
+def after_web_suite_hook(context):
+    """输出整个套件中各浏览器的耗时对比"""
+    timings = get_suite_timings()
+    if timings:
+        logger.info(f"Browser matrix suite timings:\n{format_timings(timings)}")
+
 @step("I open the login page")
 def open_login_page():
     logger.info("Opening the login page")
-    driver = data_store.scenario["web_driver"]
-    login_page = LoginPage(driver)
-    login_page.open()
-    # Store the login page in the data store for later use
-    data_store.scenario["login_page"] = login_page
+    def action(store):
+        login_page = LoginPage(store["web_driver"])
+        login_page.open()
+        # Store the login page in the data store for later use
+        store["login_page"] = login_page
+    run_web(action)
 
 @step("I enter username <username>")
 def enter_username(username):
     logger.info(f"Entering username: {username}")
-    login_page = data_store.scenario["login_page"]
-    login_page.enter_username(username)
+    run_web(lambda store: store["login_page"].enter_username(username))
 
 @step("I enter password <password>")
 def enter_password(password):
     logger.info(f"Entering password: {'*' * len(password)}")
-    login_page = data_store.scenario["login_page"]
-    login_page.enter_password(password)
+    run_web(lambda store: store["login_page"].enter_password(password))
 
 @step("I click the login button")
 def click_login_button():
     logger.info("Clicking the login button")
-    login_page = data_store.scenario["login_page"]
-    login_page.click_login_button()
+    run_web(lambda store: store["login_page"].click_login_button())
 
 @step("I should be successfully logged in")
 def verify_successful_login():
     logger.info("Verifying successful login")
-    login_page = data_store.scenario["login_page"]
-    assert login_page.is_login_successful(), "Login was not successful"
-    
-    # Create a secure page instance for the future steps
-    driver = data_store.scenario["web_driver"]
-    secure_page = SecurePage(driver)
-    # Store the secure page in the data store for later use
-    data_store.scenario["secure_page"] = secure_page
+    def action(store):
+        login_page = store["login_page"]
+        assert login_page.is_login_successful(), "Login was not successful"
+        
+        # Create a secure page instance for the future steps
+        secure_page = SecurePage(store["web_driver"])
+        # Store the secure page in the data store for later use
+        store["secure_page"] = secure_page
+    run_web(action)
+
+@step("I am logged in as <username>")
+def logged_in_as(username):
+    logger.info(f"Logging in as {username}")
+    def action(store):
+        driver = store["web_driver"]
+        login_page = LoginPage(driver)
+        login_page.login_fast(username)
+        store["login_page"] = login_page
+        store["secure_page"] = SecurePage(driver)
+    run_web(action)
 
 @step("The secure area page should be displayed")
 def verify_secure_page_displayed():
     logger.info("Verifying secure area page is displayed")
-    secure_page = data_store.scenario["secure_page"]
-    assert secure_page.is_secure_page_displayed(), "Secure area page is not displayed"
+    def action(store):
+        assert store["secure_page"].is_secure_page_displayed(), "Secure area page is not displayed"
+    run_web(action)
 
 @step("I should see an error message")
 def verify_error_message_displayed():
     logger.info("Verifying error message is displayed")
-    login_page = data_store.scenario["login_page"]
-    # 修改断言逻辑，检查flash消息中是否包含更通用的失败提示文本
-    flash_message = login_page.get_flash_message().lower()
-    assert "invalid" in flash_message, f"Error message is not displayed. Flash message: '{flash_message}'"
+    def action(store):
+        login_page = store["login_page"]
+        # 修改断言逻辑，检查flash消息中是否包含更通用的失败提示文本
+        flash_message = login_page.get_flash_message().lower()
+        assert "invalid" in flash_message, f"Error message is not displayed. Flash message: '{flash_message}'"
+    run_web(action)
 
 @step("The error message should contain <message>")
 def verify_error_message_content(message):
     logger.info(f"Verifying error message contains: {message}")
-    login_page = data_store.scenario["login_page"]
-    assert message in login_page.get_flash_message(), f"Error message does not contain: {message}"
+    def action(store):
+        login_page = store["login_page"]
+        assert message in login_page.get_flash_message(), f"Error message does not contain: {message}"
+    run_web(action)
 
 @step("I click the logout button")
 def click_logout_button():
     logger.info("Clicking the logout button")
-    secure_page = data_store.scenario["secure_page"]
-    secure_page.click_logout_button()
+    run_web(lambda store: store["secure_page"].click_logout_button())
 
 @step("I should be logged out")
 def verify_logged_out():
     logger.info("Verifying logged out")
-    driver = data_store.scenario["web_driver"]
-    login_page = LoginPage(driver)
-    # Store the login page in the data store for later use
-    data_store.scenario["login_page"] = login_page
-    # 修改断言逻辑，检查flash消息中是否包含更通用的注销提示文本
-    flash_message = login_page.get_flash_message()
-    assert "logged out" in flash_message.lower(), f"Logout message is not displayed. Flash message: '{flash_message}'"
+    def action(store):
+        login_page = LoginPage(store["web_driver"])
+        # Store the login page in the data store for later use
+        store["login_page"] = login_page
+        # 修改断言逻辑，检查flash消息中是否包含更通用的注销提示文本
+        flash_message = login_page.get_flash_message()
+        assert "logged out" in flash_message.lower(), f"Logout message is not displayed. Flash message: '{flash_message}'"
+    run_web(action)
 
 @step("The login page should be displayed")
 def verify_login_page_displayed():
     logger.info("Verifying login page is displayed")
-    driver = data_store.scenario["web_driver"]
-    assert "login" in driver.current_url.lower(), "Login page is not displayed" 
\ No newline at end of file
+    def action(store):
+        assert "login" in store["web_driver"].current_url.lower(), "Login page is not displayed"
+    run_web(action)
@@ -0,0 +1,45 @@
+import json
+import os
+import tarfile
+from core.utils.artifact_store import ArtifactStore
+from core.utils.config_snapshot import PROJECT_ROOT
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = ArtifactStore(str(tmp_path), 'run')
+    first = store.put('page_source', 'home', '<html/>', 'html', compress=True)
+    second = store.put('page_source', 'home again', '<html/>', 'html', compress=True)
+    assert first == second
+    assert first.endswith('.html.gz')
+    assert os.path.exists(os.path.join(PROJECT_ROOT, first))
+    manifest = store.manifest()
+    assert (manifest['artifacts'], manifest['unique']) == (2, 1)
+    with open(os.path.join(store.run_dir, 'index.jsonl'), encoding='utf-8') as f:
+        assert [json.loads(line)['duplicate'] for line in f] == [False, True]
+
+
+def test_archive_keeps_a_single_copy_of_the_run(tmp_path):
+    store = ArtifactStore(str(tmp_path), 'run')
+    path = store.put('page_source', 'home', 'content', 'html')
+    archive_path = store.archive(include_logs=False)
+    assert not os.path.exists(store.run_dir)
+    assert sorted(os.listdir(tmp_path)) == ['run.tar']
+    with tarfile.open(os.path.join(PROJECT_ROOT, archive_path)) as tar:
+        names = tar.getnames()
+    assert 'run/manifest.json' in names
+    assert os.path.relpath(os.path.join(PROJECT_ROOT, path), str(tmp_path)) in names
+
+
+def test_archive_without_artifacts_writes_nothing(tmp_path):
+    store = ArtifactStore(str(tmp_path), 'run')
+    assert store.archive() is None
+    assert store.write_manifest() is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_run_directories_are_pruned_without_archiving(tmp_path):
+    for index in range(4):
+        store = ArtifactStore(str(tmp_path), f'run{index}', retention=2)
+        store.put('page_source', 'home', f'content {index}', 'html')
+        store.write_manifest()
+    assert sorted(os.listdir(tmp_path)) == ['run1', 'run2', 'run3']
@@ -0,0 +1,78 @@
+import pytest
+from core.utils.config_snapshot import ConfigSnapshot, load_environment, load_properties
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_properties_separators_comments_and_blank_lines(tmp_path):
+    path = write(tmp_path / 'a.properties', '\n'.join([
+        '# comment',
+        '! also a comment',
+        '',
+        'EQUALS = value with spaces  ',
+        'COLON: other',
+        'URL=http://host:4723/wd/hub',
+        'TIME: 12:30',
+        'EMPTY=',
+        'BARE_KEY',
+    ]))
+    assert load_properties(path) == {
+        'EQUALS': 'value with spaces',
+        'COLON': 'other',
+        'URL': 'http://host:4723/wd/hub',
+        'TIME': '12:30',
+        'EMPTY': '',
+        'BARE_KEY': '',
+    }
+
+
+def test_properties_continuation_lines(tmp_path):
+    path = write(tmp_path / 'a.properties', 'BROWSER_MATRIX = chrome,\\\n    firefox,\\\n    edge\nNEXT = 1\n')
+    assert load_properties(path) == {'BROWSER_MATRIX': 'chrome,firefox,edge', 'NEXT': '1'}
+
+
+def test_environment_layers_default_env_and_os(tmp_path):
+    write(tmp_path / 'default' / 'default.properties', 'A = default\nB = default\nC = default\n')
+    write(tmp_path / 'android' / 'android.properties', 'B = android\nC = android\n')
+    values = load_environment('android', str(tmp_path), environ={'C': 'os'})
+    assert (values['A'], values['B'], values['C']) == ('default', 'android', 'os')
+
+
+def test_environment_files_in_a_layer_load_in_name_order(tmp_path):
+    write(tmp_path / 'default' / 'a.properties', 'KEY = a\n')
+    write(tmp_path / 'default' / 'b.properties', 'KEY = b\n')
+    assert load_environment((), str(tmp_path), environ={})['KEY'] == 'b'
+
+
+def test_snapshot_is_fixed_at_creation(tmp_path):
+    environ = {'WAIT_STEP_BUDGET': '5'}
+    snapshot = ConfigSnapshot((), str(tmp_path), environ)
+    environ['WAIT_STEP_BUDGET'] = '7'
+    assert snapshot.wait.step_budget == 5.0
+    assert snapshot.wait is snapshot.wait
+    assert snapshot.get('WAIT_STEP_BUDGET') == '5'
+
+
+def test_invalid_number_falls_back_to_default(tmp_path):
+    snapshot = ConfigSnapshot((), str(tmp_path), {'WAIT_STEP_BUDGET': 'soon'})
+    assert snapshot.wait.step_budget == 60.0
+
+
+def test_sections_and_snapshot_are_read_only(tmp_path):
+    snapshot = ConfigSnapshot((), str(tmp_path), {'RETRY_MAX_ATTEMPTS': '4'})
+    section = snapshot.retry
+    assert section['max_attempts'] == section.max_attempts == 4
+    assert dict(section).keys() == set(section.__slots__)
+    with pytest.raises(AttributeError):
+        section.max_attempts = 1
+    with pytest.raises(AttributeError):
+        del section.max_attempts
+    with pytest.raises(AttributeError):
+        snapshot.retry = None
+    with pytest.raises(KeyError):
+        section['missing']
+    assert isinstance(snapshot.web.browser_matrix, tuple)
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+import pytest
+from core.app.device_pool import DevicePool
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    devices = [
+        {'name': 'pixel-1', 'platform': 'android', 'udid': 'emu-1'},
+        {'name': 'pixel-2', 'platform': 'android', 'udid': 'emu-2'},
+        {'name': 'iphone', 'platform': 'ios'},
+    ]
+    pool = DevicePool(devices, str(tmp_path), quarantine_threshold=2, quarantine_seconds=300)
+    monkeypatch.setattr(pool, 'check_health', lambda device: True)
+    return pool
+
+
+def test_leases_are_exclusive_within_a_process(pool):
+    first = pool.lease('android', timeout=0)
+    second = pool.lease('android', timeout=0)
+    assert {first['name'], second['name']} == {'pixel-1', 'pixel-2'}
+    with pytest.raises(RuntimeError):
+        pool.lease('android', timeout=0)
+    pool.release(first)
+    assert pool.lease('android', timeout=0)['name'] == first['name']
+
+
+def test_lease_prefers_the_fastest_device(pool):
+    pool.record_duration(pool.devices['pixel-1'], 30)
+    pool.record_duration(pool.devices['pixel-2'], 10)
+    assert pool.lease('android', timeout=0)['name'] == 'pixel-2'
+
+
+def test_lease_held_by_a_live_process_is_skipped(pool):
+    with open(pool._lease_path('pixel-1'), 'w', encoding='utf-8') as f:
+        f.write(str(os.getppid()))
+    assert pool.lease('android', timeout=0)['name'] == 'pixel-2'
+
+
+def test_lease_of_an_exited_process_is_reclaimed(pool):
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    with open(pool._lease_path('pixel-1'), 'w', encoding='utf-8') as f:
+        f.write(str(process.pid))
+    assert pool.lease('android', timeout=0)['name'] == 'pixel-1'
+
+
+def test_repeated_failures_quarantine_the_device(pool, monkeypatch):
+    monkeypatch.setattr(pool, 'check_health', lambda device: device['name'] != 'pixel-1')
+    assert pool.lease('android', timeout=0)['name'] == 'pixel-2'
+    pool.release(pool.devices['pixel-2'])
+    assert pool.lease('android', timeout=0)['name'] == 'pixel-2'
+    assert 'pixel-1' in pool._read_state()['quarantine']
+    assert not os.path.exists(pool._lease_path('pixel-1'))
+
+
+def test_success_resets_the_failure_count(pool):
+    device = pool.devices['pixel-1']
+    pool.report_failure(device)
+    pool.report_success(device)
+    pool.report_failure(device)
+    assert 'pixel-1' not in pool._read_state().get('quarantine', {})
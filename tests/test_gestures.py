@@ -0,0 +1,32 @@
+import pytest
+from core.app.gestures import GestureEngine, overlap_rows
+
+
+class FakeDriver:
+    pass
+
+
+def rows(*titles):
+    return [{'text': title} for title in titles]
+
+
+@pytest.mark.parametrize('previous, screen, expected', [
+    ([], rows('a', 'b'), 0),
+    (rows('a', 'b', 'c'), rows('b', 'c', 'd'), 2),
+    (rows('a', 'b'), rows('a', 'b'), 2),
+    (rows('a', 'b'), rows('c', 'd'), 0),
+    (rows('x', 'x', 'y'), rows('x', 'y', 'x', 'x'), 2),
+])
+def test_overlap_rows(previous, screen, expected):
+    assert overlap_rows(previous, screen) == expected
+
+
+def test_client_side_collect_keeps_identical_rows():
+    screens = iter([rows('a', 'same', 'same'), rows('same', 'same', 'b'), rows('same', 'b'), rows('same', 'b')])
+    engine = GestureEngine(driver := FakeDriver())
+    swipes = []
+    engine.scroll = lambda *args: swipes.append(args)
+    collected = engine._collect_client_side(lambda: next(screens), max_items=0, max_swipes=10)
+    assert collected == rows('a', 'same', 'same', 'b')
+    assert len(swipes) == 3
+    assert engine.driver is driver
@@ -0,0 +1,27 @@
+import pytest
+from core.app.locator_optimizer import rewrite, ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR, IOS_CLASS_CHAIN
+
+
+@pytest.mark.parametrize('xpath, platform', [
+    ("//*[@content-desc='x' or @content-desc='y']", 'android'),
+    ("//*[@name='x' or @name='y']", 'ios'),
+    ("//android.widget.TextView[@text='a' or @text='b']", 'android'),
+    ("//XCUIElementTypeButton[@name='a' or @label='b']", 'ios'),
+    ("//XCUIElementTypeCell[2]", 'ios'),
+    ("//XCUIElementTypeCell[@name='row'][2]", 'ios'),
+])
+def test_non_equivalent_xpath_is_kept(xpath, platform):
+    assert rewrite(('xpath', xpath), platform) == ('xpath', xpath)
+
+
+@pytest.mark.parametrize('xpath, platform, expected', [
+    ("//*[@content-desc='x']", 'android', (ACCESSIBILITY_ID, 'x')),
+    ("//*[@name='x']", 'ios', (ACCESSIBILITY_ID, 'x')),
+    ("//android.widget.TextView[@text='a' and @enabled='true']", 'android',
+     (ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.TextView").text("a").enabled(true)')),
+    ('//*[@text="it\'s or not"]', 'android', (ANDROID_UIAUTOMATOR, 'new UiSelector().text("it\'s or not")')),
+    ("//XCUIElementTypeTable/XCUIElementTypeCell[2]", 'ios',
+     (IOS_CLASS_CHAIN, '**/XCUIElementTypeTable/XCUIElementTypeCell[2]')),
+])
+def test_equivalent_xpath_is_rewritten(xpath, platform, expected):
+    assert rewrite(('xpath', xpath), platform) == expected
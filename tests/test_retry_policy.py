@@ -0,0 +1,128 @@
+import pytest
+import requests
+from selenium.common.exceptions import StaleElementReferenceException, NoSuchElementException
+from core.utils import retry_policy
+from core.utils.config_snapshot import reload_config
+from core.utils.retry_policy import RetryPolicy, classify, get_retry_metrics, reset_retry_budget
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(retry_policy.time, 'sleep', sleeps.append)
+    reset_retry_budget(0)
+    get_retry_metrics().reset()
+    yield sleeps
+    reset_retry_budget(0)
+    get_retry_metrics().reset()
+
+
+def flaky(*outcomes):
+    outcomes = iter(outcomes)
+
+    def call():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return call
+
+
+@pytest.mark.parametrize('exception, category', [
+    (StaleElementReferenceException(), 'stale'),
+    (requests.ConnectTimeout(), 'timeout'),
+    (requests.ConnectionError(), 'network'),
+    (NoSuchElementException(), 'not_found'),
+    (ValueError(), 'other'),
+])
+def test_classify(exception, category):
+    assert classify(exception) == category
+
+
+def test_backoff_is_exponential_and_capped():
+    policy = RetryPolicy('test', max_attempts=5, base_delay=0.1, max_delay=0.3, multiplier=2, jitter=False)
+    assert [policy.delay(number) for number in (1, 2, 3, 4)] == [0.1, 0.2, 0.3, 0.3]
+    jittered = RetryPolicy('test', base_delay=0.1, max_delay=0.3, multiplier=2)
+    assert all(0 <= jittered.delay(3) <= 0.3 for _ in range(20))
+
+
+def test_run_retries_listed_categories_and_records_recovery(clean_state):
+    policy = RetryPolicy('test.run', retry_on=('stale',), max_attempts=3, base_delay=0.1, jitter=False)
+    assert policy.run(flaky(StaleElementReferenceException(), 'ok')) == 'ok'
+    assert clean_state == [0.1]
+    assert get_retry_metrics().summary()['test.run'] == {'retried': 1, 'retried.stale': 1, 'recovered': 1}
+
+
+def test_other_categories_are_raised_immediately():
+    policy = RetryPolicy('test.other', retry_on=('stale',), max_attempts=3, base_delay=0)
+    with pytest.raises(ValueError):
+        policy.run(flaky(ValueError(), 'ok'))
+    assert get_retry_metrics().summary() == {}
+
+
+def test_exhausted_attempts_raise_the_last_error():
+    policy = RetryPolicy('test.exhausted', max_attempts=2, base_delay=0)
+    with pytest.raises(requests.ConnectionError):
+        policy.run(flaky(requests.ConnectionError(), requests.ConnectionError(), 'ok'))
+    stats = get_retry_metrics().summary()['test.exhausted']
+    assert (stats['retried'], stats['exhausted']) == (1, 1)
+
+
+def test_scenario_budget_denies_further_retries():
+    reset_retry_budget(1)
+    policy = RetryPolicy('test.budget', max_attempts=5, base_delay=0)
+    assert policy.run(flaky(requests.ConnectionError(), 'ok')) == 'ok'
+    with pytest.raises(requests.ConnectionError):
+        policy.run(flaky(requests.ConnectionError(), 'ok'))
+    assert get_retry_metrics().summary()['test.budget']['budget_denied'] == 1
+
+
+def test_retry_on_result_returns_the_last_result_when_exhausted():
+    policy = RetryPolicy('test.result', max_attempts=3, base_delay=0, retry_on_result=lambda response: response >= 500)
+    assert policy.run(flaky(503, 200)) == 200
+    assert policy.run(flaky(503, 502, 500, 200)) == 500
+    stats = get_retry_metrics().summary()['test.result']
+    assert (stats['recovered'], stats['exhausted'], stats['exhausted.result']) == (1, 1, 1)
+
+
+def test_decorator_passes_arguments():
+    policy = RetryPolicy('test.decorator', base_delay=0)
+    call = flaky(requests.ConnectionError(), 'ok')
+
+    @policy
+    def read(prefix, suffix=''):
+        return prefix + call() + suffix
+
+    assert read('[', suffix=']') == '[ok]'
+
+
+def test_attempt_context_manager_retries_the_block():
+    policy = RetryPolicy('test.attempt', retry_on=('stale',), max_attempts=3, base_delay=0)
+    call = flaky(StaleElementReferenceException(), StaleElementReferenceException(), 'ok')
+    attempts = 0
+    for attempt in policy:
+        with attempt:
+            attempts += 1
+            result = call()
+    assert (result, attempts) == ('ok', 3)
+
+
+def test_attempt_context_manager_raises_when_exhausted():
+    policy = RetryPolicy('test.attempt', retry_on=('stale',), max_attempts=2, base_delay=0)
+    with pytest.raises(StaleElementReferenceException):
+        for attempt in policy:
+            with attempt:
+                raise StaleElementReferenceException()
+
+
+def test_settings_follow_config_reload(monkeypatch):
+    policy = RetryPolicy('test.reload', base_delay=0)
+    monkeypatch.setenv('RETRY_MAX_ATTEMPTS', '2')
+    reload_config()
+    assert policy.settings['max_attempts'] == 2
+    monkeypatch.setenv('RETRY_MAX_ATTEMPTS', '6')
+    reload_config()
+    assert policy.settings['max_attempts'] == 6
+    assert policy.settings['base_delay'] == 0
+    monkeypatch.delenv('RETRY_MAX_ATTEMPTS')
+    reload_config()
@@ -0,0 +1,70 @@
+import io
+import os
+from PIL import Image
+from core.utils.artifact_store import ArtifactStore
+from core.utils.config_snapshot import PROJECT_ROOT
+from core.utils.screenshot_service import ScreenshotService
+
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class FakeDriver:
+    def __init__(self, color):
+        self.screen = png(color)
+
+    def get_screenshot_as_png(self):
+        return self.screen
+
+
+def service(tmp_path, policy='ring', ring_size=2, image_format='png'):
+    return ScreenshotService(ArtifactStore(str(tmp_path), 'run'), policy, image_format, ring_size=ring_size)
+
+
+def test_ring_keeps_the_newest_shots_and_writes_them_on_failure(tmp_path):
+    screenshots = service(tmp_path)
+    driver = FakeDriver('red')
+    for color in ('black', 'white', 'blue'):
+        driver.screen = png(color)
+        assert screenshots.capture(driver, color) is None
+    driver.screen = png('green')
+    paths = screenshots.end_scenario(driver, failed=True)
+    screenshots.flush()
+    assert len(paths) == 3
+    assert all(os.path.exists(os.path.join(PROJECT_ROOT, path)) for path in paths)
+    names = [entry['name'].rsplit('_', 2)[0] for entry in screenshots.store.manifest()['scenarios']['(suite)']]
+    assert names == ['white', 'blue', 'scenario_failed']
+
+
+def test_ring_is_discarded_when_the_scenario_passes(tmp_path):
+    screenshots = service(tmp_path)
+    driver = FakeDriver('red')
+    screenshots.capture(driver, 'step')
+    assert screenshots.end_scenario(driver, failed=False) == []
+    assert screenshots.end_scenario(driver, failed=True) != []
+    assert screenshots.store.manifest()['artifacts'] == 1
+
+
+def test_rings_are_kept_per_driver(tmp_path):
+    screenshots = service(tmp_path, ring_size=5)
+    chrome, firefox = FakeDriver('red'), FakeDriver('blue')
+    for _ in range(3):
+        screenshots.capture(chrome, 'chrome')
+    screenshots.capture(firefox, 'firefox')
+    assert len(screenshots.end_scenario(chrome, failed=True)) == 4
+    assert len(screenshots.end_scenario(firefox, failed=True)) == 2
+
+
+def test_always_policy_dedupes_and_flush_waits_for_the_writer(tmp_path):
+    screenshots = service(tmp_path, policy='always', image_format='jpeg')
+    driver = FakeDriver('red')
+    first = screenshots.capture(driver, 'one')
+    second = screenshots.capture(driver, 'two')
+    screenshots.flush()
+    assert first == second and first.endswith('.jpg')
+    with Image.open(os.path.join(PROJECT_ROOT, first)) as image:
+        assert image.format == 'JPEG'
+    assert screenshots.end_scenario(driver, failed=True) == []
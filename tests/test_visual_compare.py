@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from core.utils.visual_compare import VisualComparator
+
+
+@pytest.fixture
+def comparator(tmp_path):
+    return VisualComparator(str(tmp_path / 'baselines'), str(tmp_path / 'diffs'))
+
+
+@pytest.fixture
+def screen():
+    pixels = np.zeros((120, 200, 3), np.uint8)
+    pixels[:, :100] = 200
+    pixels[::20] = 90
+    return pixels
+
+
+def compare(comparator, pixels, **kwargs):
+    return comparator.compare('home', Image.fromarray(pixels), **kwargs)
+
+
+def test_first_run_creates_the_baseline(comparator, screen):
+    result = compare(comparator, screen)
+    assert result.matched and result.created
+    assert os.path.exists(result.baseline_path)
+
+
+def test_identical_screen_matches_without_diffing(comparator, screen):
+    compare(comparator, screen)
+    result = compare(comparator, screen.copy())
+    assert result.matched
+    assert (result.diff_ratio, result.hash_distance, result.diff_path) == (0.0, 0, None)
+
+
+def test_small_change_within_ratio_matches(comparator, screen):
+    compare(comparator, screen)
+    changed = screen.copy()
+    changed[5, 150] = 255
+    result = compare(comparator, changed, max_diff_ratio=0.001)
+    assert result.matched
+    assert result.diff_pixels == 1
+
+
+def test_large_hash_distance_fails_and_saves_the_actual_screen(comparator, screen):
+    compare(comparator, screen)
+    result = compare(comparator, screen[:, ::-1].copy())
+    assert not result.matched
+    assert result.hash_distance > comparator.hash_threshold
+    assert result.diff_path.endswith('home.actual.png')
+
+
+def test_pixel_difference_with_similar_hash_writes_a_diff_image(comparator, screen):
+    compare(comparator, screen)
+    result = compare(comparator, screen // 2 + 40)
+    assert not result.matched
+    assert result.hash_distance <= comparator.hash_threshold
+    assert result.diff_path.endswith('home.diff.png')
+    assert result.diff_ratio > 0.5
+
+
+def test_ignored_regions_are_not_compared(comparator, screen):
+    compare(comparator, screen)
+    changed = screen.copy()
+    changed[0:30, 0:50] = 0
+    assert not compare(comparator, changed, max_diff_ratio=0)
+    assert compare(comparator, changed, ignore_regions=[(0, 0, 25, 15)], viewport_width=100, max_diff_ratio=0)
+
+
+def test_size_mismatch_fails(comparator, screen):
+    compare(comparator, screen)
+    result = compare(comparator, screen[:100])
+    assert not result.matched and result.diff_ratio == 1.0
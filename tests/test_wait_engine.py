@@ -0,0 +1,89 @@
+import gc
+import threading
+import pytest
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from core.utils import wait_engine
+from core.utils.wait_engine import WaitEngine, get_wait_engine, reset_step_budget, restore_implicit_waits
+from core.web.browser_matrix import BrowserMatrix
+
+
+class FakeTimeouts:
+    implicit_wait = 5
+
+
+class FakeDriver:
+    def __init__(self):
+        self.timeouts = FakeTimeouts()
+        self.implicit_calls = []
+
+    def implicitly_wait(self, seconds):
+        self.implicit_calls.append(seconds)
+
+
+@pytest.fixture(autouse=True)
+def unlimited_budget():
+    reset_step_budget(0)
+    yield
+    reset_step_budget(0)
+
+
+def test_engine_is_shared_per_driver_and_released_with_it():
+    driver = FakeDriver()
+    engine = get_wait_engine(driver)
+    assert get_wait_engine(driver) is engine
+    assert engine.driver is driver
+    del driver, engine
+    gc.collect()
+    assert len(wait_engine._engines) == 0
+
+
+def test_until_returns_value_and_suspends_implicit_wait_once():
+    driver = FakeDriver()
+    engine = WaitEngine(driver)
+    answers = iter([None, NoSuchElementException('x'), 'found'])
+
+    def condition(_):
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    assert engine.until(condition, timeout=2, locator=('id', 'a')) == 'found'
+    assert driver.implicit_calls == [0]
+    restore_implicit_waits()
+    assert driver.implicit_calls == [0]
+    engine.restore_implicit_wait()
+    assert driver.implicit_calls == [0, 5]
+    assert engine.get_stats()[0][1]['calls'] == 1
+
+
+def test_step_budget_caps_the_timeout():
+    engine = WaitEngine(FakeDriver())
+    reset_step_budget(0.1)
+    with pytest.raises(TimeoutException, match='step wait budget exhausted'):
+        engine.until(lambda _: False, timeout=5)
+    with pytest.raises(TimeoutException):
+        engine.until(lambda _: False, timeout=5)
+    assert engine.get_stats()[0][1]['timeouts'] == 2
+
+
+def test_drivers_bound_to_a_matrix_worker_are_restored_on_that_thread():
+    class ThreadRecordingDriver(FakeDriver):
+        def implicitly_wait(self, seconds):
+            super().implicitly_wait(seconds)
+            self.threads.append(threading.current_thread().name)
+
+    driver = ThreadRecordingDriver()
+    driver.threads = []
+    matrix = BrowserMatrix(['chrome'])
+    matrix.stores['chrome']['web_driver'] = driver
+    try:
+        matrix.run(lambda store: get_wait_engine(store['web_driver']).bind_to_current_thread(), record=False)
+        restore_implicit_waits()
+        matrix.run(lambda store: get_wait_engine(store['web_driver']).suspend_implicit_wait(), record=False)
+        restore_implicit_waits()
+        assert driver.implicit_calls == [0, 5]
+        assert all(name.startswith('matrix-chrome') for name in driver.threads)
+    finally:
+        matrix.stores['chrome'].pop('web_driver')
+        matrix.quit()